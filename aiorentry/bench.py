@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import subprocess
+import sys
+import time
+import timeit
+from typing import Any, Awaitable, Callable, Sequence, TypeVar
+
+from aiorentry.bulk import bounded_map
+from aiorentry.client import Client
+from aiorentry.codec import available_loads
+from aiorentry.connection import ConnectionConfig
+from aiorentry.models import BulkResult, Page
+from aiorentry.testing import FakeRentryServer
+from aiorentry.tracing import Histogram
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def _write(line: str = '') -> None:
+    sys.stdout.write(f'{line}\n')
+
+
+def make_text(size: int) -> str:
+    line = 'Line with "quotes", \\backslashes\\ and юникод 😀\n'
+    text = line * (size // len(line) + 1)
+
+    return text[:size]
+
+
+def make_raw_payload(size: int) -> bytes:
+    return json.dumps({'status': '200', 'content': make_text(size)}).encode()
+
+
+def bench_codec(args: argparse.Namespace) -> None:
+    _write(f'{"codec":<10}{"size":>12}{"ops/s":>12}{"MB/s":>12}')
+
+    for size in args.sizes:
+        payload = make_raw_payload(size)
+
+        for name, loads in available_loads().items():
+            elapsed = timeit.timeit(
+                lambda: loads(payload),
+                number=args.number,
+            )
+            ops = args.number / elapsed
+            throughput = len(payload) * ops / 1024 / 1024
+
+            _write(f'{name:<10}{size:>12}{ops:>12.1f}{throughput:>12.1f}')
+
+
+def import_times(module: str) -> dict[str, tuple[int, int]]:
+    # Self and cumulative import time of every imported module in
+    # microseconds, measured in a fresh interpreter
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    times = {}
+
+    for line in output.splitlines():
+        _, _, fields = line.partition('import time:')
+        self_time, cumulative, name = fields.split('|')
+
+        # Skips the header
+        if self_time.strip().isdigit():
+            times[name.strip()] = (int(self_time), int(cumulative))
+
+    return times
+
+
+def bench_imports(args: argparse.Namespace) -> None:
+    # The best of several runs, to filter out the noise of a cold start
+    runs = [import_times(args.module) for _ in range(args.number)]
+    names = [name for name in runs[0] if name.startswith('aiorentry')]
+
+    _write(f'{"module":<28}{"self ms":>10}{"total ms":>10}')
+
+    for name in names:
+        self_time = min(run[name][0] for run in runs) / 1000
+        cumulative = min(run[name][1] for run in runs) / 1000
+
+        _write(f'{name:<28}{self_time:>10.1f}{cumulative:>10.1f}')
+
+    own = min(sum(run[name][0] for name in names) for run in runs) / 1000
+
+    _write(f'{"aiorentry (self)":<28}{own:>10.1f}')
+
+
+async def _measure(
+    func: Callable[[T], Awaitable[R]],
+    items: Sequence[T],
+    concurrency: int,
+) -> tuple[float, Histogram, list[BulkResult[R]]]:
+    histogram = Histogram()
+
+    async def timed(item: T) -> R:
+        started_at = time.perf_counter()
+        result = await func(item)
+        histogram.record(time.perf_counter() - started_at)
+
+        return result
+
+    started_at = time.perf_counter()
+    results = [
+        result
+        async for result in bounded_map(
+            timed,
+            items,
+            concurrency=concurrency,
+            ordered=False,
+        )
+    ]
+
+    return time.perf_counter() - started_at, histogram, results
+
+
+async def _bench_client_once(
+    server: FakeRentryServer,
+    args: argparse.Namespace,
+    concurrency: int,
+) -> None:
+    text = make_text(args.page_size)
+    connection = ConnectionConfig(
+        limit=concurrency,
+        limit_per_host=concurrency,
+    )
+
+    if args.in_memory:
+        client = Client(transport=server.transport())
+    else:
+        client = Client(str(server.url), connection=connection)
+
+    async with client:
+        async def new_page(index: int) -> Page:
+            return await client.new_page(text)
+
+        async def edit_page(page: Page) -> Page:
+            return await client.edit_page(
+                text[::-1],
+                url=page.url,
+                edit_code=page.edit_code,
+            )
+
+        async def raw(page: Page) -> str:
+            return await client.raw(page.url, server.raw_access_code)
+
+        async def delete_page(page: Page) -> bool:
+            return await client.delete_page(
+                url=page.url,
+                edit_code=page.edit_code,
+            )
+
+        runs: list[tuple[str, Callable[[Any], Awaitable[Any]]]] = [
+            ('edit_page', edit_page),
+            ('raw', raw),
+            ('delete_page', delete_page),
+        ]
+
+        elapsed, histogram, created = await _measure(
+            new_page,
+            range(args.requests),
+            concurrency,
+        )
+        _write_client_row('new_page', concurrency, elapsed, histogram, created)
+        pages = [result.result for result in created if result.ok]
+
+        for name, func in runs:
+            elapsed, histogram, results = await _measure(
+                func,
+                pages,
+                concurrency,
+            )
+            _write_client_row(name, concurrency, elapsed, histogram, results)
+
+
+def _write_client_row(
+    operation: str,
+    concurrency: int,
+    elapsed: float,
+    histogram: Histogram,
+    results: Sequence[BulkResult[Any]],
+) -> None:
+    errors = sum(not result.ok for result in results)
+    ops = len(results) / elapsed if elapsed else 0.0
+    p50, p95, p99 = (
+        histogram.percentile(percent) * 1000 for percent in (50, 95, 99)
+    )
+
+    _write(
+        f'{operation:<12}{concurrency:>6}{ops:>10.1f}{errors:>8}'
+        f'{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}',
+    )
+
+
+async def _bench_client(args: argparse.Namespace) -> None:
+    server = FakeRentryServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        max_page_size=None,
+        seed=0,
+    )
+
+    _write(
+        f'{"operation":<12}{"conc":>6}{"ops/s":>10}{"errors":>8}'
+        f'{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}',
+    )
+
+    # The in-memory server doesn't need to be started
+    started = contextlib.nullcontext(server) if args.in_memory else server
+
+    async with started:
+        for concurrency in args.concurrency:
+            await _bench_client_once(server, args, concurrency)
+
+
+def bench_client(args: argparse.Namespace) -> None:
+    asyncio.run(_bench_client(args))
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m aiorentry.bench',
+        description='aiorentry benchmarks',
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    codec = commands.add_parser(
+        'codec',
+        help='Compare JSON codecs on raw API payloads',
+    )
+    codec.add_argument(
+        '--sizes',
+        type=int,
+        nargs='+',
+        default=[1024, 64 * 1024, 1024 * 1024],
+        help='Page sizes in characters',
+    )
+    codec.add_argument('--number', type=int, default=200)
+    codec.set_defaults(func=bench_codec)
+
+    client = commands.add_parser(
+        'client',
+        help='Measure client throughput against a local fake server',
+    )
+    client.add_argument(
+        '--concurrency',
+        type=int,
+        nargs='+',
+        default=[1, 10, 50],
+    )
+    client.add_argument(
+        '--requests',
+        type=int,
+        default=200,
+        help='Requests per operation and concurrency level',
+    )
+    client.add_argument(
+        '--page-size',
+        type=int,
+        default=1024,
+        help='Page size in characters',
+    )
+    client.add_argument(
+        '--latency',
+        type=float,
+        default=0.0,
+        help='Artificial server latency in seconds',
+    )
+    client.add_argument('--jitter', type=float, default=0.0)
+    client.add_argument(
+        '--error-rate',
+        type=float,
+        default=0.0,
+        help='Share of requests failed by the server',
+    )
+    client.add_argument(
+        '--rate-limit',
+        type=float,
+        default=None,
+        help='Server rate limit in requests per second',
+    )
+    client.add_argument(
+        '--in-memory',
+        action='store_true',
+        help='Serve the client in-process, without sockets',
+    )
+    client.set_defaults(func=bench_client)
+
+    imports = commands.add_parser(
+        'imports',
+        help='Measure the import time of a module in a fresh interpreter',
+    )
+    imports.add_argument('--module', default='aiorentry.client')
+    imports.add_argument('--number', type=int, default=5)
+    imports.set_defaults(func=bench_imports)
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+import asyncio
+from collections import deque
+from typing import (
+    AsyncGenerator, AsyncIterable, AsyncIterator, Awaitable, Callable,
+    Iterable, TypeVar,
+)
+
+from aiorentry.models import BulkResult
+
+DEFAULT_BULK_CONCURRENCY = 10
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+Items = Iterable[T] | AsyncIterable[T]
+
+
+async def iterate(items: Items[T]) -> AsyncGenerator[T, None]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def _run(
+    func: Callable[[T], Awaitable[R]],
+    index: int,
+    item: T,
+) -> BulkResult[R]:
+    try:
+        result = await func(item)
+    except Exception as exc:  # noqa: B902
+        return BulkResult(index=index, item=item, error=exc)
+
+    return BulkResult(index=index, item=item, result=result)
+
+
+async def bounded_map(
+    func: Callable[[T], Awaitable[R]],
+    items: Items[T],
+    *,
+    concurrency: int = DEFAULT_BULK_CONCURRENCY,
+    ordered: bool = True,
+) -> AsyncIterator[BulkResult[R]]:
+    if concurrency < 1:
+        raise ValueError('concurrency must be a positive number')
+
+    source = iterate(items)
+    pending: deque[asyncio.Task[BulkResult[R]]] = deque()
+    exhausted = False
+    index = 0
+
+    try:
+        while True:
+            # Input is consumed only while there is a free slot,
+            # so a slow consumer slows down the producer as well
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    item = await anext(source)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+
+                pending.append(asyncio.ensure_future(_run(func, index, item)))
+                index += 1
+
+            if not pending:
+                return
+
+            if ordered:
+                yield await pending.popleft()
+            else:
+                done, _ = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in done:
+                    pending.remove(task)
+
+                    yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+        await asyncio.gather(*pending, return_exceptions=True)
+        await source.aclose()
@@ -0,0 +1,257 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Callable, Protocol
+
+if TYPE_CHECKING:
+    from aiorentry.diskcache import StoredEntry
+
+DEFAULT_CACHE_MAXSIZE = 1024
+DEFAULT_CACHE_TTL = 60.0
+
+CacheKey = tuple[str, str, str | None]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    store_hits: int = 0
+    fallback_hits: int = 0
+
+
+class CacheStore(Protocol):
+
+    def get(self, key: CacheKey) -> 'StoredEntry | None':
+        ...
+
+    def set(self, key: CacheKey, text: str) -> None:
+        ...
+
+    def update_page(self, base_url: str, url: str, text: str) -> None:
+        ...
+
+    def invalidate_page(self, base_url: str, url: str) -> None:
+        ...
+
+    def recent(self, limit: int, newer_than: float) -> list['StoredEntry']:
+        ...
+
+
+@dataclass
+class CacheEntry:
+    text: str
+    expires_at: float
+
+
+class RawCache:
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_MAXSIZE,
+        ttl: float = DEFAULT_CACHE_TTL,
+        *,
+        stale_while_revalidate: float = 0.0,
+        stale_if_error: float = 0.0,
+        store: CacheStore | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if maxsize < 1:
+            raise ValueError('maxsize must be a positive number')
+
+        if ttl < 0 or stale_while_revalidate < 0 or stale_if_error < 0:
+            raise ValueError(
+                'ttl, stale_while_revalidate and stale_if_error must be >= 0',
+            )
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_while_revalidate = stale_while_revalidate
+        # Expired entries are kept for this long, to be served when
+        # the service is unavailable
+        self.stale_if_error = stale_if_error
+        self.stats = CacheStats()
+        self.store = store
+        self.__clock = clock
+        self.__entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        # (base_url, url) -> access codes, so that writes to a page can
+        # reach every cached variant of it without scanning the cache
+        self.__pages: dict[tuple[str, str], set[str | None]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __contains__(self, key: CacheKey) -> bool:
+        return key in self.__entries
+
+    def lookup(self, key: CacheKey) -> tuple[str, bool] | None:
+        entry = self.__entries.get(key)
+
+        if entry is None:
+            self.stats.misses += 1
+
+            return None
+
+        now = self.__clock()
+
+        if now < entry.expires_at:
+            self.__entries.move_to_end(key)
+            self.stats.hits += 1
+
+            return entry.text, False
+
+        if now < entry.expires_at + self.stale_while_revalidate:
+            self.__entries.move_to_end(key)
+            self.stats.stale_hits += 1
+
+            return entry.text, True
+
+        if now >= entry.expires_at + self.stale_if_error:
+            self.__remove(key)
+
+        self.stats.misses += 1
+
+        return None
+
+    def lookup_fallback(self, key: CacheKey) -> str | None:
+        entry = self.__entries.get(key)
+
+        if entry is None:
+            return None
+
+        if self.__clock() >= entry.expires_at + self.stale_if_error:
+            self.__remove(key)
+
+            return None
+
+        self.stats.fallback_hits += 1
+
+        return entry.text
+
+    def set(self, key: CacheKey, text: str, *, age: float = 0.0) -> None:
+        self.__entries[key] = CacheEntry(
+            text=text,
+            expires_at=self.__clock() + self.ttl - age,
+        )
+        self.__entries.move_to_end(key)
+        self.__pages.setdefault(key[:2], set()).add(key[2])
+
+        while len(self.__entries) > self.maxsize:
+            oldest = next(iter(self.__entries))
+            self.__remove(oldest)
+            self.stats.evictions += 1
+
+    def update(self, base_url: str, url: str, text: str) -> None:
+        for code in tuple(self.__pages.get((base_url, url), ())):
+            self.set((base_url, url, code), text)
+
+    def invalidate(self, base_url: str, url: str) -> None:
+        for code in tuple(self.__pages.get((base_url, url), ())):
+            self.__remove((base_url, url, code))
+
+    # The coroutines below also go to the persistent store, if there is one.
+    # The store is blocking, so it's called from a worker thread.
+
+    async def get(self, key: CacheKey) -> tuple[str, bool] | None:
+        cached = self.lookup(key)
+
+        if cached is not None or self.store is None:
+            return cached
+
+        entry = await asyncio.to_thread(self.store.get, key)
+
+        if entry is None:
+            return None
+
+        # Stored entries are timestamped with the wall clock,
+        # since they outlive the process
+        age = max(time.time() - entry.stored_at, 0.0)
+
+        if age >= self.ttl + self.stale_while_revalidate:
+            return None
+
+        self.set(key, entry.text, age=age)
+        self.stats.store_hits += 1
+
+        return entry.text, age >= self.ttl
+
+    async def get_fallback(self, key: CacheKey) -> str | None:
+        text = self.lookup_fallback(key)
+
+        if text is not None or self.store is None:
+            return text
+
+        entry = await asyncio.to_thread(self.store.get, key)
+
+        if entry is None:
+            return None
+
+        if time.time() - entry.stored_at >= self.ttl + self.stale_if_error:
+            return None
+
+        self.stats.fallback_hits += 1
+
+        return entry.text
+
+    async def put(self, key: CacheKey, text: str) -> None:
+        self.set(key, text)
+
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, text)
+
+    async def update_page(self, base_url: str, url: str, text: str) -> None:
+        self.update(base_url, url, text)
+
+        if self.store is not None:
+            await asyncio.to_thread(
+                self.store.update_page,
+                base_url,
+                url,
+                text,
+            )
+
+    async def invalidate_page(self, base_url: str, url: str) -> None:
+        self.invalidate(base_url, url)
+
+        if self.store is not None:
+            await asyncio.to_thread(self.store.invalidate_page, base_url, url)
+
+    async def warm(self) -> list['StoredEntry']:
+        if self.store is None:
+            return []
+
+        now = time.time()
+        entries = await asyncio.to_thread(
+            self.store.recent,
+            self.maxsize,
+            now - self.ttl - max(
+                self.stale_while_revalidate,
+                self.stale_if_error,
+            ),
+        )
+
+        # Most recently used entries come first, so they are inserted
+        # last and end up at the "recent" end of the LRU order
+        for entry in reversed(entries):
+            if not entry.secret:
+                age = max(now - entry.stored_at, 0)
+                self.set(entry.key, entry.text, age=age)
+
+        return entries
+
+    def clear(self) -> None:
+        self.__entries.clear()
+        self.__pages.clear()
+
+    def __remove(self, key: CacheKey) -> None:
+        self.__entries.pop(key, None)
+        codes = self.__pages.get(key[:2])
+
+        if codes is not None:
+            codes.discard(key[2])
+
+            if not codes:
+                del self.__pages[key[:2]]
@@ -0,0 +1,133 @@
+import asyncio
+import time
+from typing import Callable, Literal
+
+from aiohttp import ClientConnectionError, ClientResponseError
+
+from aiorentry.deadline import DeadlineExceeded
+from aiorentry.ratelimit import RequestKind
+
+CircuitState = Literal['closed', 'open', 'half_open']
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+DEFAULT_HALF_OPEN_CALLS = 1
+
+
+class CircuitOpenError(Exception):
+
+    def __init__(self, kind: RequestKind, retry_after: float):
+        super().__init__(
+            f'Circuit for {kind} requests is open, '
+            f'retry in {retry_after:.1f}s',
+        )
+        self.kind = kind
+        self.retry_after = retry_after
+
+
+def is_circuit_failure(exc: BaseException) -> bool:
+    # Errors that say something about the service health.
+    # 4xx answers mean that the service is up. A caller running out of
+    # time says nothing about it.
+    if isinstance(exc, DeadlineExceeded):
+        return False
+
+    if isinstance(exc, ClientResponseError):
+        return exc.status >= 500
+
+    return isinstance(exc, (ClientConnectionError, asyncio.TimeoutError))
+
+
+class _Circuit:
+
+    def __init__(self) -> None:
+        self.state: CircuitState = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probes = 0
+
+
+class CircuitBreaker:
+    # Read and write requests have separate circuits. A circuit opens
+    # after ``failure_threshold`` consecutive failures and rejects requests
+    # for ``recovery_timeout`` seconds. Then up to ``half_open_calls``
+    # probe requests are let through: a success closes the circuit,
+    # a failure opens it again.
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+        *,
+        half_open_calls: int = DEFAULT_HALF_OPEN_CALLS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if failure_threshold < 1 or half_open_calls < 1:
+            raise ValueError(
+                'failure_threshold and half_open_calls must be positive',
+            )
+
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_calls = half_open_calls
+        self.__clock = clock
+        self.__circuits: dict[RequestKind, _Circuit] = {
+            'read': _Circuit(),
+            'write': _Circuit(),
+        }
+
+    def state(self, kind: RequestKind) -> CircuitState:
+        circuit = self.__circuits[kind]
+
+        if circuit.state == 'open' and self.__retry_after(circuit) <= 0:
+            circuit.state = 'half_open'
+            circuit.probes = 0
+
+        return circuit.state
+
+    def states(self) -> dict[RequestKind, CircuitState]:
+        return {kind: self.state(kind) for kind in self.__circuits}
+
+    def failures(self, kind: RequestKind) -> int:
+        return self.__circuits[kind].failures
+
+    def __retry_after(self, circuit: _Circuit) -> float:
+        return circuit.opened_at + self.recovery_timeout - self.__clock()
+
+    def acquire(self, kind: RequestKind) -> None:
+        circuit = self.__circuits[kind]
+        state = self.state(kind)
+
+        if state == 'closed':
+            return
+
+        if state == 'half_open' and circuit.probes < self.half_open_calls:
+            circuit.probes += 1
+
+            return
+
+        raise CircuitOpenError(kind, max(self.__retry_after(circuit), 0.0))
+
+    def on_success(self, kind: RequestKind) -> None:
+        circuit = self.__circuits[kind]
+        circuit.state = 'closed'
+        circuit.failures = 0
+        circuit.probes = 0
+
+    def on_failure(self, kind: RequestKind) -> None:
+        circuit = self.__circuits[kind]
+        circuit.failures += 1
+
+        tripped = circuit.failures >= self.failure_threshold
+
+        if tripped or circuit.state == 'half_open':
+            circuit.state = 'open'
+            circuit.opened_at = self.__clock()
+            circuit.probes = 0
+
+    def on_cancel(self, kind: RequestKind) -> None:
+        # A cancelled probe gives its slot to the next request
+        circuit = self.__circuits[kind]
+
+        if circuit.state == 'half_open' and circuit.probes:
+            circuit.probes -= 1
@@ -1,50 +1,235 @@
+import asyncio
+import contextlib
+import functools
+import inspect
+import io
+import time
+from http import HTTPStatus
 from types import TracebackType
-from typing import Any, Optional, Type
-
-from aiohttp import (
-    ClientResponse, ClientResponseError, ClientSession, DummyCookieJar, web,
+from typing import (
+    TYPE_CHECKING, Any, AsyncIterator, Awaitable, Callable, ContextManager,
+    Literal, Optional, Sequence, Type, TypeVar, overload,
 )
+
+from aiohttp import ClientResponseError, ClientSession
 from typing_extensions import Self
 from yarl import URL
 
-from aiorentry.models import Page
+from aiorentry.bulk import DEFAULT_BULK_CONCURRENCY, Items, bounded_map
+from aiorentry.circuit import (
+    CircuitBreaker, CircuitOpenError, is_circuit_failure,
+)
+from aiorentry.codec import JSONLoads, default_loads
+from aiorentry.connection import (
+    ConnectionConfig, create_session, shared_connectors,
+)
+from aiorentry.deadline import (
+    DeadlineExceeded, detach, iterate_with_deadline, remaining, with_deadline,
+)
+from aiorentry.digests import DigestStore, MemoryDigestStore
+from aiorentry.mirrors import Mirror, MirrorPool, is_failover_error
+from aiorentry.models import BulkResult, EditResult, Page, content_digest
+from aiorentry.ratelimit import RateLimiter, RequestKind
+from aiorentry.retry import THROTTLING_STATUSES, RetryPolicy, parse_retry_after
+from aiorentry.singleflight import SingleFlight
+from aiorentry.streaming import (
+    DEFAULT_CHUNK_SIZE, EnvelopeError, EnvelopeParser,
+)
+from aiorentry.transport import AiohttpTransport, Transport, TransportResponse
+
+# Optional subsystems are imported when they are used, to keep the import
+# of the client cheap
+if TYPE_CHECKING:
+    from aiorentry.cache import CacheKey, RawCache
+    from aiorentry.hedging import HedgingPolicy
+    from aiorentry.tracing import (
+        Observer, OperationTrace, RequestTrace, Tracer,
+    )
+    from aiorentry.upload import UploadBody, UploadSource
 
 DEFAULT_BASE_URL = 'https://rentry.org'
 CSRF_COOKIE_NAME = 'csrftoken'
 CSRF_POST_BODY_NAME = 'csrfmiddlewaretoken'
 SECRET_RAW_ACCESS_CODE_HEADER_NAME = 'rentry-auth'
+DEFAULT_CSRF_TOKEN_TTL = 60 * 60
+
+T = TypeVar('T')
+
+FormPayload = dict[str, 'str | UploadBody']
 
 
 class Client:
 
     __base_url: URL
-    __session: ClientSession
-    __custom_session: bool = False
+    __transport: Transport
+    __custom_transport: bool = False
+    __shared_connector: bool = False
 
     def __init__(
         self,
         base_url: str | None = None,
         *,
+        mirrors: Sequence[str] | None = None,
         session: ClientSession | None = None,
+        transport: Transport | None = None,
+        csrf_token_ttl: float = DEFAULT_CSRF_TOKEN_TTL,
+        raw_cache: 'RawCache | None' = None,
+        rate_limiter: RateLimiter | None = None,
+        retry_policy: RetryPolicy | None = None,
+        connection: ConnectionConfig | None = None,
+        share_connections: bool = False,
+        json_loads: JSONLoads | None = None,
+        digest_store: DigestStore | None = None,
+        observers: Sequence['Observer'] = (),
+        hedging: 'HedgingPolicy | None' = None,
+        circuit_breaker: CircuitBreaker | None = None,
     ):
+        if base_url is not None and mirrors is not None:
+            raise ValueError('base_url and mirrors are mutually exclusive')
+
         if base_url is None:
             base_url = DEFAULT_BASE_URL
 
-        self.__base_url = URL(base_url)
-        self.__headers = {'Referer': str(self.__base_url)}
+        if session is not None and transport is not None:
+            raise ValueError('session and transport are mutually exclusive')
+
+        custom = session is not None or transport is not None
+
+        if custom and connection is not None:
+            raise ValueError(
+                'connection config can not be used with a custom session '
+                'or transport',
+            )
+
+        if custom and share_connections:
+            raise ValueError(
+                'share_connections can not be used with a custom session '
+                'or transport',
+            )
+
+        if csrf_token_ttl < 0:
+            raise ValueError('csrf_token_ttl must be non-negative')
+
+        self.__mirrors = MirrorPool(
+            mirrors if mirrors is not None else [base_url],
+        )
+        # Mirrors serve the same pages, so cached data is keyed by
+        # the primary one
+        self.__base_url = self.__mirrors.primary.url
+        self.__csrf_token_ttl = csrf_token_ttl
+        self.__csrf_flight: SingleFlight[URL, str] = SingleFlight()
+        self.__raw_flight: SingleFlight[
+            tuple[str, str | None], str,
+        ] = SingleFlight()
+        self.__raw_cache = raw_cache
+        self.__revalidating: dict['CacheKey', asyncio.Task[None]] = {}
+        self.__rate_limiter = rate_limiter
+        self.__retry_policy = retry_policy
+        self.__connection = connection or ConnectionConfig()
+        self.__share_connections = share_connections
+        self.__loads = json_loads or default_loads()
+        self.__digest_store = digest_store or MemoryDigestStore()
+        self.__tracer: 'Tracer | None' = None
+        self.__hedging = hedging
+        self.__circuit_breaker = circuit_breaker
+
+        if observers:
+            from aiorentry import tracing
+
+            self.__tracer = tracing.Tracer(observers)
 
         if session is not None:
-            self.__session = session
-            self.__custom_session = True
+            transport = AiohttpTransport(session, owner=False)
+
+        if transport is not None:
+            self.__transport = transport
+            self.__custom_transport = True
 
     async def setup(self) -> None:
-        if not self.__custom_session:
-            jar = DummyCookieJar()
-            self.__session = ClientSession(cookie_jar=jar)
+        if not self.__custom_transport:
+            trace_configs = []
+
+            if self.__tracer is not None:
+                trace_configs.append(self.__tracer.trace_config)
+
+            connector = None
+
+            # Keep-alive connections are shared with other clients of
+            # the same base url
+            if self.__share_connections:
+                connector = shared_connectors.acquire(
+                    str(self.__base_url),
+                    self.__connection,
+                )
+                self.__shared_connector = True
+
+            session = create_session(
+                self.__connection,
+                trace_configs=trace_configs,
+                connector=connector,
+            )
+            self.__transport = AiohttpTransport(session)
+
+        if self.__raw_cache is not None:
+            await self.__warm_raw_cache(self.__raw_cache)
+
+        if self.__connection.warmup_connections > 0:
+            await self.warmup(self.__connection.warmup_connections)
+
+    async def __warm_raw_cache(self, cache: 'RawCache') -> None:
+        for entry in await cache.warm():
+            base_url, url, _ = entry.key
+
+            if base_url == str(self.__base_url):
+                await self.__digest_store.set((base_url, url), entry.digest)
+
+    async def warmup(
+        self,
+        connections: int = 1,
+        *,
+        timeout: float | None = None,
+    ) -> None:
+        async def ping(mirror: Mirror) -> None:
+            async with self.__request('HEAD', mirror.url) as response:
+                await response.read()
+
+        # Requests are sent concurrently, so that each one opens its own
+        # keep-alive connection. Warm-up is best effort: errors are
+        # ignored and will surface on the first real request.
+        async def warm() -> None:
+            await asyncio.gather(
+                *(
+                    request
+                    for mirror in self.__mirrors
+                    for request in (
+                        self.__get_csrf_token(mirror),
+                        *(ping(mirror) for _ in range(connections - 1)),
+                    )
+                ),
+                return_exceptions=True,
+            )
+
+        await with_deadline(warm(), timeout)
 
     async def close(self) -> None:
-        if not self.__custom_session:
-            await self.__session.close()
+        tasks = list(self.__revalidating.values())
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.__csrf_flight.cancel()
+        await self.__raw_flight.cancel()
+
+        if not self.__custom_transport:
+            await self.__transport.close()
+
+        if self.__shared_connector:
+            self.__shared_connector = False
+            await shared_connectors.release(
+                str(self.__base_url),
+                self.__connection,
+            )
 
     async def __aenter__(self) -> Self:
         await self.setup()
@@ -59,157 +244,1199 @@ class Client:
     ) -> None:
         await self.close()
 
-    async def __get_csrf_token(self) -> str:
-        api_url = self.__base_url
+    def __trace_request(
+        self,
+        method: str,
+        endpoint: str,
+    ) -> ContextManager['RequestTrace | None']:
+        if self.__tracer is None:
+            return contextlib.nullcontext()
 
-        async with self.__session.get(
-            api_url,
-            raise_for_status=True,
-        ) as response:
-            return response.cookies[CSRF_COOKIE_NAME].value
+        return self.__tracer.request(method, endpoint)
 
-    async def __handle_response(self, response: ClientResponse) -> Any:
-        data = await response.json(content_type=None)
-        status = int(data['status'])
+    def __trace_operation(
+        self,
+        name: str,
+    ) -> ContextManager['OperationTrace | None']:
+        if self.__tracer is None:
+            return contextlib.nullcontext()
 
-        if status == 200:
-            return data
+        return self.__tracer.operation(name)
+
+    async def __operation(
+        self,
+        name: str,
+        operation: Awaitable[T],
+        timeout: float | None,
+    ) -> T:
+        with self.__trace_operation(name):
+            return await with_deadline(operation, timeout)
+
+    def __trace_phase(self, name: str) -> ContextManager[None]:
+        if self.__tracer is None:
+            return contextlib.nullcontext()
+
+        return self.__tracer.phase(name)
+
+    async def __call(
+        self,
+        kind: RequestKind,
+        func: Callable[[], Awaitable[T]],
+    ) -> T:
+        limiter = self.__rate_limiter
+        policy = self.__retry_policy
+        attempt = 0
+
+        if policy is not None:
+            policy.on_request()
+
+        while True:
+            attempt += 1
+
+            if limiter is not None:
+                await limiter.acquire(kind)
+
+            try:
+                result = await func()
+            except ClientResponseError as exc:
+                if policy is not None:
+                    statuses = policy.statuses
+                else:
+                    statuses = THROTTLING_STATUSES
+
+                if exc.status not in statuses:
+                    raise
+
+                retry_after = parse_retry_after(exc.headers)
+
+                if limiter is not None:
+                    limiter.on_throttled(kind, retry_after)
+
+                if policy is None:
+                    raise
+
+                delay = policy.next_delay(attempt, retry_after)
+
+                if delay is None:
+                    raise
+
+                left = remaining()
+
+                # Don't wait for a retry that can't finish in time
+                if left is not None and delay >= left:
+                    raise DeadlineExceeded() from exc
+
+                await asyncio.sleep(delay)
+            else:
+                if limiter is not None:
+                    limiter.on_success(kind)
+
+                return result
+
+    async def __route(
+        self,
+        kind: RequestKind,
+        func: Callable[[Mirror], Awaitable[T]],
+        *,
+        offset: int = 0,
+    ) -> T:
+        breaker = self.__circuit_breaker
+
+        if breaker is None:
+            return await self.__failover(kind, func, offset=offset)
+
+        # Fails fast with CircuitOpenError while the service is down
+        breaker.acquire(kind)
+
+        try:
+            result = await self.__failover(kind, func, offset=offset)
+        except DeadlineExceeded:
+            breaker.on_cancel(kind)
+
+            raise
+        except Exception as exc:  # noqa: B902
+            if is_circuit_failure(exc):
+                breaker.on_failure(kind)
+            else:
+                breaker.on_success(kind)
+
+            raise
+        except BaseException:  # noqa: B902
+            breaker.on_cancel(kind)
+
+            raise
+
+        breaker.on_success(kind)
+
+        return result
+
+    async def __failover(
+        self,
+        kind: RequestKind,
+        func: Callable[[Mirror], Awaitable[T]],
+        *,
+        offset: int,
+    ) -> T:
+        candidates = self.__mirrors.candidates()
+
+        if offset:
+            # Start from another mirror, if there is one
+            offset %= len(candidates)
+            candidates = candidates[offset:] + candidates[:offset]
+
+        for mirror in candidates:
+            started_at = time.monotonic()
+
+            try:
+                result = await func(mirror)
+            except Exception as exc:  # noqa: B902
+                if not is_failover_error(kind, exc):
+                    raise
+
+                self.__mirrors.on_failure(mirror)
+
+                if mirror is candidates[-1]:
+                    raise
+            else:
+                self.__mirrors.on_success(
+                    mirror,
+                    time.monotonic() - started_at,
+                )
+
+                return result
+
+        raise AssertionError('unreachable')
+
+    async def __hedged(
+        self,
+        policy: 'HedgingPolicy',
+        func: Callable[[int], Awaitable[T]],
+    ) -> T:
+        async def attempt(number: int) -> T:
+            started_at = time.monotonic()
+            result = await func(number)
+            policy.record(time.monotonic() - started_at)
+
+            return result
+
+        policy.on_request()
+        attempts = [asyncio.ensure_future(attempt(0))]
+        delay = policy.hedge_delay()
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(attempts, timeout=delay)
+
+                if not done and policy.try_hedge():
+                    attempts.append(asyncio.ensure_future(attempt(1)))
+
+            pending = set(attempts)
+            error: BaseException | None = None
+
+            # The first successful response wins
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+
+                for task in attempts:
+                    if task not in done:
+                        continue
+
+                    exc = task.exception()
+
+                    if exc is None:
+                        return task.result()
+
+                    error = error or exc
+
+            assert error is not None
+
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+            await asyncio.gather(*attempts, return_exceptions=True)
+
+    @contextlib.asynccontextmanager
+    async def __request(
+        self,
+        method: str,
+        url: URL,
+        **kwargs: Any,
+    ) -> AsyncIterator[TransportResponse]:
+        response = await self.__transport.request(method, url, **kwargs)
 
-        raise ClientResponseError(
+        try:
+            yield response
+        finally:
+            response.release()
+
+    def __headers(self, mirror: Mirror) -> dict[str, str]:
+        return {'Referer': str(mirror.url)}
+
+    async def __fetch_csrf_token(self, mirror: Mirror) -> str:
+        return await self.__call(
+            'write',
+            functools.partial(self.__request_csrf_token, mirror),
+        )
+
+    async def __request_csrf_token(self, mirror: Mirror) -> str:
+        with self.__trace_request('GET', '/') as trace:
+            async with self.__request(
+                'GET',
+                mirror.url,
+                trace=trace,
+            ) as response:
+                return response.cookies[CSRF_COOKIE_NAME].value
+
+    def __cached_csrf_token(
+        self,
+        mirror: Mirror,
+        stale: str | None,
+    ) -> str | None:
+        token = mirror.csrf_token
+
+        if token is None or token == stale:
+            return None
+
+        if time.monotonic() >= mirror.csrf_token_expires_at:
+            return None
+
+        return token
+
+    async def __refresh_csrf_token(self, mirror: Mirror) -> str:
+        token = await self.__fetch_csrf_token(mirror)
+
+        if self.__csrf_token_ttl:
+            mirror.csrf_token = token
+            mirror.csrf_token_expires_at = (
+                time.monotonic() + self.__csrf_token_ttl
+            )
+
+        return token
+
+    async def __get_csrf_token(
+        self,
+        mirror: Mirror,
+        *,
+        stale: str | None = None,
+    ) -> str:
+        if self.__csrf_token_ttl:
+            token = self.__cached_csrf_token(mirror, stale)
+
+            if token is not None:
+                return token
+
+        # Concurrent writers share a single in-flight token request
+        return await self.__csrf_flight.do(
+            mirror.url,
+            functools.partial(self.__refresh_csrf_token, mirror),
+        )
+
+    @property
+    def raw_cache(self) -> 'RawCache | None':
+        return self.__raw_cache
+
+    @property
+    def mirrors(self) -> MirrorPool:
+        return self.__mirrors
+
+    @property
+    def circuit_breaker(self) -> CircuitBreaker | None:
+        return self.__circuit_breaker
+
+    def invalidate_csrf_token(self) -> None:
+        for mirror in self.__mirrors:
+            mirror.invalidate_csrf_token()
+
+    def __response_error(
+        self,
+        response: TransportResponse,
+        data: dict[str, Any],
+    ) -> ClientResponseError:
+        return ClientResponseError(
             response.request_info,
             response.history,
-            status=status,
+            status=int(data['status']),
             message=data.get('errors', data['content']),
             headers=response.headers,
         )
 
-    async def new_page(
+    async def __read_json(self, response: TransportResponse) -> Any:
+        body = await response.read()
+
+        if self.__tracer is None:
+            return self.__loads(body)
+
+        from aiorentry.tracing import current_request
+
+        trace = current_request()
+
+        if trace is None:
+            return self.__loads(body)
+
+        started_at = time.perf_counter()
+        data = self.__loads(body)
+        trace.decoded(started_at, len(body))
+
+        return data
+
+    async def __handle_response(self, response: TransportResponse) -> Any:
+        data = await self.__read_json(response)
+        status = int(data['status'])
+
+        if status == 200:
+            return data
+
+        raise self.__response_error(response, data)
+
+    async def __send_form(
         self,
-        text: str,
+        mirror: Mirror,
+        endpoint: str,
+        path: str,
+        payload: FormPayload,
+        token: str,
         *,
-        url: str | None = None,
-        edit_code: str | None = None,
-    ) -> Page:
-        token = await self.__get_csrf_token()
+        check_status: bool,
+        allow_redirects: bool,
+    ) -> Any:
+        return await self.__call(
+            'write',
+            functools.partial(
+                self.__request_form,
+                mirror,
+                endpoint,
+                path,
+                payload,
+                token,
+                check_status=check_status,
+                allow_redirects=allow_redirects,
+            ),
+        )
 
+    async def __request_form(
+        self,
+        mirror: Mirror,
+        endpoint: str,
+        path: str,
+        payload: FormPayload,
+        token: str,
+        *,
+        check_status: bool,
+        allow_redirects: bool,
+    ) -> Any:
         payload = {
             CSRF_POST_BODY_NAME: token,
-            'url': url or '',
-            'edit_code': edit_code or '',
-            'text': text,
+            **payload,
         }
 
         cookies = {
             CSRF_COOKIE_NAME: token,
         }
 
-        api_url = self.__base_url.with_path('/api/new')
+        headers = self.__headers(mirror)
+        data: Any = payload
 
-        async with self.__session.post(
-            api_url,
-            headers=self.__headers,
-            cookies=cookies,
-            data=payload,
-            raise_for_status=True,
-        ) as response:
-            data = await self.__handle_response(response)
-            page_url = URL(data['url'])
-
-            return Page(
-                url=page_url.parts[1],
-                edit_code=data['edit_code'],
-                text=text,
-            )
+        if not all(isinstance(value, str) for value in payload.values()):
+            from aiorentry.upload import FORM_CONTENT_TYPE, encode_form
 
-    async def edit_page(
+            # Streamed with chunked transfer encoding
+            headers['Content-Type'] = FORM_CONTENT_TYPE
+            data = encode_form(payload)
+
+        with self.__trace_request('POST', endpoint) as trace:
+            async with self.__request(
+                'POST',
+                mirror.url.with_path(path),
+                headers=headers,
+                cookies=cookies,
+                data=data,
+                allow_redirects=allow_redirects,
+                trace=trace,
+            ) as response:
+                if check_status:
+                    return await self.__handle_response(response)
+
+                return await self.__read_json(response)
+
+    async def __form_token(
         self,
-        text: str,
+        mirror: Mirror,
+        tokens: dict[URL, str] | None,
         *,
+        stale: str | None = None,
+    ) -> str:
+        # ``tokens`` lets a bulk operation share tokens between its items,
+        # even when token caching is disabled
+        token = tokens.get(mirror.url) if tokens is not None else None
+
+        if token is None or token == stale:
+            with self.__trace_phase('csrf'):
+                token = await self.__get_csrf_token(mirror, stale=stale)
+
+            if tokens is not None:
+                tokens[mirror.url] = token
+
+        return token
+
+    async def __post_form(
+        self,
+        endpoint: str,
+        path: str,
+        payload: FormPayload,
+        *,
+        check_status: bool = True,
+        allow_redirects: bool = True,
+        tokens: dict[URL, str] | None = None,
+    ) -> Any:
+        async def post(mirror: Mirror) -> Any:
+            token = await self.__form_token(mirror, tokens)
+            send = functools.partial(
+                self.__send_form,
+                mirror,
+                endpoint,
+                path,
+                payload,
+                check_status=check_status,
+                allow_redirects=allow_redirects,
+            )
+
+            try:
+                return await send(token)
+            except ClientResponseError as exc:
+                if exc.status != HTTPStatus.FORBIDDEN:
+                    raise
+
+            # The server rejected the token (most likely it has expired).
+            # Refresh it and retry exactly once.
+            token = await self.__form_token(mirror, tokens, stale=token)
+
+            return await send(token)
+
+        return await self.__route('write', post)
+
+    async def __remember_digest(self, page: Page) -> None:
+        assert page.digest is not None
+
+        await self.__digest_store.set(
+            (str(self.__base_url), page.url),
+            page.digest,
+        )
+
+    def __sent_page(
+        self,
         url: str,
         edit_code: str,
+        text: 'str | UploadBody',
     ) -> Page:
-        token = await self.__get_csrf_token()
+        if isinstance(text, str):
+            return Page(url=url, edit_code=edit_code, text=text)
 
-        payload = {
-            CSRF_POST_BODY_NAME: token,
-            'edit_code': edit_code,
+        # Uploaded text is not kept, only its digest
+        return Page(url=url, edit_code=edit_code, digest=text.digest)
+
+    async def __new_page(
+        self,
+        text: 'str | UploadBody',
+        *,
+        url: str | None,
+        edit_code: str | None,
+        tokens: dict[URL, str] | None = None,
+    ) -> Page:
+        payload: FormPayload = {
+            'url': url or '',
+            'edit_code': edit_code or '',
             'text': text,
         }
 
-        cookies = {
-            CSRF_COOKIE_NAME: token,
+        data = await self.__post_form(
+            '/api/new',
+            '/api/new',
+            payload,
+            tokens=tokens,
+        )
+        page_url = URL(data['url'])
+        await self.__invalidate_raw(page_url.parts[1])
+
+        page = self.__sent_page(page_url.parts[1], data['edit_code'], text)
+        await self.__remember_digest(page)
+
+        return page
+
+    async def __edit_page(
+        self,
+        text: 'str | UploadBody',
+        *,
+        url: str,
+        edit_code: str,
+        tokens: dict[URL, str] | None = None,
+    ) -> Page:
+        payload: FormPayload = {
+            'edit_code': edit_code,
+            'text': text,
         }
 
-        api_url = self.__base_url.with_path(f'/api/edit/{url}')
+        await self.__post_form(
+            '/api/edit/{url}',
+            f'/api/edit/{url}',
+            payload,
+            tokens=tokens,
+        )
 
-        async with self.__session.post(
-            api_url,
-            headers=self.__headers,
-            cookies=cookies,
-            data=payload,
-            raise_for_status=True,
-        ) as response:
-            await self.__handle_response(response)
-
-            return Page(
-                url=url,
-                edit_code=edit_code,
-                text=text,
-            )
+        if not isinstance(text, str):
+            await self.__invalidate_raw(url)
+        elif self.__raw_cache is not None:
+            await self.__raw_cache.update_page(str(self.__base_url), url, text)
 
-    async def delete_page(
+        page = self.__sent_page(url, edit_code, text)
+        await self.__remember_digest(page)
+
+        return page
+
+    async def __delete_page(
         self,
         *,
         url: str,
         edit_code: str,
+        tokens: dict[URL, str] | None = None,
     ) -> bool:
-        token = await self.__get_csrf_token()
-        payload = {
-            CSRF_POST_BODY_NAME: token,
+        payload: FormPayload = {
             'edit_code': edit_code,
         }
 
-        cookies = {
-            CSRF_COOKIE_NAME: token,
+        data = await self.__post_form(
+            '/api/delete/{url}',
+            f'/api/delete/{url}',
+            payload,
+            check_status=False,
+            allow_redirects=False,
+            tokens=tokens,
+        )
+        await self.__invalidate_raw(url)
+        await self.__digest_store.delete((str(self.__base_url), url))
+
+        return int(data['status']) == HTTPStatus.OK
+
+    async def new_page(
+        self,
+        text: str,
+        *,
+        url: str | None = None,
+        edit_code: str | None = None,
+        timeout: float | None = None,
+    ) -> Page:
+        return await self.__operation(
+            'new_page',
+            self.__new_page(text, url=url, edit_code=edit_code),
+            timeout,
+        )
+
+    async def edit_page(
+        self,
+        text: str,
+        *,
+        url: str,
+        edit_code: str,
+        timeout: float | None = None,
+    ) -> Page:
+        return await self.__operation(
+            'edit_page',
+            self.__edit_page(text, url=url, edit_code=edit_code),
+            timeout,
+        )
+
+    async def new_page_from(
+        self,
+        source: 'UploadSource',
+        *,
+        url: str | None = None,
+        edit_code: str | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        timeout: float | None = None,
+    ) -> Page:
+        from aiorentry.upload import UploadBody
+
+        body = UploadBody(source, chunk_size=chunk_size)
+
+        return await self.__operation(
+            'new_page',
+            self.__new_page(body, url=url, edit_code=edit_code),
+            timeout,
+        )
+
+    async def edit_page_from(
+        self,
+        source: 'UploadSource',
+        *,
+        url: str,
+        edit_code: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        timeout: float | None = None,
+    ) -> Page:
+        from aiorentry.upload import UploadBody
+
+        body = UploadBody(source, chunk_size=chunk_size)
+
+        return await self.__operation(
+            'edit_page',
+            self.__edit_page(body, url=url, edit_code=edit_code),
+            timeout,
+        )
+
+    async def edit_page_if_changed(
+        self,
+        text: str,
+        *,
+        url: str,
+        edit_code: str,
+        timeout: float | None = None,
+    ) -> EditResult:
+        return await with_deadline(
+            self.__edit_page_if_changed(text, url=url, edit_code=edit_code),
+            timeout,
+        )
+
+    async def __edit_page_if_changed(
+        self,
+        text: str,
+        *,
+        url: str,
+        edit_code: str,
+    ) -> EditResult:
+        digest = content_digest(text)
+        known = await self.__digest_store.get((str(self.__base_url), url))
+
+        if known == digest:
+            page = Page(url=url, edit_code=edit_code, text=text, digest=digest)
+
+            return EditResult(page=page, written=False)
+
+        with self.__trace_operation('edit_page'):
+            page = await self.__edit_page(text, url=url, edit_code=edit_code)
+
+        return EditResult(page=page, written=True)
+
+    async def delete_page(
+        self,
+        *,
+        url: str,
+        edit_code: str,
+        timeout: float | None = None,
+    ) -> bool:
+        return await self.__operation(
+            'delete_page',
+            self.__delete_page(url=url, edit_code=edit_code),
+            timeout,
+        )
+
+    async def __invalidate_raw(self, url: str) -> None:
+        if self.__raw_cache is not None:
+            await self.__raw_cache.invalidate_page(str(self.__base_url), url)
+
+    async def __fetch_raw(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str],
+    ) -> str:
+        def request(offset: int) -> Awaitable[str]:
+            return self.__route(
+                'read',
+                lambda mirror: self.__call(
+                    'read',
+                    functools.partial(
+                        self.__request_raw,
+                        mirror,
+                        url,
+                        secret_raw_access_code,
+                    ),
+                ),
+                offset=offset,
+            )
+
+        if self.__hedging is None:
+            text = await request(0)
+        else:
+            text = await self.__hedged(self.__hedging, request)
+
+        await self.__digest_store.set(
+            (str(self.__base_url), url),
+            content_digest(text),
+        )
+
+        return text
+
+    def __raw_headers(
+        self,
+        mirror: Mirror,
+        secret_raw_access_code: Optional[str],
+    ) -> dict[str, str]:
+        if secret_raw_access_code is None:
+            return self.__headers(mirror)
+
+        return {
+            **self.__headers(mirror),
+            SECRET_RAW_ACCESS_CODE_HEADER_NAME: secret_raw_access_code,
         }
 
-        api_url = self.__base_url.with_path(f'/api/delete/{url}')
+    async def __request_raw(
+        self,
+        mirror: Mirror,
+        url: str,
+        secret_raw_access_code: Optional[str],
+    ) -> str:
+        api_url = mirror.url.with_path(f'/api/raw/{url}')
 
-        async with self.__session.post(
-            api_url,
-            headers=self.__headers,
-            cookies=cookies,
-            data=payload,
-            raise_for_status=True,
-            allow_redirects=False,
-        ) as response:
-            data = await response.json(content_type=None)
+        with self.__trace_request('GET', '/api/raw/{url}') as trace:
+            async with self.__request(
+                'GET',
+                api_url,
+                headers=self.__raw_headers(mirror, secret_raw_access_code),
+                trace=trace,
+            ) as response:
+                data = await self.__handle_response(response)
+
+                return data['content']
+
+    async def __coalesced_raw(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str],
+    ) -> str:
+        return await self.__raw_flight.do(
+            (url, secret_raw_access_code),
+            lambda: self.__fetch_raw(url, secret_raw_access_code),
+        )
+
+    async def __revalidate(self, key: 'CacheKey') -> None:
+        assert self.__raw_cache is not None
 
-            return int(data['status']) == web.HTTPOk.status_code
+        _, url, secret_raw_access_code = key
+
+        try:
+            text = await self.__coalesced_raw(url, secret_raw_access_code)
+        except ClientResponseError:
+            # The server gave a definite answer (e.g. the page is gone),
+            # so the stale copy must not be served anymore
+            await self.__raw_cache.invalidate_page(str(self.__base_url), url)
+        except Exception:  # noqa: B902
+            # Keep serving the stale copy, the next lookup will try again
+            pass
+        else:
+            await self.__raw_cache.put(key, text)
+        finally:
+            del self.__revalidating[key]
 
     async def raw(
         self,
         url: str,
         secret_raw_access_code: Optional[str] = None,
+        *,
+        timeout: float | None = None,
     ) -> str:
-        if secret_raw_access_code is None:
-            headers = self.__headers
-        else:
-            headers = {
-                **self.__headers,
-                SECRET_RAW_ACCESS_CODE_HEADER_NAME: secret_raw_access_code,
-            }
+        return await self.__operation(
+            'raw',
+            self.__raw(url, secret_raw_access_code),
+            timeout,
+        )
+
+    async def __raw(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str],
+    ) -> str:
+        if self.__raw_cache is None:
+            return await self.__coalesced_raw(url, secret_raw_access_code)
+
+        key = (str(self.__base_url), url, secret_raw_access_code)
+        cached = await self.__raw_cache.get(key)
+
+        if cached is not None:
+            text, stale = cached
+
+            if stale and key not in self.__revalidating:
+                self.__revalidating[key] = detach(self.__revalidate(key))
 
-        api_url = self.__base_url.with_path(f'/api/raw/{url}')
+            return text
 
-        async with self.__session.get(
+        try:
+            text = await self.__coalesced_raw(url, secret_raw_access_code)
+        except CircuitOpenError:
+            fallback = await self.__raw_cache.get_fallback(key)
+
+            if fallback is None:
+                raise
+
+            return fallback
+
+        await self.__raw_cache.put(key, text)
+
+        return text
+
+    async def __open_raw(
+        self,
+        mirror: Mirror,
+        url: str,
+        secret_raw_access_code: Optional[str],
+        trace: 'RequestTrace | None',
+    ) -> TransportResponse:
+        api_url = mirror.url.with_path(f'/api/raw/{url}')
+
+        return await self.__transport.request(
+            'GET',
             api_url,
-            headers=headers,
-            raise_for_status=True,
-        ) as response:
-            data = await self.__handle_response(response)
+            headers=self.__raw_headers(mirror, secret_raw_access_code),
+            trace=trace,
+        )
+
+    async def __stream_raw(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str],
+        chunk_size: int,
+    ) -> AsyncIterator[str]:
+        # The request outlives a single step of the generator, so it's
+        # traced explicitly instead of through a context variable
+        tracer = self.__tracer
+        trace = None
+        error: BaseException | None = None
+
+        if tracer is not None:
+            trace = tracer.start_request('GET', '/api/raw/{url}')
+
+        try:
+            response = await self.__route(
+                'read',
+                lambda mirror: self.__call(
+                    'read',
+                    functools.partial(
+                        self.__open_raw,
+                        mirror,
+                        url,
+                        secret_raw_access_code,
+                        trace,
+                    ),
+                ),
+            )
+
+            try:
+                parser = EnvelopeParser()
+                # Content is held back until the status is known: for errors
+                # it's just a short message that goes into the exception
+                pending: list[str] = []
+
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    text = parser.feed(chunk)
+                    status = parser.fields.get('status')
+
+                    if status is None or int(status) != 200:
+                        pending.append(text)
+
+                        continue
+
+                    if pending:
+                        yield ''.join(pending)
+
+                        pending.clear()
+
+                    if text:
+                        yield text
+
+                pending.append(parser.close())
+
+                if 'status' not in parser.fields:
+                    raise EnvelopeError('Missing status field')
+
+                if int(parser.fields['status']) != 200:
+                    raise self.__response_error(
+                        response,
+                        {'content': ''.join(pending), **parser.fields},
+                    )
+
+                text = ''.join(pending)
+
+                if text:
+                    yield text
+            finally:
+                response.release()
+        except BaseException as exc:  # noqa: B902
+            error = exc
+            raise
+        finally:
+            if tracer is not None and trace is not None:
+                tracer.finish_request(trace, error)
 
-            return data['content']
+    @overload
+    def raw_stream(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str] = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        binary: Literal[False] = False,
+        timeout: float | None = None,
+    ) -> AsyncIterator[str]:
+        ...
+
+    @overload
+    def raw_stream(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str] = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        binary: Literal[True],
+        timeout: float | None = None,
+    ) -> AsyncIterator[bytes]:
+        ...
+
+    def raw_stream(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str] = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        binary: bool = False,
+        timeout: float | None = None,
+    ) -> AsyncIterator[str | bytes]:
+        return iterate_with_deadline(
+            self.__raw_stream(
+                url,
+                secret_raw_access_code,
+                chunk_size=chunk_size,
+                binary=binary,
+            ),
+            timeout,
+        )
+
+    async def __raw_stream(
+        self,
+        url: str,
+        secret_raw_access_code: Optional[str],
+        *,
+        chunk_size: int,
+        binary: bool,
+    ) -> AsyncIterator[str | bytes]:
+        async for text in self.__stream_raw(
+            url,
+            secret_raw_access_code,
+            chunk_size,
+        ):
+            if binary:
+                yield text.encode()
+            else:
+                yield text
+
+    async def raw_to(
+        self,
+        url: str,
+        writer: Any,
+        secret_raw_access_code: Optional[str] = None,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        binary: bool | None = None,
+        timeout: float | None = None,
+    ) -> int:
+        return await with_deadline(
+            self.__raw_to(
+                url,
+                writer,
+                secret_raw_access_code,
+                chunk_size=chunk_size,
+                binary=binary,
+            ),
+            timeout,
+        )
+
+    async def __raw_to(
+        self,
+        url: str,
+        writer: Any,
+        secret_raw_access_code: Optional[str],
+        *,
+        chunk_size: int,
+        binary: bool | None,
+    ) -> int:
+        if binary is None:
+            binary = not isinstance(writer, io.TextIOBase)
+
+        written = 0
+
+        async for text in self.__stream_raw(
+            url,
+            secret_raw_access_code,
+            chunk_size,
+        ):
+            chunk: str | bytes = text.encode() if binary else text
+            result = writer.write(chunk)
+
+            if inspect.isawaitable(result):
+                await result
+
+            drain = getattr(writer, 'drain', None)
+
+            if drain is not None:
+                await drain()
+
+            written += len(chunk)
+
+        return written
+
+    async def __bulk_tokens(self) -> dict[URL, str]:
+        # Best effort: when the token can't be fetched up front, every item
+        # fetches its own one, with failover and its own error
+        mirror = self.__mirrors.select()
+
+        try:
+            return {mirror.url: await self.__get_csrf_token(mirror)}
+        except Exception:  # noqa: B902
+            return {}
+
+    def new_pages(
+        self,
+        items: Items[str | Page],
+        *,
+        concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        ordered: bool = True,
+        timeout: float | None = None,
+    ) -> AsyncIterator[BulkResult[Page]]:
+        return iterate_with_deadline(
+            self.__new_pages(items, concurrency=concurrency, ordered=ordered),
+            timeout,
+        )
+
+    async def __new_pages(
+        self,
+        items: Items[str | Page],
+        *,
+        concurrency: int,
+        ordered: bool,
+    ) -> AsyncIterator[BulkResult[Page]]:
+        tokens = await self.__bulk_tokens()
+
+        async def create(item: str | Page) -> Page:
+            # Frozen pages are not Page instances
+            if isinstance(item, str):
+                return await self.__new_page(
+                    item,
+                    url=None,
+                    edit_code=None,
+                    tokens=tokens,
+                )
+
+            return await self.__new_page(
+                item.require_text(),
+                url=item.url,
+                edit_code=item.edit_code,
+                tokens=tokens,
+            )
+
+        async for result in bounded_map(
+            create,
+            items,
+            concurrency=concurrency,
+            ordered=ordered,
+        ):
+            yield result
+
+    def edit_pages(
+        self,
+        items: Items[Page],
+        *,
+        concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        ordered: bool = True,
+        timeout: float | None = None,
+    ) -> AsyncIterator[BulkResult[Page]]:
+        return iterate_with_deadline(
+            self.__edit_pages(items, concurrency=concurrency, ordered=ordered),
+            timeout,
+        )
+
+    async def __edit_pages(
+        self,
+        items: Items[Page],
+        *,
+        concurrency: int,
+        ordered: bool,
+    ) -> AsyncIterator[BulkResult[Page]]:
+        tokens = await self.__bulk_tokens()
+
+        async def edit(item: Page) -> Page:
+            return await self.__edit_page(
+                item.require_text(),
+                url=item.url,
+                edit_code=item.edit_code,
+                tokens=tokens,
+            )
+
+        async for result in bounded_map(
+            edit,
+            items,
+            concurrency=concurrency,
+            ordered=ordered,
+        ):
+            yield result
+
+    def delete_pages(
+        self,
+        items: Items[Page],
+        *,
+        concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        ordered: bool = True,
+        timeout: float | None = None,
+    ) -> AsyncIterator[BulkResult[bool]]:
+        return iterate_with_deadline(
+            self.__delete_pages(
+                items,
+                concurrency=concurrency,
+                ordered=ordered,
+            ),
+            timeout,
+        )
+
+    async def __delete_pages(
+        self,
+        items: Items[Page],
+        *,
+        concurrency: int,
+        ordered: bool,
+    ) -> AsyncIterator[BulkResult[bool]]:
+        tokens = await self.__bulk_tokens()
+
+        async def delete(item: Page) -> bool:
+            return await self.__delete_page(
+                url=item.url,
+                edit_code=item.edit_code,
+                tokens=tokens,
+            )
+
+        async for result in bounded_map(
+            delete,
+            items,
+            concurrency=concurrency,
+            ordered=ordered,
+        ):
+            yield result
+
+    def raw_many(
+        self,
+        urls: Items[str],
+        secret_raw_access_code: Optional[str] = None,
+        *,
+        concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        ordered: bool = True,
+        timeout: float | None = None,
+    ) -> AsyncIterator[BulkResult[str]]:
+        async def read(url: str) -> str:
+            return await self.raw(url, secret_raw_access_code)
+
+        return iterate_with_deadline(
+            bounded_map(read, urls, concurrency=concurrency, ordered=ordered),
+            timeout,
+        )
 
     async def png(
         self,
@@ -0,0 +1,58 @@
+import functools
+import json
+from typing import Any, Callable
+
+JSONLoads = Callable[[bytes], Any]
+
+
+def _stdlib_loads(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def _orjson_loads() -> JSONLoads | None:
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    return orjson.loads
+
+
+def _msgspec_loads() -> JSONLoads | None:
+    try:
+        import msgspec
+    except ImportError:
+        return None
+
+    return msgspec.json.decode
+
+
+LOADS_FACTORIES: dict[str, Callable[[], JSONLoads | None]] = {
+    'orjson': _orjson_loads,
+    'msgspec': _msgspec_loads,
+    'json': lambda: _stdlib_loads,
+}
+
+
+def available_loads() -> dict[str, JSONLoads]:
+    codecs = {}
+
+    for name, factory in LOADS_FACTORIES.items():
+        loads = factory()
+
+        if loads is not None:
+            codecs[name] = loads
+
+    return codecs
+
+
+@functools.cache
+def default_loads() -> JSONLoads:
+    # The first installed codec wins: orjson, msgspec, stdlib json
+    for factory in LOADS_FACTORIES.values():
+        loads = factory()
+
+        if loads is not None:
+            return loads
+
+    return _stdlib_loads
@@ -0,0 +1,150 @@
+import asyncio
+import socket
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+from aiohttp import ClientSession, DummyCookieJar, TCPConnector, TraceConfig
+
+SocketOption = tuple[int, int, int | bytes]
+
+# The default of aiohttp, which only accepts the option since 3.10
+DEFAULT_HAPPY_EYEBALLS_DELAY = 0.25
+
+
+@dataclass(frozen=True)
+class ConnectionConfig:
+    limit: int = 100
+    limit_per_host: int = 0
+    keepalive_timeout: float | None = 15.0
+    use_dns_cache: bool = True
+    ttl_dns_cache: int | None = 10
+    force_close: bool = False
+    enable_cleanup_closed: bool = False
+    happy_eyeballs_delay: float | None = DEFAULT_HAPPY_EYEBALLS_DELAY
+    socket_options: tuple[SocketOption, ...] = ()
+    # Number of keep-alive connections opened by Client.setup()
+    warmup_connections: int = 0
+
+    def create_connector(self) -> TCPConnector:
+        kwargs: dict[str, Any] = {}
+        # Options newer than aiohttp 3.9, with the version they need
+        required: list[str] = []
+
+        # aiohttp doesn't allow keepalive_timeout together with force_close
+        if not self.force_close:
+            kwargs['keepalive_timeout'] = self.keepalive_timeout
+
+        if self.happy_eyeballs_delay != DEFAULT_HAPPY_EYEBALLS_DELAY:
+            kwargs['happy_eyeballs_delay'] = self.happy_eyeballs_delay
+            required.append('happy_eyeballs_delay requires aiohttp>=3.10')
+
+        if self.socket_options:
+            kwargs['socket_factory'] = _socket_factory(self.socket_options)
+            required.append('socket_options require aiohttp>=3.12')
+
+        try:
+            return TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=self.use_dns_cache,
+                ttl_dns_cache=self.ttl_dns_cache,
+                force_close=self.force_close,
+                enable_cleanup_closed=self.enable_cleanup_closed,
+                **kwargs,
+            )
+        except TypeError as exc:
+            if not required:
+                raise
+
+            raise RuntimeError(', '.join(required)) from exc
+
+
+def _socket_factory(
+    options: tuple[SocketOption, ...],
+) -> Callable[[tuple], socket.socket]:
+    def factory(addr_info: tuple) -> socket.socket:
+        family, type_, proto, _, _ = addr_info
+        sock = socket.socket(family=family, type=type_, proto=proto)
+
+        try:
+            sock.setblocking(False)
+
+            for level, name, value in options:
+                sock.setsockopt(level, name, value)
+        except OSError:
+            sock.close()
+            raise
+
+        return sock
+
+    return factory
+
+
+ConnectorKey = tuple[asyncio.AbstractEventLoop, str, ConnectionConfig]
+
+
+class ConnectorRegistry:
+    # Connectors shared by clients with the same base url and connection
+    # config. A connector is bound to its event loop, so the loop is a part
+    # of the key. It's closed when the last client releases it.
+
+    def __init__(self) -> None:
+        self.__connectors: dict[ConnectorKey, TCPConnector] = {}
+        self.__refcounts: dict[ConnectorKey, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.__connectors)
+
+    def refcount(self, base_url: str, config: ConnectionConfig) -> int:
+        key = (asyncio.get_running_loop(), base_url, config)
+
+        return self.__refcounts.get(key, 0)
+
+    def acquire(self, base_url: str, config: ConnectionConfig) -> TCPConnector:
+        key = (asyncio.get_running_loop(), base_url, config)
+        connector = self.__connectors.get(key)
+
+        if connector is None or connector.closed:
+            connector = self.__connectors[key] = config.create_connector()
+            self.__refcounts[key] = 0
+
+        self.__refcounts[key] += 1
+
+        return connector
+
+    async def release(self, base_url: str, config: ConnectionConfig) -> None:
+        key = (asyncio.get_running_loop(), base_url, config)
+        refcount = self.__refcounts.get(key, 0) - 1
+
+        if refcount > 0:
+            self.__refcounts[key] = refcount
+
+            return
+
+        self.__refcounts.pop(key, None)
+        connector = self.__connectors.pop(key, None)
+
+        if connector is not None:
+            await connector.close()
+
+
+# Used by clients created with share_connections=True
+shared_connectors = ConnectorRegistry()
+
+
+def create_session(
+    config: ConnectionConfig | None = None,
+    *,
+    trace_configs: Sequence[TraceConfig] = (),
+    connector: TCPConnector | None = None,
+) -> ClientSession:
+    # A session created with a connector doesn't close it
+    if config is None:
+        config = ConnectionConfig()
+
+    return ClientSession(
+        connector=connector or config.create_connector(),
+        connector_owner=connector is None,
+        cookie_jar=DummyCookieJar(),
+        trace_configs=list(trace_configs) or None,
+    )
@@ -0,0 +1,156 @@
+import asyncio
+import contextlib
+import inspect
+import time
+from contextvars import ContextVar, copy_context
+from typing import (
+    Any, AsyncGenerator, AsyncIterator, Awaitable, Coroutine, Iterator,
+    TypeVar,
+)
+
+T = TypeVar('T')
+
+# Absolute time.monotonic() value, shared by all client calls made in the
+# same context (e.g. while handling one web request)
+_deadline: ContextVar[float | None] = ContextVar(
+    'aiorentry_deadline',
+    default=None,
+)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+
+    def __init__(self, timeout: float | None = None):
+        super().__init__('Deadline exceeded')
+        self.timeout = timeout
+
+
+def current_deadline() -> float | None:
+    return _deadline.get()
+
+
+def remaining() -> float | None:
+    expires_at = _deadline.get()
+
+    if expires_at is None:
+        return None
+
+    return max(expires_at - time.monotonic(), 0.0)
+
+
+def _expires_at(timeout: float | None) -> float | None:
+    # A timeout can only make the current deadline shorter
+    expires_at = _deadline.get()
+
+    if timeout is None:
+        return expires_at
+
+    if timeout < 0:
+        raise ValueError('timeout must be non-negative')
+
+    candidate = time.monotonic() + timeout
+
+    if expires_at is None:
+        return candidate
+
+    return min(expires_at, candidate)
+
+
+def detach(coro: Coroutine[Any, Any, T]) -> 'asyncio.Task[T]':
+    # Starts a task that is shared by several callers or outlives the
+    # current one, so it must not inherit the deadline of the caller that
+    # happened to start it. Callers apply their own deadlines by waiting.
+    context = copy_context()
+    context.run(_deadline.set, None)
+
+    return context.run(asyncio.get_running_loop().create_task, coro)
+
+
+@contextlib.contextmanager
+def deadline(timeout: float | None) -> Iterator[float | None]:
+    # Every client call made inside the block, including the ones made by
+    # tasks started in it, has to finish within ``timeout`` seconds
+    expires_at = _expires_at(timeout)
+    token = _deadline.set(expires_at)
+
+    try:
+        yield expires_at
+    finally:
+        _deadline.reset(token)
+
+
+def _discard(operation: Awaitable[Any]) -> None:
+    # Avoids a "coroutine was never awaited" warning
+    if inspect.iscoroutine(operation):
+        operation.close()
+
+
+async def _wait(
+    operation: Awaitable[T],
+    expires_at: float,
+    timeout: float | None,
+) -> T:
+    left = expires_at - time.monotonic()
+
+    if left <= 0:
+        _discard(operation)
+
+        raise DeadlineExceeded(timeout)
+
+    # The operation runs in a task, which inherits the deadline
+    token = _deadline.set(expires_at)
+
+    try:
+        return await asyncio.wait_for(operation, left)
+    except asyncio.TimeoutError as exc:
+        if time.monotonic() < expires_at:
+            # E.g. a socket timeout, not the deadline
+            raise
+
+        raise DeadlineExceeded(timeout) from exc
+    finally:
+        _deadline.reset(token)
+
+
+async def with_deadline(
+    operation: Awaitable[T],
+    timeout: float | None = None,
+) -> T:
+    try:
+        expires_at = _expires_at(timeout)
+    except ValueError:
+        _discard(operation)
+        raise
+
+    if expires_at is None:
+        return await operation
+
+    return await _wait(operation, expires_at, timeout)
+
+
+async def iterate_with_deadline(
+    iterator: AsyncIterator[T],
+    timeout: float | None = None,
+) -> AsyncGenerator[T, None]:
+    # The deadline covers the whole iteration, not every single item
+    expires_at = _expires_at(timeout)
+
+    try:
+        if expires_at is None:
+            async for item in iterator:
+                yield item
+
+            return
+
+        while True:
+            try:
+                item = await _wait(anext(iterator), expires_at, timeout)
+            except StopAsyncIteration:
+                return
+
+            yield item
+    finally:
+        aclose = getattr(iterator, 'aclose', None)
+
+        if aclose is not None:
+            await aclose()
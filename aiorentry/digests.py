@@ -0,0 +1,49 @@
+from collections import OrderedDict
+from typing import Protocol
+
+DEFAULT_DIGEST_STORE_MAXSIZE = 100_000
+
+DigestKey = tuple[str, str]
+
+
+class DigestStore(Protocol):
+
+    async def get(self, key: DigestKey) -> bytes | None:
+        ...
+
+    async def set(self, key: DigestKey, digest: bytes) -> None:
+        ...
+
+    async def delete(self, key: DigestKey) -> None:
+        ...
+
+
+class MemoryDigestStore:
+
+    def __init__(self, maxsize: int = DEFAULT_DIGEST_STORE_MAXSIZE):
+        if maxsize < 1:
+            raise ValueError('maxsize must be a positive number')
+
+        self.maxsize = maxsize
+        self.__digests: OrderedDict[DigestKey, bytes] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.__digests)
+
+    async def get(self, key: DigestKey) -> bytes | None:
+        digest = self.__digests.get(key)
+
+        if digest is not None:
+            self.__digests.move_to_end(key)
+
+        return digest
+
+    async def set(self, key: DigestKey, digest: bytes) -> None:
+        self.__digests[key] = digest
+        self.__digests.move_to_end(key)
+
+        while len(self.__digests) > self.maxsize:
+            self.__digests.popitem(last=False)
+
+    async def delete(self, key: DigestKey) -> None:
+        self.__digests.pop(key, None)
@@ -0,0 +1,303 @@
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from aiorentry.models import content_digest
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# accessed_at is refreshed at most this often, so that reads shared by
+# several processes don't turn into a write each
+ACCESS_RESOLUTION = 60.0
+
+CacheKey = tuple[str, str, str | None]
+
+_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS raw_cache (
+    base_url TEXT NOT NULL,
+    url TEXT NOT NULL,
+    access_code TEXT NOT NULL,
+    content TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (base_url, url, access_code)
+);
+CREATE INDEX IF NOT EXISTS raw_cache_accessed_at
+    ON raw_cache (accessed_at);
+CREATE TABLE IF NOT EXISTS raw_cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO raw_cache_size (id, total) VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS raw_cache_insert AFTER INSERT ON raw_cache
+BEGIN
+    UPDATE raw_cache_size SET total = total + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS raw_cache_delete AFTER DELETE ON raw_cache
+BEGIN
+    UPDATE raw_cache_size SET total = total - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS raw_cache_update AFTER UPDATE OF size
+ON raw_cache
+BEGIN
+    UPDATE raw_cache_size SET total = total - old.size + new.size
+    WHERE id = 0;
+END;
+"""
+
+
+@dataclass
+class StoredEntry:
+    key: CacheKey
+    text: str
+    digest: bytes
+    stored_at: float
+    # The page has an access code, which isn't stored, so the key has
+    # None in its place and can't be used for lookups
+    secret: bool = False
+
+
+def _access_code(key: CacheKey) -> str:
+    # NULL can't be part of a primary key, an empty code means "no code".
+    # Codes are secrets, so only their digests are written to the file.
+    code = key[2]
+
+    return content_digest(code).hex() if code else ''
+
+
+class SQLiteCacheStore:
+    # Blocking store, safe to share between threads and processes on one
+    # host. RawCache calls it from a worker thread.
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        timeout: float = 5.0,
+    ):
+        if max_bytes < 1:
+            raise ValueError('max_bytes must be a positive number')
+
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level='IMMEDIATE',
+            check_same_thread=False,
+        )
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.execute('PRAGMA synchronous=NORMAL')
+        self.__db.executescript(_SCHEMA)
+        self.__migrate()
+
+        # Totals of older versions could drift, see set()
+        with self.__db:
+            self.__db.execute(
+                """
+                UPDATE raw_cache_size
+                SET total = (SELECT COALESCE(SUM(size), 0) FROM raw_cache)
+                WHERE id = 0
+                """,
+            )
+
+    def __migrate(self) -> None:
+        (version,) = self.__db.execute('PRAGMA user_version').fetchone()
+
+        if version >= _SCHEMA_VERSION:
+            return
+
+        with self.__db:
+            # Older versions stored raw access codes in plain text
+            self.__db.execute("DELETE FROM raw_cache WHERE access_code != ''")
+            self.__db.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__db.close()
+
+    @property
+    def total_bytes(self) -> int:
+        with self.__lock:
+            row = self.__db.execute(
+                'SELECT total FROM raw_cache_size WHERE id = 0',
+            ).fetchone()
+
+        return int(row[0])
+
+    def __len__(self) -> int:
+        with self.__lock:
+            row = self.__db.execute(
+                'SELECT COUNT(*) FROM raw_cache',
+            ).fetchone()
+
+        return int(row[0])
+
+    def get(self, key: CacheKey) -> StoredEntry | None:
+        base_url, url, _ = key
+        now = time.time()
+
+        with self.__lock:
+            row = self.__db.execute(
+                """
+                SELECT content, digest, stored_at, accessed_at FROM raw_cache
+                WHERE base_url = ? AND url = ? AND access_code = ?
+                """,
+                (base_url, url, _access_code(key)),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            # The update takes the write lock of the whole file, the
+            # select above doesn't
+            if row[3] < now - ACCESS_RESOLUTION:
+                with self.__db:
+                    self.__db.execute(
+                        """
+                        UPDATE raw_cache SET accessed_at = ?
+                        WHERE base_url = ? AND url = ? AND access_code = ?
+                            AND accessed_at < ?
+                        """,
+                        (
+                            now,
+                            base_url,
+                            url,
+                            _access_code(key),
+                            now - ACCESS_RESOLUTION,
+                        ),
+                    )
+
+        return StoredEntry(
+            key=key,
+            text=row[0],
+            digest=row[1],
+            stored_at=row[2],
+        )
+
+    def set(self, key: CacheKey, text: str) -> None:
+        base_url, url, _ = key
+        size = len(text.encode())
+
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+
+        with self.__lock, self.__db:
+            # An upsert, as INSERT OR REPLACE doesn't fire the delete
+            # trigger and the old size would never be subtracted
+            self.__db.execute(
+                """
+                INSERT INTO raw_cache (
+                    base_url, url, access_code, content, digest, size,
+                    stored_at, accessed_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (base_url, url, access_code) DO UPDATE SET
+                    content = excluded.content,
+                    digest = excluded.digest,
+                    size = excluded.size,
+                    stored_at = excluded.stored_at,
+                    accessed_at = excluded.accessed_at
+                """,
+                (
+                    base_url,
+                    url,
+                    _access_code(key),
+                    text,
+                    content_digest(text),
+                    size,
+                    now,
+                    now,
+                ),
+            )
+            self.__evict()
+
+    def update_page(self, base_url: str, url: str, text: str) -> None:
+        now = time.time()
+
+        with self.__lock, self.__db:
+            self.__db.execute(
+                """
+                UPDATE raw_cache SET content = ?, digest = ?, size = ?,
+                    stored_at = ?, accessed_at = ?
+                WHERE base_url = ? AND url = ?
+                """,
+                (
+                    text,
+                    content_digest(text),
+                    len(text.encode()),
+                    now,
+                    now,
+                    base_url,
+                    url,
+                ),
+            )
+            self.__evict()
+
+    def invalidate_page(self, base_url: str, url: str) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute(
+                'DELETE FROM raw_cache WHERE base_url = ? AND url = ?',
+                (base_url, url),
+            )
+
+    def recent(self, limit: int, newer_than: float) -> list[StoredEntry]:
+        with self.__lock:
+            rows = self.__db.execute(
+                """
+                SELECT base_url, url, access_code, content, digest, stored_at
+                FROM raw_cache WHERE stored_at >= ?
+                ORDER BY accessed_at DESC LIMIT ?
+                """,
+                (newer_than, limit),
+            ).fetchall()
+
+        return [
+            StoredEntry(
+                key=(base_url, url, None),
+                text=content,
+                digest=digest,
+                stored_at=stored_at,
+                secret=access_code != '',
+            )
+            for base_url, url, access_code, content, digest, stored_at in rows
+        ]
+
+    def clear(self) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute('DELETE FROM raw_cache')
+
+    def __evict(self) -> None:
+        # Least recently used entries go first, until the total size fits
+        (total,) = self.__db.execute(
+            'SELECT total FROM raw_cache_size WHERE id = 0',
+        ).fetchone()
+
+        while total > self.max_bytes:
+            rows = self.__db.execute(
+                """
+                SELECT rowid, size FROM raw_cache
+                ORDER BY accessed_at LIMIT 64
+                """,
+            ).fetchall()
+
+            if not rows:
+                break
+
+            for rowid, size in rows:
+                self.__db.execute(
+                    'DELETE FROM raw_cache WHERE rowid = ?',
+                    (rowid,),
+                )
+                total -= size
+
+                if total <= self.max_bytes:
+                    break
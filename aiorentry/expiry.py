@@ -0,0 +1,464 @@
+import asyncio
+import heapq
+import math
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import Callable, Iterable, Protocol, Sequence, Type
+
+from typing_extensions import Self
+
+from aiorentry.bulk import DEFAULT_BULK_CONCURRENCY
+from aiorentry.client import Client
+from aiorentry.deadline import detach
+from aiorentry.models import Page
+
+DEFAULT_EXPIRY_BATCH_SIZE = 100
+DEFAULT_EXPIRY_INTERVAL = 60.0
+DEFAULT_EXPIRY_RETRY_DELAY = 60.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS expiring_pages (
+    url TEXT PRIMARY KEY,
+    edit_code TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS expiring_pages_expires_at
+    ON expiring_pages (expires_at);
+"""
+
+
+@dataclass(frozen=True, slots=True)
+class ExpiringPage:
+    url: str
+    edit_code: str
+    # Unix time, so that expiries survive restarts
+    expires_at: float
+
+
+class ExpiryStore(Protocol):
+
+    async def add(self, pages: Sequence[ExpiringPage]) -> None:
+        ...
+
+    async def remove(self, urls: Sequence[str]) -> None:
+        ...
+
+    async def due(self, now: float, limit: int) -> list[ExpiringPage]:
+        ...
+
+    async def next_expiry(self) -> float | None:
+        ...
+
+    async def count(self) -> int:
+        ...
+
+
+class MemoryExpiryStore:
+    # A heap ordered by expiry time. Removed and rescheduled pages leave
+    # stale heap items behind, which are skipped when they come up and
+    # dropped by a rebuild once they outnumber the live ones.
+
+    def __init__(self) -> None:
+        self.__pages: dict[str, ExpiringPage] = {}
+        self.__heap: list[tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.__pages)
+
+    async def add(self, pages: Sequence[ExpiringPage]) -> None:
+        for page in pages:
+            self.__pages[page.url] = page
+            heapq.heappush(self.__heap, (page.expires_at, page.url))
+
+        self.__compact()
+
+    async def remove(self, urls: Sequence[str]) -> None:
+        for url in urls:
+            self.__pages.pop(url, None)
+
+        self.__compact()
+
+    async def due(self, now: float, limit: int) -> list[ExpiringPage]:
+        heap = self.__heap
+        pages: dict[str, ExpiringPage] = {}
+
+        while heap and heap[0][0] <= now and len(pages) < limit:
+            expires_at, url = heapq.heappop(heap)
+
+            if self.__is_live(expires_at, url):
+                pages[url] = self.__pages[url]
+
+        # Due pages stay in the heap until they are removed or rescheduled
+        for page in pages.values():
+            heapq.heappush(heap, (page.expires_at, page.url))
+
+        return list(pages.values())
+
+    async def next_expiry(self) -> float | None:
+        self.__drop_stale()
+
+        return self.__heap[0][0] if self.__heap else None
+
+    async def count(self) -> int:
+        return len(self.__pages)
+
+    def __is_live(self, expires_at: float, url: str) -> bool:
+        page = self.__pages.get(url)
+
+        return page is not None and page.expires_at == expires_at
+
+    def __drop_stale(self) -> None:
+        heap = self.__heap
+
+        while heap and not self.__is_live(*heap[0]):
+            heapq.heappop(heap)
+
+    def __compact(self) -> None:
+        if len(self.__heap) > 2 * len(self.__pages) + 1024:
+            self.__heap = [
+                (page.expires_at, page.url) for page in self.__pages.values()
+            ]
+            heapq.heapify(self.__heap)
+
+
+class SQLiteExpiryStore:
+    # Expired pages are found through an index on the expiry time, so the
+    # cost of a batch doesn't depend on the number of tracked pages
+
+    def __init__(self, path: str | Path, *, timeout: float = 5.0):
+        self.path = Path(path)
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level='IMMEDIATE',
+            check_same_thread=False,
+        )
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.execute('PRAGMA synchronous=NORMAL')
+        self.__db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__db.close()
+
+    async def add(self, pages: Sequence[ExpiringPage]) -> None:
+        await asyncio.to_thread(self.__add, pages)
+
+    async def remove(self, urls: Sequence[str]) -> None:
+        await asyncio.to_thread(self.__remove, urls)
+
+    async def due(self, now: float, limit: int) -> list[ExpiringPage]:
+        return await asyncio.to_thread(self.__due, now, limit)
+
+    async def next_expiry(self) -> float | None:
+        return await asyncio.to_thread(self.__next_expiry)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self.__count)
+
+    def __add(self, pages: Sequence[ExpiringPage]) -> None:
+        with self.__lock, self.__db:
+            self.__db.executemany(
+                """
+                INSERT OR REPLACE INTO expiring_pages (
+                    url, edit_code, expires_at
+                ) VALUES (?, ?, ?)
+                """,
+                [
+                    (page.url, page.edit_code, page.expires_at)
+                    for page in pages
+                ],
+            )
+
+    def __remove(self, urls: Sequence[str]) -> None:
+        with self.__lock, self.__db:
+            self.__db.executemany(
+                'DELETE FROM expiring_pages WHERE url = ?',
+                [(url,) for url in urls],
+            )
+
+    def __due(self, now: float, limit: int) -> list[ExpiringPage]:
+        with self.__lock:
+            rows = self.__db.execute(
+                """
+                SELECT url, edit_code, expires_at FROM expiring_pages
+                WHERE expires_at <= ? ORDER BY expires_at LIMIT ?
+                """,
+                (now, limit),
+            ).fetchall()
+
+        return [ExpiringPage(*row) for row in rows]
+
+    def __next_expiry(self) -> float | None:
+        with self.__lock:
+            row = self.__db.execute(
+                'SELECT MIN(expires_at) FROM expiring_pages',
+            ).fetchone()
+
+        return row[0]
+
+    def __count(self) -> int:
+        with self.__lock:
+            row = self.__db.execute(
+                'SELECT COUNT(*) FROM expiring_pages',
+            ).fetchone()
+
+        return int(row[0])
+
+
+@dataclass
+class ExpiryStats:
+    tracked: int = 0
+    deleted: int = 0
+    # Already deleted, or the edit code is wrong
+    missing: int = 0
+    rescheduled: int = 0
+    batches: int = 0
+    # Worker rounds that failed, e.g. because the store was locked
+    failures: int = 0
+
+
+# Deletes temporary pages when their time to live runs out. Expired pages
+# are deleted in batches of ``batch_size``, ``concurrency`` requests at a
+# time and at most ``rate`` pages per second. Failed deletions are retried
+# after ``retry_delay``, and so is the worker when a round fails. With a
+# persistent store, pages tracked before a restart are deleted too.
+class PageExpirer:
+
+    def __init__(
+        self,
+        client: Client,
+        store: ExpiryStore | None = None,
+        *,
+        batch_size: int = DEFAULT_EXPIRY_BATCH_SIZE,
+        concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        rate: float | None = None,
+        retry_delay: float = DEFAULT_EXPIRY_RETRY_DELAY,
+        interval: float = DEFAULT_EXPIRY_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ):
+        if batch_size < 1:
+            raise ValueError('batch_size must be a positive number')
+
+        if concurrency < 1:
+            raise ValueError('concurrency must be a positive number')
+
+        if rate is not None and rate <= 0:
+            raise ValueError('rate must be a positive number')
+
+        if retry_delay <= 0:
+            raise ValueError('retry_delay must be a positive number')
+
+        self.store = store if store is not None else MemoryExpiryStore()
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.rate = rate
+        self.retry_delay = retry_delay
+        # The longest sleep between checks, in case the store is shared
+        self.interval = interval
+        self.stats = ExpiryStats()
+        # The last error of every page, until it's deleted
+        self.errors: dict[str, Exception] = {}
+        # The last error of the background worker
+        self.last_error: Exception | None = None
+        self.__client = client
+        self.__clock = clock
+        self.__wakeup = asyncio.Event()
+        self.__wake_at: float | None = None
+        self.__worker: asyncio.Task[None] | None = None
+        self.__closed = False
+
+    async def __aenter__(self) -> Self:
+        self.start()
+
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Type[BaseException],
+        exc_value: BaseException,
+        traceback: TracebackType,
+    ) -> None:
+        await self.close()
+
+    async def new_page(
+        self,
+        text: str,
+        *,
+        ttl: float,
+        url: str | None = None,
+        edit_code: str | None = None,
+        timeout: float | None = None,
+    ) -> Page:
+        page = await self.__client.new_page(
+            text,
+            url=url,
+            edit_code=edit_code,
+            timeout=timeout,
+        )
+        await self.track(page, ttl=ttl)
+
+        return page
+
+    async def track(self, page: Page, *, ttl: float) -> None:
+        await self.track_many([page], ttl=ttl)
+
+    async def track_many(self, pages: Iterable[Page], *, ttl: float) -> None:
+        if ttl < 0:
+            raise ValueError('ttl must be non-negative')
+
+        expires_at = self.__clock() + ttl
+        entries = [
+            ExpiringPage(page.url, page.edit_code, expires_at)
+            for page in pages
+        ]
+        await self.store.add(entries)
+        self.stats.tracked += len(entries)
+
+        # Only an earlier expiry than the one the worker waits for needs
+        # to wake it up
+        if self.__wake_at is not None and expires_at < self.__wake_at:
+            self.__wakeup.set()
+
+    async def forget(self, url: str) -> None:
+        await self.store.remove([url])
+
+    def start(self) -> None:
+        if self.__closed:
+            raise RuntimeError('Expirer is closed')
+
+        if self.__worker is None:
+            self.__worker = detach(self.__run())
+
+    async def close(self) -> None:
+        self.__closed = True
+        worker = self.__worker
+        self.__worker = None
+
+        # The worker sees the closed flag and exits after the current
+        # batch. Cancelling it instead could be lost inside wait_for().
+        if worker is not None:
+            self.__wakeup.set()
+            await worker
+
+    async def purge(self) -> int:
+        # Deletes everything that has expired right away. Stops early
+        # when a whole batch fails.
+        deleted = 0
+
+        while True:
+            _, completed = await self.__delete_batch()
+
+            if not completed:
+                return deleted
+
+            deleted += completed
+
+    async def __run(self) -> None:
+        while not self.__closed:
+            self.__wakeup.clear()
+
+            try:
+                await self.__run_once()
+            except Exception as exc:  # noqa: B902
+                # Keeps the worker alive, expiry goes on once e.g. a locked
+                # store is available again
+                self.stats.failures += 1
+                self.last_error = exc
+                await self.__sleep(self.retry_delay)
+
+    async def __run_once(self) -> None:
+        started = self.__clock()
+        processed, _ = await self.__delete_batch()
+
+        if processed:
+            if self.rate is not None:
+                elapsed = self.__clock() - started
+                delay = processed / self.rate - elapsed
+                await asyncio.sleep(max(delay, 0.0))
+
+            return
+
+        # Pages tracked while the store is queried wake the worker up
+        self.__wake_at = math.inf
+
+        try:
+            next_expiry = await self.store.next_expiry()
+            now = self.__clock()
+            wake_at = now + self.interval
+
+            if next_expiry is not None:
+                wake_at = min(wake_at, next_expiry)
+
+            self.__wake_at = wake_at
+            await self.__sleep(wake_at - now)
+        finally:
+            self.__wake_at = None
+
+    async def __sleep(self, delay: float) -> None:
+        # Ends early when the worker is woken up
+        try:
+            await asyncio.wait_for(self.__wakeup.wait(), max(delay, 0.0))
+        except asyncio.TimeoutError:
+            pass
+
+    async def __delete_batch(self) -> tuple[int, int]:
+        # Returns the number of processed and of completed pages
+        now = self.__clock()
+        batch = await self.store.due(now, self.batch_size)
+
+        if not batch:
+            return 0, 0
+
+        pages = [
+            Page(url=item.url, edit_code=item.edit_code) for item in batch
+        ]
+        pending = dict(enumerate(batch))
+        done = []
+        retries = []
+        self.stats.batches += 1
+
+        try:
+            async for result in self.__client.delete_pages(
+                pages,
+                concurrency=self.concurrency,
+                ordered=False,
+            ):
+                item = pending.pop(result.index)
+
+                if result.error is not None:
+                    self.errors[item.url] = result.error
+                    retries.append(item)
+                elif result.result:
+                    self.stats.deleted += 1
+                    done.append(item.url)
+                else:
+                    self.stats.missing += 1
+                    done.append(item.url)
+        except Exception as exc:  # noqa: B902
+            # E.g. the pages of the batch could not be iterated
+            for item in pending.values():
+                self.errors[item.url] = exc
+                retries.append(item)
+
+        for url in done:
+            self.errors.pop(url, None)
+
+        await self.store.remove(done)
+
+        if retries:
+            self.stats.rescheduled += len(retries)
+            retry_at = now + self.retry_delay
+            await self.store.add(
+                [
+                    ExpiringPage(item.url, item.edit_code, retry_at)
+                    for item in retries
+                ],
+            )
+
+        return len(batch), len(done)
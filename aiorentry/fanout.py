@@ -0,0 +1,278 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.util import Finalize
+from typing import (
+    Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Mapping, TypeVar,
+)
+
+from aiohttp import ClientResponseError
+
+from aiorentry.bulk import Items, bounded_map, iterate
+from aiorentry.client import Client
+from aiorentry.models import BulkResult, Page
+from aiorentry.ratelimit import AdaptiveRateLimiter
+
+DEFAULT_FANOUT_CONCURRENCY = 100
+DEFAULT_FANOUT_BATCH_SIZE = 100
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+# Must be a module level function, so that it can be sent to the workers
+Job = Callable[[Client, T], Awaitable[R]]
+
+
+class WorkerError(Exception):
+    # An error raised in a worker process that can't be sent back as is
+
+    def __init__(
+        self,
+        type_name: str,
+        message: str,
+        status: int | None = None,
+    ):
+        super().__init__(type_name, message, status)
+        self.type_name = type_name
+        self.message = message
+        self.status = status
+
+    def __str__(self) -> str:
+        return f'{self.type_name}: {self.message}'
+
+
+def _portable(exc: Exception) -> Exception:
+    # Exceptions that pickle, but whose __init__ doesn't match their args,
+    # only fail when loaded in the parent, and break the whole pool there
+    try:
+        pickle.loads(pickle.dumps(exc))
+    except Exception:  # noqa: B902
+        status = exc.status if isinstance(exc, ClientResponseError) else None
+
+        return WorkerError(type(exc).__qualname__, str(exc), status)
+
+    return exc
+
+
+async def create_page(client: Client, item: str | Page) -> Page:
+    if isinstance(item, str):
+        return await client.new_page(item)
+
+    return await client.new_page(
+        item.require_text(),
+        url=item.url,
+        edit_code=item.edit_code,
+    )
+
+
+async def edit_page(client: Client, page: Page) -> Page:
+    return await client.edit_page(
+        page.require_text(),
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+
+async def delete_page(client: Client, page: Page) -> bool:
+    return await client.delete_page(url=page.url, edit_code=page.edit_code)
+
+
+async def read_page(client: Client, url: str) -> str:
+    return await client.raw(url)
+
+
+class _Worker:
+    # One event loop and one client per worker process, kept between
+    # batches and closed when the process exits
+
+    def __init__(
+        self,
+        job: Job[Any, Any],
+        client_options: Mapping[str, Any],
+        concurrency: int,
+    ):
+        self.job = job
+        self.concurrency = concurrency
+        self.loop = asyncio.new_event_loop()
+        self.client = Client(**client_options)
+        self.loop.run_until_complete(self.client.setup())
+        Finalize(self, self.close, exitpriority=10)
+
+    def close(self) -> None:
+        self.loop.run_until_complete(self.client.close())
+        self.loop.close()
+
+    def run(self, batch: list[tuple[int, Any]]) -> list[BulkResult[Any]]:
+        return self.loop.run_until_complete(self.__run(batch))
+
+    async def __run(
+        self,
+        batch: list[tuple[int, Any]],
+    ) -> list[BulkResult[Any]]:
+        items = [item for _, item in batch]
+        results = []
+
+        async for result in bounded_map(
+            lambda item: self.job(self.client, item),
+            items,
+            concurrency=self.concurrency,
+        ):
+            error = result.error
+
+            results.append(
+                BulkResult(
+                    index=batch[result.index][0],
+                    item=result.item,
+                    result=result.result,
+                    error=None if error is None else _portable(error),
+                ),
+            )
+
+        return results
+
+
+_worker: _Worker | None = None
+
+
+def _init_worker(
+    job: Job[Any, Any],
+    client_options: dict[str, Any],
+    concurrency: int,
+    rates: tuple[float | None, float | None] | None,
+) -> None:
+    global _worker
+
+    if rates is not None:
+        client_options['rate_limiter'] = AdaptiveRateLimiter(*rates)
+
+    _worker = _Worker(job, client_options, concurrency)
+
+
+def _run_batch(batch: list[tuple[int, Any]]) -> list[BulkResult[Any]]:
+    assert _worker is not None
+
+    return _worker.run(batch)
+
+
+async def _batches(
+    items: Items[T],
+    size: int,
+) -> AsyncGenerator[list[tuple[int, T]], None]:
+    batch: list[tuple[int, T]] = []
+    index = 0
+
+    async for item in iterate(items):
+        batch.append((index, item))
+        index += 1
+
+        if len(batch) == size:
+            yield batch
+
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def fan_out(
+    job: Job[T, R],
+    items: Items[T],
+    *,
+    processes: int | None = None,
+    concurrency: int = DEFAULT_FANOUT_CONCURRENCY,
+    read_rate: float | None = None,
+    write_rate: float | None = None,
+    batch_size: int = DEFAULT_FANOUT_BATCH_SIZE,
+    client_options: Mapping[str, Any] | None = None,
+) -> AsyncIterator[BulkResult[R]]:
+    # Shards a bulk job across worker processes, each with its own event
+    # loop and client. The concurrency and rates are totals, split evenly
+    # between the workers. Results are yielded as batches complete.
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes < 1:
+        raise ValueError('processes must be a positive number')
+
+    if concurrency < 1:
+        raise ValueError('concurrency must be a positive number')
+
+    if batch_size < 1:
+        raise ValueError('batch_size must be a positive number')
+
+    processes = min(processes, concurrency)
+    rates = None
+
+    # Only the configured kinds are limited, the other one is left alone
+    if read_rate is not None or write_rate is not None:
+        rates = (
+            read_rate / processes if read_rate is not None else None,
+            write_rate / processes if write_rate is not None else None,
+        )
+
+    loop = asyncio.get_running_loop()
+    executor = ProcessPoolExecutor(
+        processes,
+        # Forking a process with a running event loop is not safe
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(
+            job,
+            dict(client_options or {}),
+            concurrency // processes,
+            rates,
+        ),
+    )
+    pending: dict[asyncio.Future[list[BulkResult[Any]]], list[Any]] = {}
+    batches = _batches(items, batch_size)
+    exhausted = False
+
+    try:
+        while True:
+            # A couple of batches per worker are queued, so that workers
+            # don't wait for the parent, but the input is read lazily
+            while not exhausted and len(pending) < processes * 2:
+                try:
+                    batch = await anext(batches)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+
+                future = loop.run_in_executor(executor, _run_batch, batch)
+                pending[future] = batch
+
+            if not pending:
+                return
+
+            done, _ = await asyncio.wait(
+                pending,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            for future in done:
+                batch = pending.pop(future)
+
+                try:
+                    results = future.result()
+                except Exception as exc:  # noqa: B902
+                    # The batch has not been processed at all, e.g. a worker
+                    # died or an item could not be pickled
+                    for index, item in batch:
+                        yield BulkResult(index=index, item=item, error=exc)
+
+                    continue
+
+                for result in results:
+                    yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+        await batches.aclose()
+        await asyncio.to_thread(
+            executor.shutdown,
+            wait=True,
+            cancel_futures=True,
+        )
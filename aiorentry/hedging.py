@@ -0,0 +1,71 @@
+import math
+from collections import deque
+
+from aiorentry.retry import RetryBudget
+
+DEFAULT_HEDGE_PERCENTILE = 95.0
+DEFAULT_HEDGE_RATIO = 0.1
+DEFAULT_LATENCY_WINDOW = 200
+DEFAULT_MIN_SAMPLES = 20
+
+
+class HedgingPolicy:
+    # A duplicate request is sent when the first one hasn't answered
+    # within ``delay`` seconds. Without a fixed delay, the ``percentile``
+    # of recent latencies is used, once there are enough samples.
+    # Hedges are paid from a budget that grows by ``ratio`` per request,
+    # so at most that fraction of requests is duplicated.
+
+    def __init__(
+        self,
+        delay: float | None = None,
+        *,
+        percentile: float = DEFAULT_HEDGE_PERCENTILE,
+        window: int = DEFAULT_LATENCY_WINDOW,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        budget: RetryBudget | None = None,
+    ):
+        if delay is not None and delay < 0:
+            raise ValueError('delay must be non-negative')
+
+        if not 0 < percentile <= 100:
+            raise ValueError('percentile must be in (0, 100]')
+
+        self.delay = delay
+        self.percentile = percentile
+        self.min_samples = min(min_samples, window)
+        self.budget = budget if budget is not None else RetryBudget(
+            ratio=DEFAULT_HEDGE_RATIO,
+            min_retries=1,
+            max_tokens=10.0,
+        )
+        self.requests = 0
+        self.hedged = 0
+        self.__samples: deque[float] = deque(maxlen=window)
+
+    def on_request(self) -> None:
+        self.requests += 1
+        self.budget.deposit()
+
+    def record(self, latency: float) -> None:
+        self.__samples.append(latency)
+
+    def hedge_delay(self) -> float | None:
+        if self.delay is not None:
+            return self.delay
+
+        if len(self.__samples) < self.min_samples:
+            return None
+
+        samples = sorted(self.__samples)
+        rank = math.ceil(len(samples) * self.percentile / 100)
+
+        return samples[max(rank, 1) - 1]
+
+    def try_hedge(self) -> bool:
+        if not self.budget.withdraw():
+            return False
+
+        self.hedged += 1
+
+        return True
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from typing import Callable, Iterator, Sequence
+
+from aiohttp import (
+    ClientConnectionError, ClientConnectorError, ClientResponseError,
+)
+from yarl import URL
+
+from aiorentry.deadline import DeadlineExceeded
+from aiorentry.ratelimit import RequestKind
+
+# rentry.org and rentry.co are two domains of the same backend
+DEFAULT_MIRRORS = ('https://rentry.org', 'https://rentry.co')
+DEFAULT_EWMA_ALPHA = 0.3
+DEFAULT_COOLDOWN = 30.0
+
+# These mean that the request has not been processed
+_UNPROCESSED_STATUSES = frozenset({502, 503, 504})
+
+
+class Mirror:
+
+    def __init__(self, url: URL):
+        self.url = url
+        self.latency: float | None = None
+        self.failures = 0
+        self.down_until = 0.0
+        self.csrf_token: str | None = None
+        self.csrf_token_expires_at = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f'Mirror(url={str(self.url)!r}, latency={self.latency!r}, '
+            f'failures={self.failures!r})'
+        )
+
+    def invalidate_csrf_token(self) -> None:
+        self.csrf_token = None
+        self.csrf_token_expires_at = 0.0
+
+
+class MirrorPool:
+
+    def __init__(
+        self,
+        urls: Sequence[str | URL],
+        *,
+        alpha: float = DEFAULT_EWMA_ALPHA,
+        cooldown: float = DEFAULT_COOLDOWN,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not urls:
+            raise ValueError('At least one mirror is required')
+
+        if not 0 < alpha <= 1:
+            raise ValueError('alpha must be in (0, 1]')
+
+        self.mirrors = tuple(Mirror(URL(url)) for url in urls)
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.__clock = clock
+
+    def __iter__(self) -> Iterator[Mirror]:
+        return iter(self.mirrors)
+
+    def __len__(self) -> int:
+        return len(self.mirrors)
+
+    @property
+    def primary(self) -> Mirror:
+        return self.mirrors[0]
+
+    def is_healthy(self, mirror: Mirror) -> bool:
+        return self.__clock() >= mirror.down_until
+
+    def candidates(self) -> list[Mirror]:
+        # Healthy mirrors go first, the fastest one on top. Mirrors that
+        # haven't been measured yet sort as the fastest, so each of them
+        # gets probed. Unhealthy mirrors are kept as the last resort.
+        healthy = []
+        unhealthy = []
+
+        for mirror in self.mirrors:
+            if self.is_healthy(mirror):
+                healthy.append(mirror)
+            else:
+                unhealthy.append(mirror)
+
+        healthy.sort(key=lambda mirror: mirror.latency or 0.0)
+        unhealthy.sort(key=lambda mirror: mirror.down_until)
+
+        return healthy + unhealthy
+
+    def select(self) -> Mirror:
+        return self.candidates()[0]
+
+    def on_success(self, mirror: Mirror, latency: float) -> None:
+        if mirror.latency is None:
+            mirror.latency = latency
+        else:
+            mirror.latency += self.alpha * (latency - mirror.latency)
+
+        mirror.failures = 0
+        mirror.down_until = 0.0
+
+    def on_failure(self, mirror: Mirror) -> None:
+        mirror.failures += 1
+        mirror.down_until = self.__clock() + self.cooldown
+
+
+def is_failover_error(kind: RequestKind, exc: BaseException) -> bool:
+    # The caller ran out of time, another mirror won't help
+    if isinstance(exc, DeadlineExceeded):
+        return False
+
+    if isinstance(exc, ClientResponseError):
+        if kind == 'write':
+            return exc.status in _UNPROCESSED_STATUSES
+
+        return exc.status >= 500
+
+    if kind == 'write':
+        # The request might have reached the server, a retry could
+        # create a duplicate page
+        return isinstance(exc, ClientConnectorError)
+
+    return isinstance(exc, (ClientConnectionError, asyncio.TimeoutError))
@@ -1,8 +1,149 @@
-from dataclasses import dataclass
+import hashlib
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Generic, Optional, TypeVar
 
+if TYPE_CHECKING:
+    from aiorentry.client import Client
 
-@dataclass
-class Page:
+T = TypeVar('T')
+
+DIGEST_SIZE = 16
+
+
+def new_digest() -> 'hashlib.blake2b':
+    return hashlib.blake2b(digest_size=DIGEST_SIZE)
+
+
+def content_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=DIGEST_SIZE).digest()
+
+
+class _BasePage:
+    # What mutable and frozen pages have in common. Equality and change
+    # detection use the digest of the text, which is kept after the text
+    # itself is dropped.
+    __slots__ = ()
+
+    url: str
+    edit_code: str
+    text: str | None
+    digest: bytes | None
+
+    def __post_init__(self) -> None:
+        # A digest passed together with the text could belong to another
+        # text, e.g. after dataclasses.replace()
+        if self.text is not None:
+            object.__setattr__(self, 'digest', content_digest(self.text))
+
+    def freeze(self) -> 'FrozenPage':
+        return FrozenPage(
+            url=self.url,
+            edit_code=self.edit_code,
+            text=self.text,
+            digest=self.digest,
+        )
+
+    def require_text(self) -> str:
+        if self.text is None:
+            raise ValueError(f'Text of page {self.url!r} is not loaded')
+
+        return self.text
+
+    def has_text(self, text: str) -> bool:
+        return self.digest == content_digest(text)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, _BasePage):
+            return NotImplemented
+
+        this = (self.url, self.edit_code, self.digest)
+
+        return this == (other.url, other.edit_code, other.digest)
+
+
+# Pages are kept in large numbers, so they are slotted and the text is
+# optional
+@dataclass(slots=True, eq=False)
+class Page(_BasePage):
     url: str
     edit_code: str
-    text: str
+    text: str | None = None
+    digest: bytes | None = field(
+        default=None,
+        kw_only=True,
+        compare=False,
+        repr=False,
+    )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+
+        # A new text gets a new digest. While __init__ runs, the digest is
+        # not set yet and __post_init__ computes it.
+        if name == 'text' and hasattr(self, 'digest'):
+            digest = None if value is None else content_digest(value)
+            object.__setattr__(self, 'digest', digest)
+
+    def drop_text(self) -> None:
+        # Keep the digest for change detection, but release the text
+        object.__setattr__(self, 'text', None)
+
+    async def load_text(
+        self,
+        client: 'Client',
+        secret_raw_access_code: Optional[str] = None,
+    ) -> str:
+        text = await client.raw(self.url, secret_raw_access_code)
+        self.text = text
+
+        return text
+
+
+@dataclass(slots=True, frozen=True, eq=False)
+class FrozenPage(_BasePage):
+    url: str
+    edit_code: str
+    text: str | None = None
+    digest: bytes | None = field(
+        default=None,
+        kw_only=True,
+        compare=False,
+        repr=False,
+    )
+
+    def __hash__(self) -> int:
+        return hash((self.url, self.edit_code))
+
+    async def load_text(
+        self,
+        client: 'Client',
+        secret_raw_access_code: Optional[str] = None,
+    ) -> str:
+        # The page can't be changed, so the text is returned but not kept
+        return await client.raw(self.url, secret_raw_access_code)
+
+
+@dataclass
+class BulkResult(Generic[T]):
+    index: int
+    item: Any
+    result: T | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def unwrap(self) -> T:
+        if self.error is not None:
+            raise self.error
+
+        return self.result  # type: ignore[return-value]
+
+
+@dataclass
+class EditResult:
+    page: Page
+    written: bool
@@ -0,0 +1,283 @@
+import asyncio
+import functools
+import time
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Callable, Type
+
+from aiohttp import ClientResponseError
+from typing_extensions import Self
+
+from aiorentry.bulk import DEFAULT_BULK_CONCURRENCY
+from aiorentry.circuit import CircuitOpenError, is_circuit_failure
+from aiorentry.client import Client
+from aiorentry.deadline import detach
+
+DEFAULT_PUBLISH_INTERVAL = 1.0
+DEFAULT_PUBLISH_RETRY_DELAY = 5.0
+
+
+class PublishError(Exception):
+    # Pages that could not be written by flush(), with the last error of
+    # each one
+
+    def __init__(self, errors: dict[str, Exception]):
+        super().__init__(f'{len(errors)} page(s) could not be written')
+        self.errors = errors
+
+
+def _is_transient(exc: Exception) -> bool:
+    # Errors after which the same write can succeed later
+    if isinstance(exc, CircuitOpenError):
+        return True
+
+    if isinstance(exc, ClientResponseError) and exc.status == 429:
+        return True
+
+    return is_circuit_failure(exc)
+
+
+@dataclass
+class PublisherStats:
+    published: int = 0
+    coalesced: int = 0
+    written: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    rescheduled: int = 0
+
+
+@dataclass
+class _PendingEdit:
+    edit_code: str
+    text: str
+    first_at: float
+    due_at: float
+
+
+# Write-behind publisher: edits are accepted without waiting for the
+# server and only the latest text of a page is uploaded.
+# By default a page is written at most once per ``interval``. With
+# ``debounce`` the write waits until no edits came for ``interval``,
+# but not longer than ``max_delay`` after the first pending one.
+# Writes that fail with a transient error are retried after
+# ``retry_delay``, unless a newer edit of the page has arrived.
+class EditPublisher:
+
+    def __init__(
+        self,
+        client: Client,
+        *,
+        interval: float = DEFAULT_PUBLISH_INTERVAL,
+        debounce: bool = False,
+        max_delay: float | None = None,
+        concurrency: int = DEFAULT_BULK_CONCURRENCY,
+        retry_delay: float = DEFAULT_PUBLISH_RETRY_DELAY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if interval < 0:
+            raise ValueError('interval must be non-negative')
+
+        if concurrency < 1:
+            raise ValueError('concurrency must be a positive number')
+
+        if retry_delay <= 0:
+            raise ValueError('retry_delay must be a positive number')
+
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.retry_delay = retry_delay
+        self.stats = PublisherStats()
+        # The last error of every page, until it's written successfully
+        self.errors: dict[str, Exception] = {}
+        self.__client = client
+        self.__clock = clock
+        self.__semaphore = asyncio.Semaphore(concurrency)
+        self.__pending: dict[str, _PendingEdit] = {}
+        self.__inflight: dict[str, asyncio.Task[Exception | None]] = {}
+        self.__written_at: dict[str, float] = {}
+        self.__wakeup = asyncio.Event()
+        self.__worker: asyncio.Task[None] | None = None
+        self.__closed = False
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Type[BaseException],
+        exc_value: BaseException,
+        traceback: TracebackType,
+    ) -> None:
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self.__pending) + len(self.__inflight)
+
+    def publish(self, text: str, *, url: str, edit_code: str) -> None:
+        if self.__closed:
+            raise RuntimeError('Publisher is closed')
+
+        now = self.__clock()
+        edit = self.__pending.get(url)
+        self.stats.published += 1
+
+        if edit is None:
+            edit = self.__pending[url] = _PendingEdit(
+                edit_code=edit_code,
+                text=text,
+                first_at=now,
+                due_at=self.__next_write_at(url, now),
+            )
+        else:
+            self.stats.coalesced += 1
+            edit.edit_code = edit_code
+            edit.text = text
+
+        if self.debounce:
+            edit.due_at = now + self.interval
+
+            if self.max_delay is not None:
+                edit.due_at = min(edit.due_at, edit.first_at + self.max_delay)
+
+        if self.__worker is None:
+            self.__worker = detach(self.__run())
+
+        self.__wakeup.set()
+
+    def __next_write_at(self, url: str, now: float) -> float:
+        written_at = self.__written_at.get(url)
+
+        if written_at is None:
+            return now
+
+        return max(now, written_at + self.interval)
+
+    async def flush(self) -> None:
+        # Writes everything that is pending right away. Every page is
+        # tried once: pages that failed stay pending for a later retry
+        # and are reported by PublishError.
+        failed: dict[str, Exception] = {}
+
+        while True:
+            for url, edit in self.__pending.items():
+                if url not in failed:
+                    edit.due_at = 0.0
+
+            self.__start_due()
+            inflight = dict(self.__inflight)
+
+            if not inflight:
+                break
+
+            await asyncio.wait(inflight.values())
+
+            for url, task in inflight.items():
+                error = task.result()
+
+                if error is None:
+                    failed.pop(url, None)
+                else:
+                    failed[url] = error
+
+        if failed:
+            raise PublishError(failed)
+
+    async def close(self) -> None:
+        self.__closed = True
+
+        try:
+            await self.flush()
+        finally:
+            worker = self.__worker
+            self.__worker = None
+
+            # The worker sees the closed flag and exits. Cancelling it
+            # instead could be lost inside asyncio.wait_for().
+            if worker is not None:
+                self.__wakeup.set()
+                await worker
+
+    async def __run(self) -> None:
+        while not self.__closed:
+            self.__wakeup.clear()
+            next_due = self.__start_due()
+
+            if next_due is None:
+                await self.__wakeup.wait()
+
+                continue
+
+            timeout = max(next_due - self.__clock(), 0.0)
+
+            try:
+                await asyncio.wait_for(self.__wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def __start_due(self) -> float | None:
+        # Starts writes that are due and returns when the next one is due.
+        # A page with a write in flight waits for it to finish.
+        now = self.__clock()
+        next_due = None
+
+        for url, edit in list(self.__pending.items()):
+            if url in self.__inflight:
+                continue
+
+            if edit.due_at > now:
+                if next_due is None or edit.due_at < next_due:
+                    next_due = edit.due_at
+
+                continue
+
+            del self.__pending[url]
+            self.__written_at[url] = now
+            task = detach(self.__write(url, edit))
+            self.__inflight[url] = task
+            task.add_done_callback(functools.partial(self.__done, url))
+
+        return next_due
+
+    def __done(
+        self,
+        url: str,
+        task: asyncio.Task[Exception | None],
+    ) -> None:
+        del self.__inflight[url]
+        self.__wakeup.set()
+
+    async def __write(
+        self,
+        url: str,
+        edit: _PendingEdit,
+    ) -> Exception | None:
+        # Returns the error, when the page could not be written
+        async with self.__semaphore:
+            try:
+                result = await self.__client.edit_page_if_changed(
+                    edit.text,
+                    url=url,
+                    edit_code=edit.edit_code,
+                )
+            except Exception as exc:  # noqa: B902
+                self.stats.failed += 1
+                self.errors[url] = exc
+
+                # A newer edit replaces the failed one
+                if _is_transient(exc) and url not in self.__pending:
+                    self.stats.rescheduled += 1
+                    edit.due_at = self.__clock() + self.retry_delay
+                    self.__pending[url] = edit
+
+                return exc
+
+        self.errors.pop(url, None)
+
+        if result.written:
+            self.stats.written += 1
+        else:
+            self.stats.unchanged += 1
+
+        return None
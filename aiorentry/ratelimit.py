@@ -0,0 +1,166 @@
+import asyncio
+import math
+import time
+from typing import Callable, Literal, Protocol
+
+RequestKind = Literal['read', 'write']
+
+DEFAULT_READ_RATE = 10.0
+DEFAULT_WRITE_RATE = 2.0
+
+
+class TokenBucket:
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError('rate must be a positive number')
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.__clock = clock
+        self.__tokens = self.capacity
+        self.__updated_at = clock()
+        self.__paused_until = 0.0
+        self.__lock = asyncio.Lock()
+
+    @property
+    def tokens(self) -> float:
+        self.__refill(self.__clock())
+
+        return self.__tokens
+
+    def __refill(self, now: float) -> None:
+        elapsed = max(now - self.__updated_at, 0.0)
+        self.__tokens = min(self.capacity, self.__tokens + elapsed * self.rate)
+        self.__updated_at = now
+
+    def delay(self) -> float:
+        now = self.__clock()
+
+        if now < self.__paused_until:
+            return self.__paused_until - now
+
+        self.__refill(now)
+
+        if self.__tokens >= 1:
+            return 0.0
+
+        return (1 - self.__tokens) / self.rate
+
+    async def acquire(self) -> None:
+        # The lock makes waiters queue up in FIFO order instead of
+        # waking up together and fighting for the same token
+        async with self.__lock:
+            while (delay := self.delay()) > 0:
+                await asyncio.sleep(delay)
+
+            self.__tokens -= 1
+
+    def try_acquire(self) -> bool:
+        if self.__lock.locked() or self.delay() > 0:
+            return False
+
+        self.__tokens -= 1
+
+        return True
+
+    def pause(self, seconds: float) -> None:
+        self.__paused_until = max(
+            self.__paused_until,
+            self.__clock() + seconds,
+        )
+
+
+class RateLimiter(Protocol):
+
+    async def acquire(self, kind: RequestKind) -> None:
+        ...
+
+    def on_success(self, kind: RequestKind) -> None:
+        ...
+
+    def on_throttled(
+        self,
+        kind: RequestKind,
+        retry_after: float | None,
+    ) -> None:
+        ...
+
+
+class AdaptiveRateLimiter:
+    # A rate of None leaves that kind of requests unlimited
+
+    def __init__(
+        self,
+        read_rate: float | None = DEFAULT_READ_RATE,
+        write_rate: float | None = DEFAULT_WRITE_RATE,
+        *,
+        burst: float | None = None,
+        min_rate_ratio: float = 0.1,
+        decrease_factor: float = 0.5,
+        increase_ratio: float = 0.05,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not 0 < decrease_factor < 1:
+            raise ValueError('decrease_factor must be between 0 and 1')
+
+        rates: dict[RequestKind, float | None] = {
+            'read': read_rate,
+            'write': write_rate,
+        }
+        self.max_rates: dict[RequestKind, float] = {
+            kind: rate for kind, rate in rates.items() if rate is not None
+        }
+        self.buckets: dict[RequestKind, TokenBucket] = {
+            kind: TokenBucket(rate, burst, clock=clock)
+            for kind, rate in self.max_rates.items()
+        }
+        self.__min_rate_ratio = min_rate_ratio
+        self.__decrease_factor = decrease_factor
+        self.__increase_ratio = increase_ratio
+
+    def rate(self, kind: RequestKind) -> float:
+        bucket = self.buckets.get(kind)
+
+        return bucket.rate if bucket is not None else math.inf
+
+    async def acquire(self, kind: RequestKind) -> None:
+        bucket = self.buckets.get(kind)
+
+        if bucket is not None:
+            await bucket.acquire()
+
+    def on_success(self, kind: RequestKind) -> None:
+        if kind not in self.buckets:
+            return
+
+        # Additive increase: probe back towards the configured rate
+        bucket = self.buckets[kind]
+        max_rate = self.max_rates[kind]
+        bucket.rate = min(
+            max_rate,
+            bucket.rate + max_rate * self.__increase_ratio,
+        )
+
+    def on_throttled(
+        self,
+        kind: RequestKind,
+        retry_after: float | None,
+    ) -> None:
+        if kind not in self.buckets:
+            return
+
+        # Multiplicative decrease: back off quickly once the server
+        # starts pushing back
+        bucket = self.buckets[kind]
+        min_rate = self.max_rates[kind] * self.__min_rate_ratio
+        bucket.rate = max(min_rate, bucket.rate * self.__decrease_factor)
+
+        if retry_after is not None:
+            bucket.pause(retry_after)
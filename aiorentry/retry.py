@@ -0,0 +1,110 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Mapping
+
+RETRY_AFTER_HEADER_NAME = 'Retry-After'
+THROTTLING_STATUSES = frozenset({429, 503})
+
+
+def parse_retry_after(
+    headers: Mapping[str, str] | None,
+    *,
+    now: Callable[[], float] = time.time,
+) -> float | None:
+    if not headers:
+        return None
+
+    value = headers.get(RETRY_AFTER_HEADER_NAME)
+
+    if value is None:
+        return None
+
+    value = value.strip()
+
+    if value.isdigit():
+        return float(value)
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(date.timestamp() - now(), 0.0)
+
+
+class RetryBudget:
+
+    def __init__(
+        self,
+        ratio: float = 0.2,
+        min_retries: int = 10,
+        max_tokens: float = 100.0,
+    ):
+        self.__ratio = ratio
+        self.__max_tokens = max(max_tokens, min_retries)
+        self.__tokens = float(min_retries)
+
+    @property
+    def tokens(self) -> float:
+        return self.__tokens
+
+    def deposit(self) -> None:
+        self.__tokens = min(self.__max_tokens, self.__tokens + self.__ratio)
+
+    def withdraw(self) -> bool:
+        if self.__tokens < 1:
+            return False
+
+        self.__tokens -= 1
+
+        return True
+
+
+class RetryPolicy:
+
+    def __init__(
+        self,
+        max_attempts: int = 4,
+        *,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        statuses: frozenset[int] = THROTTLING_STATUSES,
+        budget: RetryBudget | None = None,
+    ):
+        if max_attempts < 1:
+            raise ValueError('max_attempts must be a positive number')
+
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = statuses
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def on_request(self) -> None:
+        self.budget.deposit()
+
+    def next_delay(
+        self,
+        attempt: int,
+        retry_after: float | None = None,
+    ) -> float | None:
+        # ``attempt`` is the number of the failed attempt, starting from 1.
+        # Returns None, when the request shouldn't be retried anymore.
+        if attempt >= self.max_attempts:
+            return None
+
+        if retry_after is not None and retry_after > self.max_delay:
+            return None
+
+        if not self.budget.withdraw():
+            return None
+
+        # "Full jitter" exponential backoff
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(0, backoff)
+
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+
+        return delay
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Callable, Coroutine, Generic, Hashable, TypeVar
+
+from aiorentry.deadline import detach
+
+K = TypeVar('K', bound=Hashable)
+T = TypeVar('T')
+
+
+class SingleFlight(Generic[K, T]):
+
+    def __init__(self) -> None:
+        self.__calls: dict[K, asyncio.Task[T]] = {}
+
+    def __len__(self) -> int:
+        return len(self.__calls)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self.__calls
+
+    async def do(
+        self,
+        key: K,
+        func: Callable[[], Coroutine[Any, Any, T]],
+    ) -> T:
+        task = self.__calls.get(key)
+
+        if task is None:
+            task = detach(func())
+            self.__calls[key] = task
+            task.add_done_callback(lambda done: self.__forget(key, done))
+
+        # Shielded, so a cancelled waiter doesn't cancel the shared call
+        # for everybody else
+        return await asyncio.shield(task)
+
+    async def cancel(self) -> None:
+        tasks = list(self.__calls.values())
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def __forget(self, key: K, task: asyncio.Task[T]) -> None:
+        if self.__calls.get(key) is task:
+            del self.__calls[key]
+
+        if not task.cancelled():
+            # Mark the exception as retrieved, even if every waiter has
+            # been cancelled in the meantime
+            task.exception()
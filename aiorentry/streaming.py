@@ -0,0 +1,288 @@
+import codecs
+import json
+import re
+from typing import Any
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_SPECIAL_CHARS = re.compile(r'["\\]')
+_WHITESPACE = ' \t\n\r'
+_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    '/': '/',
+    'b': '\b',
+    'f': '\f',
+    'n': '\n',
+    'r': '\r',
+    't': '\t',
+}
+
+# Parser states
+_START = 0
+_KEY_OR_END = 1
+_KEY_START = 2
+_KEY = 3
+_COLON = 4
+_VALUE = 5
+_STRING = 6
+_STREAMED_STRING = 7
+_SCALAR = 8
+_AFTER_VALUE = 9
+_DONE = 10
+
+_SKIP_WHITESPACE = frozenset({
+    _START,
+    _KEY_OR_END,
+    _KEY_START,
+    _COLON,
+    _VALUE,
+    _AFTER_VALUE,
+    _DONE,
+})
+
+
+class EnvelopeError(ValueError):
+    pass
+
+
+# Incremental parser for JSON objects like the rentry API replies.
+# The string value of ``field`` is returned piece by piece from ``feed()``
+# instead of being kept in memory. All other (small) values are collected
+# into ``fields``.
+class EnvelopeParser:
+
+    def __init__(self, field: str = 'content'):
+        self.field = field
+        self.fields: dict[str, Any] = {}
+        self.field_seen = False
+        self.__decoder = codecs.getincrementaldecoder('utf-8')()
+        self.__buffer = ''
+        self.__state = _START
+        self.__key = ''
+        self.__parts: list[str] = []
+        self.__depth = 0
+        self.__in_string = False
+        self.__escaped = False
+
+    @property
+    def done(self) -> bool:
+        return self.__state == _DONE
+
+    def feed(self, data: bytes) -> str:
+        self.__buffer += self.__decoder.decode(data)
+
+        return self.__parse()
+
+    def close(self) -> str:
+        self.__buffer += self.__decoder.decode(b'', final=True)
+        text = self.__parse()
+
+        if self.__state != _DONE or self.__buffer:
+            raise EnvelopeError('Unexpected end of data')
+
+        return text
+
+    def __parse(self) -> str:
+        buf = self.__buffer
+        size = len(buf)
+        pos = 0
+        out: list[str] = []
+
+        while pos < size:
+            state = self.__state
+            char = buf[pos]
+
+            if state in _SKIP_WHITESPACE and char in _WHITESPACE:
+                pos += 1
+
+                continue
+
+            if state == _START:
+                self.__expect(char, '{')
+                self.__state = _KEY_OR_END
+                pos += 1
+            elif state in (_KEY_OR_END, _KEY_START):
+                if char == '}' and state == _KEY_OR_END:
+                    self.__state = _DONE
+                else:
+                    self.__expect(char, '"')
+                    self.__parts = []
+                    self.__state = _KEY
+
+                pos += 1
+            elif state == _COLON:
+                self.__expect(char, ':')
+                self.__state = _VALUE
+                pos += 1
+            elif state == _VALUE:
+                if char == '"':
+                    pos += 1
+                    self.__parts = []
+
+                    if self.__key == self.field and not self.field_seen:
+                        self.__state = _STREAMED_STRING
+                    else:
+                        self.__state = _STRING
+                else:
+                    self.__parts = []
+                    self.__depth = 0
+                    self.__state = _SCALAR
+            elif state in (_KEY, _STRING, _STREAMED_STRING):
+                sink = out if state == _STREAMED_STRING else self.__parts
+                pos, finished = self.__scan_string(buf, pos, sink)
+
+                if not finished:
+                    break
+
+                if state == _KEY:
+                    self.__key = ''.join(self.__parts)
+                    self.__state = _COLON
+                elif state == _STRING:
+                    self.fields[self.__key] = ''.join(self.__parts)
+                    self.__state = _AFTER_VALUE
+                else:
+                    self.field_seen = True
+                    self.__state = _AFTER_VALUE
+            elif state == _SCALAR:
+                pos = self.__scan_scalar(buf, pos)
+            elif state == _AFTER_VALUE:
+                if char == ',':
+                    self.__state = _KEY_START
+                else:
+                    self.__expect(char, '}')
+                    self.__state = _DONE
+
+                pos += 1
+            else:
+                raise EnvelopeError(f'Unexpected data after the end: {char!r}')
+
+        self.__buffer = buf[pos:]
+
+        return ''.join(out)
+
+    def __expect(self, char: str, expected: str) -> None:
+        if char != expected:
+            raise EnvelopeError(f'Expected {expected!r}, got {char!r}')
+
+    def __scan_string(
+        self,
+        buf: str,
+        pos: int,
+        sink: list[str],
+    ) -> tuple[int, bool]:
+        size = len(buf)
+
+        while True:
+            match = _SPECIAL_CHARS.search(buf, pos)
+
+            if match is None:
+                if pos < size:
+                    sink.append(buf[pos:])
+
+                return size, False
+
+            index = match.start()
+
+            if index > pos:
+                sink.append(buf[pos:index])
+
+            if buf[index] == '"':
+                return index + 1, True
+
+            char, length = _unescape(buf, index)
+
+            if char is None:
+                # The escape sequence continues in the next chunk
+                return index, False
+
+            sink.append(char)
+            pos = index + length
+
+    def __scan_scalar(self, buf: str, pos: int) -> int:
+        start = pos
+        size = len(buf)
+
+        while pos < size:
+            char = buf[pos]
+
+            if self.__in_string:
+                if self.__escaped:
+                    self.__escaped = False
+                elif char == '\\':
+                    self.__escaped = True
+                elif char == '"':
+                    self.__in_string = False
+            elif char == '"':
+                self.__in_string = True
+            elif char in '{[':
+                self.__depth += 1
+            elif char in '}]' and self.__depth:
+                self.__depth -= 1
+            elif self.__depth == 0 and (char in ',}' or char in _WHITESPACE):
+                self.__parts.append(buf[start:pos])
+
+                try:
+                    value = json.loads(''.join(self.__parts))
+                except ValueError as exc:
+                    raise EnvelopeError(str(exc)) from exc
+
+                self.fields[self.__key] = value
+                self.__state = _AFTER_VALUE
+
+                return pos
+
+            pos += 1
+
+        self.__parts.append(buf[start:pos])
+
+        return pos
+
+
+def _unescape(buf: str, index: int) -> tuple[str | None, int]:
+    size = len(buf)
+
+    if index + 1 >= size:
+        return None, 0
+
+    escape = buf[index + 1]
+
+    if escape != 'u':
+        char = _ESCAPES.get(escape)
+
+        if char is None:
+            raise EnvelopeError(f'Invalid escape sequence: \\{escape}')
+
+        return char, 2
+
+    if index + 6 > size:
+        return None, 0
+
+    code = _hex(buf[index + 2:index + 6])
+
+    if not 0xD800 <= code < 0xDC00:
+        return chr(code), 6
+
+    # A high surrogate, probably followed by the low one
+    if index + 8 > size:
+        return None, 0
+
+    if buf[index + 6:index + 8] != '\\u':
+        return chr(code), 6
+
+    if index + 12 > size:
+        return None, 0
+
+    low = _hex(buf[index + 8:index + 12])
+
+    if not 0xDC00 <= low < 0xE000:
+        return chr(code), 6
+
+    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), 12
+
+
+def _hex(value: str) -> int:
+    try:
+        return int(value, 16)
+    except ValueError as exc:
+        raise EnvelopeError(f'Invalid escape sequence: \\u{value}') from exc
@@ -0,0 +1,466 @@
+import argparse
+import asyncio
+import dataclasses
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Literal, Sequence
+
+from aiorentry.bulk import DEFAULT_BULK_CONCURRENCY, bounded_map
+from aiorentry.client import Client
+from aiorentry.models import new_digest
+from aiorentry.streaming import DEFAULT_CHUNK_SIZE
+
+DEFAULT_MANIFEST_NAME = '.aiorentry-sync.db'
+DEFAULT_PATTERN = '**/*.md'
+
+SyncAction = Literal['create', 'edit', 'delete']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_manifest (
+    path TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    edit_code TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+"""
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    url: str
+    edit_code: str
+    digest: bytes
+    size: int
+    mtime_ns: int
+
+
+class SyncManifest:
+    # Published files, keyed by their path relative to the synced
+    # directory. Every finished change is committed right away, so an
+    # interrupted sync continues where it stopped.
+
+    def __init__(self, path: str | Path, *, timeout: float = 5.0):
+        self.path = Path(path)
+        self.__lock = threading.Lock()
+        self.__db = sqlite3.connect(
+            self.path,
+            timeout=timeout,
+            isolation_level='IMMEDIATE',
+            check_same_thread=False,
+        )
+        self.__db.execute('PRAGMA journal_mode=WAL')
+        self.__db.execute('PRAGMA synchronous=NORMAL')
+        self.__db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__db.close()
+
+    def __len__(self) -> int:
+        with self.__lock:
+            row = self.__db.execute(
+                'SELECT COUNT(*) FROM sync_manifest',
+            ).fetchone()
+
+        return int(row[0])
+
+    def get(self, path: str) -> ManifestEntry | None:
+        with self.__lock:
+            row = self.__db.execute(
+                """
+                SELECT path, url, edit_code, digest, size, mtime_ns
+                FROM sync_manifest WHERE path = ?
+                """,
+                (path,),
+            ).fetchone()
+
+        return None if row is None else ManifestEntry(*row)
+
+    def load(self) -> dict[str, ManifestEntry]:
+        with self.__lock:
+            rows = self.__db.execute(
+                """
+                SELECT path, url, edit_code, digest, size, mtime_ns
+                FROM sync_manifest
+                """,
+            ).fetchall()
+
+        return {row[0]: ManifestEntry(*row) for row in rows}
+
+    def set(self, entry: ManifestEntry) -> None:
+        self.set_many([entry])
+
+    def set_many(self, entries: Iterable[ManifestEntry]) -> None:
+        with self.__lock, self.__db:
+            self.__db.executemany(
+                """
+                INSERT OR REPLACE INTO sync_manifest (
+                    path, url, edit_code, digest, size, mtime_ns
+                ) VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [dataclasses.astuple(entry) for entry in entries],
+            )
+
+    def delete(self, path: str) -> None:
+        with self.__lock, self.__db:
+            self.__db.execute(
+                'DELETE FROM sync_manifest WHERE path = ?',
+                (path,),
+            )
+
+
+@dataclass
+class SyncChange:
+    action: SyncAction
+    path: str
+    # Unknown until a new page is created
+    url: str | None = None
+    edit_code: str | None = None
+    size: int = 0
+    mtime_ns: int = 0
+
+
+@dataclass
+class SyncPlan:
+    changes: list[SyncChange] = field(default_factory=list)
+    # Files with a new mtime, but the same content
+    touched: list[ManifestEntry] = field(default_factory=list)
+    scanned: int = 0
+    unchanged: int = 0
+
+
+@dataclass
+class SyncStats:
+    scanned: int = 0
+    unchanged: int = 0
+    created: int = 0
+    edited: int = 0
+    deleted: int = 0
+    # Pages of deleted files that were already gone
+    missing: int = 0
+    failed: int = 0
+
+
+@dataclass
+class SyncReport:
+    stats: SyncStats = field(default_factory=SyncStats)
+    applied: list[SyncChange] = field(default_factory=list)
+    errors: dict[str, Exception] = field(default_factory=dict)
+
+
+def file_digest(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+    digest = new_digest()
+
+    with open(path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+
+    return digest.digest()
+
+
+def scan_directory(
+    root: str | Path,
+    entries: dict[str, ManifestEntry],
+    *,
+    pattern: str = DEFAULT_PATTERN,
+    delete: bool = True,
+    exclude: Iterable[Path] = (),
+) -> SyncPlan:
+    # Files with the size and mtime recorded in the manifest are not read
+    # at all, the rest is hashed and compared with the recorded digest
+    root = Path(root)
+    excluded = {path.resolve() for path in exclude}
+    plan = SyncPlan()
+    seen = set()
+
+    for path in sorted(root.glob(pattern)):
+        if not path.is_file() or path.resolve() in excluded:
+            continue
+
+        name = path.relative_to(root).as_posix()
+        stat = path.stat()
+        entry = entries.get(name)
+        seen.add(name)
+        plan.scanned += 1
+
+        if entry is not None:
+            recorded = (entry.size, entry.mtime_ns)
+
+            if recorded == (stat.st_size, stat.st_mtime_ns):
+                plan.unchanged += 1
+
+                continue
+
+            if entry.digest == file_digest(path):
+                plan.unchanged += 1
+                plan.touched.append(
+                    dataclasses.replace(
+                        entry,
+                        size=stat.st_size,
+                        mtime_ns=stat.st_mtime_ns,
+                    ),
+                )
+
+                continue
+
+        plan.changes.append(
+            SyncChange(
+                action='create' if entry is None else 'edit',
+                path=name,
+                url=None if entry is None else entry.url,
+                edit_code=None if entry is None else entry.edit_code,
+                size=stat.st_size,
+                mtime_ns=stat.st_mtime_ns,
+            ),
+        )
+
+    if delete:
+        for name, entry in sorted(entries.items()):
+            if name not in seen:
+                plan.changes.append(
+                    SyncChange(
+                        action='delete',
+                        path=name,
+                        url=entry.url,
+                        edit_code=entry.edit_code,
+                    ),
+                )
+
+    return plan
+
+
+async def apply_sync(
+    client: Client,
+    root: str | Path,
+    manifest: SyncManifest,
+    plan: SyncPlan,
+    *,
+    concurrency: int = DEFAULT_BULK_CONCURRENCY,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> SyncReport:
+    root = Path(root)
+    report = SyncReport(
+        stats=SyncStats(scanned=plan.scanned, unchanged=plan.unchanged),
+    )
+
+    if plan.touched:
+        await asyncio.to_thread(manifest.set_many, plan.touched)
+
+    missing: set[str] = set()
+
+    async def apply(change: SyncChange) -> SyncChange:
+        if change.action == 'delete':
+            assert change.url is not None and change.edit_code is not None
+
+            deleted = await client.delete_page(
+                url=change.url,
+                edit_code=change.edit_code,
+            )
+
+            # The page is gone or its edit code has been changed, either
+            # way the entry can't be used anymore
+            if not deleted:
+                missing.add(change.path)
+
+            await asyncio.to_thread(manifest.delete, change.path)
+
+            return change
+
+        if change.action == 'create':
+            page = await client.new_page_from(
+                root / change.path,
+                chunk_size=chunk_size,
+            )
+        else:
+            assert change.url is not None and change.edit_code is not None
+
+            page = await client.edit_page_from(
+                root / change.path,
+                url=change.url,
+                edit_code=change.edit_code,
+                chunk_size=chunk_size,
+            )
+
+        assert page.digest is not None
+
+        # The digest of what has actually been sent, the file could have
+        # changed since the scan
+        entry = ManifestEntry(
+            path=change.path,
+            url=page.url,
+            edit_code=page.edit_code,
+            digest=page.digest,
+            size=change.size,
+            mtime_ns=change.mtime_ns,
+        )
+        await asyncio.to_thread(manifest.set, entry)
+        change.url = page.url
+        change.edit_code = page.edit_code
+
+        return change
+
+    async for result in bounded_map(
+        apply,
+        plan.changes,
+        concurrency=concurrency,
+        ordered=False,
+    ):
+        change = result.item
+
+        if result.error is not None:
+            report.stats.failed += 1
+            report.errors[change.path] = result.error
+
+            continue
+
+        report.applied.append(change)
+
+        if change.action == 'create':
+            report.stats.created += 1
+        elif change.action == 'edit':
+            report.stats.edited += 1
+        elif change.path in missing:
+            report.stats.missing += 1
+        else:
+            report.stats.deleted += 1
+
+    return report
+
+
+async def sync_directory(
+    client: Client,
+    root: str | Path,
+    manifest: SyncManifest,
+    *,
+    pattern: str = DEFAULT_PATTERN,
+    delete: bool = True,
+    concurrency: int = DEFAULT_BULK_CONCURRENCY,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> SyncReport:
+    entries = await asyncio.to_thread(manifest.load)
+    plan = await asyncio.to_thread(
+        scan_directory,
+        root,
+        entries,
+        pattern=pattern,
+        delete=delete,
+        exclude=[manifest.path],
+    )
+
+    return await apply_sync(
+        client,
+        root,
+        manifest,
+        plan,
+        concurrency=concurrency,
+        chunk_size=chunk_size,
+    )
+
+
+def _write(line: str = '') -> None:
+    sys.stdout.write(f'{line}\n')
+
+
+async def _sync(args: argparse.Namespace) -> int:
+    root = Path(args.root)
+    manifest = SyncManifest(args.manifest or root / DEFAULT_MANIFEST_NAME)
+
+    try:
+        if args.dry_run:
+            plan = scan_directory(
+                root,
+                manifest.load(),
+                pattern=args.pattern,
+                delete=args.delete,
+                exclude=[manifest.path],
+            )
+
+            for change in plan.changes:
+                _write(f'{change.action:<8}{change.path}')
+
+            _write(
+                f'scanned={plan.scanned} unchanged={plan.unchanged} '
+                f'changes={len(plan.changes)}',
+            )
+
+            return 0
+
+        async with Client(args.base_url) as client:
+            report = await sync_directory(
+                client,
+                root,
+                manifest,
+                pattern=args.pattern,
+                delete=args.delete,
+                concurrency=args.concurrency,
+            )
+    finally:
+        manifest.close()
+
+    for change in report.applied:
+        _write(f'{change.action:<8}{change.path} {change.url}')
+
+    for path, error in report.errors.items():
+        _write(f'{"failed":<8}{path}: {error!r}')
+
+    stats = report.stats
+    _write(
+        f'scanned={stats.scanned} unchanged={stats.unchanged} '
+        f'created={stats.created} edited={stats.edited} '
+        f'deleted={stats.deleted} missing={stats.missing} '
+        f'failed={stats.failed}',
+    )
+
+    return 1 if stats.failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m aiorentry.sync',
+        description='Publish a directory of markdown files to rentry',
+    )
+    parser.add_argument('root', help='Directory to publish')
+    parser.add_argument(
+        '--manifest',
+        default=None,
+        help=f'Manifest path (default: ROOT/{DEFAULT_MANIFEST_NAME})',
+    )
+    parser.add_argument(
+        '--pattern',
+        default=DEFAULT_PATTERN,
+        help='Glob pattern of published files, relative to ROOT',
+    )
+    parser.add_argument('--base-url', default=None)
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_BULK_CONCURRENCY,
+    )
+    parser.add_argument(
+        '--no-delete',
+        dest='delete',
+        action='store_false',
+        help='Keep the pages of removed files',
+    )
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Only list the changes',
+    )
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    sys.exit(asyncio.run(_sync(args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,458 @@
+import asyncio
+import json
+import math
+import random
+import re
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from aiohttp import web
+from typing_extensions import Self
+from yarl import URL
+
+from aiorentry.client import (
+    CSRF_COOKIE_NAME, CSRF_POST_BODY_NAME, SECRET_RAW_ACCESS_CODE_HEADER_NAME,
+)
+from aiorentry.models import Page
+from aiorentry.ratelimit import TokenBucket
+from aiorentry.retry import RETRY_AFTER_HEADER_NAME
+from aiorentry.transport import MemoryRequest, MemoryResponse, MemoryTransport
+
+# rentry.co rejects longer texts
+DEFAULT_MAX_PAGE_SIZE = 200_000
+
+RouteHandler = Callable[..., Awaitable[MemoryResponse]]
+
+
+def _random_string() -> str:
+    return uuid.uuid4().hex
+
+
+def _json_response(data: dict[str, Any]) -> MemoryResponse:
+    return MemoryResponse(
+        headers={'Content-Type': 'application/json'},
+        body=json.dumps(data).encode(),
+    )
+
+
+@dataclass
+class _Route:
+    method: str
+    canonical: str
+    handler: RouteHandler
+    pattern: 're.Pattern[str]' = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.pattern = re.compile(
+            re.sub(r'\{(\w+)\}', r'(?P<\1>[^/]+)', self.canonical),
+        )
+
+
+class PageRegistry:
+
+    def __init__(self) -> None:
+        self.__pages: dict[str, Page] = {}
+
+    def __len__(self) -> int:
+        return len(self.__pages)
+
+    def exists(self, url: str) -> bool:
+        return url in self.__pages
+
+    def get(self, url: str) -> Page:
+        if url not in self.__pages:
+            raise ValueError
+
+        return self.__pages[url]
+
+    def add(self, page: Page) -> None:
+        if page.url in self.__pages:
+            raise ValueError
+
+        self.__pages[page.url] = page
+
+    def update(self, page: Page) -> None:
+        if page.url not in self.__pages:
+            raise ValueError
+
+        self.__pages[page.url] = page
+
+    def delete(self, url: str) -> None:
+        if url not in self.__pages:
+            raise ValueError
+
+        del self.__pages[url]
+
+
+class CSRFTokenRegistry:
+
+    def __init__(self) -> None:
+        self.__tokens: set[str] = set()
+        self.issued = 0
+
+    def issue(self) -> str:
+        token = _random_string()
+        self.__tokens.add(token)
+        self.issued += 1
+
+        return token
+
+    def is_valid(self, token: str) -> bool:
+        return token in self.__tokens
+
+    def revoke_all(self) -> None:
+        self.__tokens.clear()
+
+
+# A local stand-in for the rentry API, for tests and benchmarks.
+# ``latency`` (plus up to ``jitter``) is added to every request,
+# ``error_rate`` of requests fail with ``error_status`` and requests over
+# ``rate_limit`` per second are rejected with 429 and a Retry-After header.
+# Requests are handled by ``handle()``, which is served over HTTP by
+# ``start()``, or in the same process by ``transport()``.
+class FakeRentryServer:
+
+    def __init__(
+        self,
+        *,
+        raw_access_code: str | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        rate_limit: float | None = None,
+        burst: float | None = None,
+        max_page_size: int | None = DEFAULT_MAX_PAGE_SIZE,
+        seed: int | None = None,
+    ):
+        if latency < 0 or jitter < 0:
+            raise ValueError('latency must be non-negative')
+
+        if not 0 <= error_rate <= 1:
+            raise ValueError('error_rate must be between 0 and 1')
+
+        if raw_access_code is None:
+            raw_access_code = _random_string()
+
+        self.raw_access_code = raw_access_code
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_page_size = max_page_size
+        self.pages = PageRegistry()
+        self.csrf_tokens = CSRFTokenRegistry()
+        self.hits: Counter[str] = Counter()
+        # (status, headers) responses returned instead of the next requests
+        self.faults: deque[tuple[int, dict[str, str]]] = deque()
+        self.__bucket = (
+            TokenBucket(rate_limit, burst) if rate_limit is not None else None
+        )
+        self.__random = random.Random(seed)
+        self.__routes = [
+            _Route('GET', '/', self.__index),
+            _Route('POST', '/api/new', self.__new),
+            _Route('POST', '/api/edit/{url}', self.__edit),
+            _Route('POST', '/api/delete/{url}', self.__delete),
+            _Route('GET', '/api/raw/{url}', self.__raw),
+        ]
+        self.__runner: web.AppRunner | None = None
+        self.__url: URL | None = None
+        self.app = self.create_app()
+
+    async def __aenter__(self) -> Self:
+        await self.start()
+
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.close()
+
+    @property
+    def url(self) -> URL:
+        if self.__url is None:
+            raise RuntimeError('Server is not started')
+
+        return self.__url
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> URL:
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+
+        self.__runner = runner
+        _, bound_port = runner.addresses[0][:2]
+        self.__url = URL.build(scheme='http', host=host, port=bound_port)
+
+        return self.__url
+
+    async def close(self) -> None:
+        if self.__runner is not None:
+            await self.__runner.cleanup()
+            self.__runner = None
+            self.__url = None
+
+    def transport(self) -> MemoryTransport:
+        # Serves a client in the same process, without sockets
+        return MemoryTransport(self.handle)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/{path:.*}', self.__serve)
+
+        return app
+
+    async def __serve(self, request: web.Request) -> web.Response:
+        form = {}
+
+        if request.method == 'POST':
+            form = {
+                key: value
+                for key, value in (await request.post()).items()
+                if isinstance(value, str)
+            }
+
+        response = await self.handle(
+            MemoryRequest(
+                method=request.method,
+                url=request.url,
+                headers=request.headers,
+                cookies=dict(request.cookies),
+                form=form,
+            ),
+        )
+        result = web.Response(
+            status=response.status,
+            headers=response.headers,
+            body=response.body,
+        )
+
+        for name, value in response.cookies.items():
+            result.set_cookie(name, value)
+
+        return result
+
+    def __resolve(self, request: MemoryRequest) -> _Route | None:
+        for route in self.__routes:
+            if route.pattern.fullmatch(request.url.path):
+                return route
+
+        return None
+
+    async def handle(self, request: MemoryRequest) -> MemoryResponse:
+        route = self.__resolve(request)
+        self.hits[route.canonical if route else request.url.path] += 1
+
+        await self.__delay()
+
+        if response := self.__throttle() or self.__inject_faults():
+            return response
+
+        if route is None:
+            return MemoryResponse(status=404)
+
+        # Like aiohttp, GET routes answer HEAD requests as well
+        method = 'GET' if request.method == 'HEAD' else request.method
+
+        if method != route.method:
+            return MemoryResponse(status=405)
+
+        match = route.pattern.fullmatch(request.url.path)
+        assert match is not None
+
+        return await route.handler(request, **match.groupdict())
+
+    async def __delay(self) -> None:
+        delay = self.latency
+
+        if self.jitter:
+            delay += self.__random.uniform(0, self.jitter)
+
+        if delay:
+            await asyncio.sleep(delay)
+
+    def __throttle(self) -> MemoryResponse | None:
+        bucket = self.__bucket
+
+        if bucket is not None and not bucket.try_acquire():
+            retry_after = max(math.ceil(bucket.delay()), 1)
+
+            return MemoryResponse(
+                status=429,
+                headers={RETRY_AFTER_HEADER_NAME: str(retry_after)},
+            )
+
+        return None
+
+    def __inject_faults(self) -> MemoryResponse | None:
+        if self.faults:
+            status, headers = self.faults.popleft()
+
+            return MemoryResponse(status=status, headers=headers)
+
+        if self.error_rate and self.__random.random() < self.error_rate:
+            return MemoryResponse(status=self.error_status)
+
+        return None
+
+    async def __index(self, request: MemoryRequest) -> MemoryResponse:
+        return MemoryResponse(
+            cookies={CSRF_COOKIE_NAME: self.csrf_tokens.issue()},
+        )
+
+    def __check_csrf(self, request: MemoryRequest) -> MemoryResponse | None:
+        token = request.cookies.get(CSRF_COOKIE_NAME)
+
+        if token is None or request.form.get(CSRF_POST_BODY_NAME) != token:
+            return MemoryResponse(status=403)
+
+        if not self.csrf_tokens.is_valid(token):
+            return MemoryResponse(status=403)
+
+        return None
+
+    def __check_text(self, text: str) -> MemoryResponse | None:
+        if self.max_page_size is not None and len(text) > self.max_page_size:
+            return _json_response({
+                'status': '400',
+                'content': 'Invalid data',
+                'errors': (
+                    'Ensure this value has at most '
+                    f'{self.max_page_size} characters '
+                    f'(it has {len(text)}).'
+                ),
+            })
+
+        return None
+
+    def __check_edit_code(
+        self,
+        url: str,
+        edit_code: str,
+    ) -> MemoryResponse | None:
+        if not self.pages.exists(url):
+            return _json_response({
+                'status': '404',
+                'content': f'Entry {url} does not exist',
+            })
+
+        if edit_code != self.pages.get(url).edit_code:
+            return _json_response({
+                'status': '400',
+                'content': 'Invalid data',
+                'errors': 'Invalid edit code.',
+            })
+
+        return None
+
+    async def __new(self, request: MemoryRequest) -> MemoryResponse:
+        if error := self.__check_csrf(request):
+            return error
+
+        data = request.form
+        url = data.get('url') or _random_string()
+        edit_code = data.get('edit_code') or _random_string()
+        text = data.get('text', '')
+
+        if error := self.__check_text(text):
+            return error
+
+        if self.pages.exists(url):
+            return _json_response({
+                'status': '400',
+                'content': 'Invalid data',
+                'errors': (
+                    'This URL is already in use.This URL is already in use.'
+                ),
+            })
+
+        self.pages.add(Page(url=url, edit_code=edit_code, text=text))
+
+        return _json_response({
+            'status': '200',
+            'content': 'OK',
+            'url': f'https://rentry.co/{url}',
+            'edit_code': edit_code,
+        })
+
+    async def __edit(
+        self,
+        request: MemoryRequest,
+        url: str,
+    ) -> MemoryResponse:
+        if error := self.__check_csrf(request):
+            return error
+
+        edit_code = request.form.get('edit_code', '')
+        text = request.form.get('text', '')
+
+        if error := self.__check_edit_code(url, edit_code):
+            return error
+
+        if error := self.__check_text(text):
+            return error
+
+        self.pages.update(Page(url=url, edit_code=edit_code, text=text))
+
+        return _json_response({
+            'status': '200',
+            'content': 'OK',
+        })
+
+    async def __delete(
+        self,
+        request: MemoryRequest,
+        url: str,
+    ) -> MemoryResponse:
+        if error := self.__check_csrf(request):
+            return error
+
+        edit_code = request.form.get('edit_code', '')
+
+        if error := self.__check_edit_code(url, edit_code):
+            return error
+
+        self.pages.delete(url)
+
+        return _json_response({
+            'status': '200',
+            'content': 'OK',
+        })
+
+    async def __raw(self, request: MemoryRequest, url: str) -> MemoryResponse:
+        if not self.pages.exists(url):
+            return _json_response({
+                'status': '404',
+                'content': f'Entry {url} does not exist',
+            })
+
+        access_code = request.headers.get(SECRET_RAW_ACCESS_CODE_HEADER_NAME)
+
+        if access_code is None:
+            return _json_response({
+                'status': '403',
+                'content': (
+                    'This page does not have a SECRET_RAW_ACCESS_CODE set. '
+                    'You may still view it over raw by obtaining your own '
+                    'code from Rentry admins and setting it as a '
+                    'custom header: rentry-auth'
+                ),
+            })
+
+        if access_code != self.raw_access_code:
+            return _json_response({
+                'status': '403',
+                'content': (
+                    'Value for SECRET_RAW_ACCESS_CODE not found. '
+                    'Please ensure you are using one given to you by '
+                    'Rentry admins.'
+                ),
+            })
+
+        return _json_response({
+            'status': '200',
+            'content': self.pages.get(url).text,
+        })
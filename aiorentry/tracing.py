@@ -0,0 +1,416 @@
+import asyncio
+import contextlib
+import math
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Iterator, Protocol, Sequence
+
+from aiohttp import (
+    ClientResponseError, ClientSession, TraceConfig,
+    TraceConnectionCreateEndParams, TraceConnectionReuseconnParams,
+    TraceRequestChunkSentParams, TraceRequestEndParams,
+    TraceRequestHeadersSentParams, TraceResponseChunkReceivedParams,
+)
+
+DEFAULT_PERCENTILES = (50.0, 95.0, 99.0)
+
+_ConnectedParams = (
+    TraceConnectionCreateEndParams | TraceConnectionReuseconnParams
+)
+
+
+@dataclass
+class RequestEvent:
+    operation: str | None
+    method: str
+    endpoint: str
+    outcome: str
+    status: int | None
+    duration: float
+    phases: dict[str, float]
+    bytes_sent: int
+    bytes_received: int
+
+
+@dataclass
+class OperationEvent:
+    operation: str
+    outcome: str
+    duration: float
+    phases: dict[str, float]
+    error: BaseException | None = None
+
+
+class Observer(Protocol):
+
+    def on_request(self, event: RequestEvent) -> None:
+        ...
+
+    def on_operation(self, event: OperationEvent) -> None:
+        ...
+
+
+class RequestTrace:
+    # Timestamps are filled in by the aiohttp trace signals, when the
+    # session has been created with Tracer.trace_config, and by the client
+
+    def __init__(self, operation: str | None, method: str, endpoint: str):
+        self.operation = operation
+        self.method = method
+        self.endpoint = endpoint
+        self.status: int | None = None
+        self.started_at = time.perf_counter()
+        self.connected_at: float | None = None
+        self.sent_at: float | None = None
+        self.response_at: float | None = None
+        self.read_at: float | None = None
+        self.decode_time: float | None = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.body_size = 0
+
+    def decoded(self, started_at: float, body_size: int) -> None:
+        self.read_at = started_at
+        self.decode_time = time.perf_counter() - started_at
+        self.body_size = body_size
+
+    def phases(self) -> dict[str, float]:
+        phases = {}
+        points = (
+            ('connect', self.started_at, self.connected_at),
+            ('send', self.connected_at, self.sent_at),
+            ('wait', self.sent_at, self.response_at),
+            ('read', self.response_at, self.read_at),
+        )
+
+        for name, start, end in points:
+            if start is not None and end is not None:
+                phases[name] = max(end - start, 0.0)
+
+        if self.decode_time is not None:
+            phases['decode'] = self.decode_time
+
+        return phases
+
+
+class OperationTrace:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started_at = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def add_phase(self, name: str, duration: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+
+
+_current_request: ContextVar[RequestTrace | None] = ContextVar(
+    'aiorentry_current_request',
+    default=None,
+)
+_current_operation: ContextVar[OperationTrace | None] = ContextVar(
+    'aiorentry_current_operation',
+    default=None,
+)
+
+
+def current_request() -> RequestTrace | None:
+    return _current_request.get()
+
+
+def _outcome(exc: BaseException | None) -> tuple[str, int | None]:
+    if exc is None:
+        return 'ok', None
+
+    if isinstance(exc, ClientResponseError):
+        return 'http_error', exc.status
+
+    if isinstance(exc, (asyncio.CancelledError, GeneratorExit)):
+        return 'cancelled', None
+
+    if isinstance(exc, asyncio.TimeoutError):
+        return 'timeout', None
+
+    return 'error', None
+
+
+class Tracer:
+
+    def __init__(self, observers: Sequence[Observer]):
+        self.observers = tuple(observers)
+        self.trace_config = self.__create_trace_config()
+
+    def start_request(self, method: str, endpoint: str) -> RequestTrace:
+        operation = _current_operation.get()
+
+        return RequestTrace(
+            operation.name if operation is not None else None,
+            method,
+            endpoint,
+        )
+
+    def finish_request(
+        self,
+        trace: RequestTrace,
+        exc: BaseException | None = None,
+    ) -> None:
+        outcome, status = _outcome(exc)
+
+        if status is None:
+            status = trace.status
+
+        event = RequestEvent(
+            operation=trace.operation,
+            method=trace.method,
+            endpoint=trace.endpoint,
+            outcome=outcome,
+            status=status,
+            duration=time.perf_counter() - trace.started_at,
+            phases=trace.phases(),
+            bytes_sent=trace.bytes_sent,
+            bytes_received=max(trace.bytes_received, trace.body_size),
+        )
+
+        for observer in self.observers:
+            observer.on_request(event)
+
+    @contextlib.contextmanager
+    def request(self, method: str, endpoint: str) -> Iterator[RequestTrace]:
+        trace = self.start_request(method, endpoint)
+        token = _current_request.set(trace)
+
+        try:
+            yield trace
+        except BaseException as exc:  # noqa: B902
+            self.finish_request(trace, exc)
+            raise
+        else:
+            self.finish_request(trace)
+        finally:
+            _current_request.reset(token)
+
+    @contextlib.contextmanager
+    def operation(self, name: str) -> Iterator[OperationTrace]:
+        trace = OperationTrace(name)
+        token = _current_operation.set(trace)
+        error: BaseException | None = None
+
+        try:
+            yield trace
+        except BaseException as exc:  # noqa: B902
+            error = exc
+            raise
+        finally:
+            _current_operation.reset(token)
+            outcome, _ = _outcome(error)
+            event = OperationEvent(
+                operation=name,
+                outcome=outcome,
+                duration=time.perf_counter() - trace.started_at,
+                phases=trace.phases,
+                error=error,
+            )
+
+            for observer in self.observers:
+                observer.on_operation(event)
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        operation = _current_operation.get()
+        started_at = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            if operation is not None:
+                operation.add_phase(name, time.perf_counter() - started_at)
+
+    def __create_trace_config(self) -> TraceConfig:
+        def request_trace(context: SimpleNamespace) -> RequestTrace | None:
+            trace = context.trace_request_ctx
+
+            if isinstance(trace, RequestTrace):
+                return trace
+
+            return None
+
+        async def on_connected(
+            session: ClientSession,
+            context: SimpleNamespace,
+            params: _ConnectedParams,
+        ) -> None:
+            trace = request_trace(context)
+
+            if trace is not None:
+                trace.connected_at = time.perf_counter()
+
+        async def on_headers_sent(
+            session: ClientSession,
+            context: SimpleNamespace,
+            params: TraceRequestHeadersSentParams,
+        ) -> None:
+            trace = request_trace(context)
+
+            if trace is not None:
+                trace.sent_at = time.perf_counter()
+
+                if trace.connected_at is None:
+                    trace.connected_at = trace.sent_at
+
+        async def on_chunk_sent(
+            session: ClientSession,
+            context: SimpleNamespace,
+            params: TraceRequestChunkSentParams,
+        ) -> None:
+            trace = request_trace(context)
+
+            if trace is not None:
+                trace.sent_at = time.perf_counter()
+                trace.bytes_sent += len(params.chunk)
+
+        async def on_response(
+            session: ClientSession,
+            context: SimpleNamespace,
+            params: TraceRequestEndParams,
+        ) -> None:
+            trace = request_trace(context)
+
+            if trace is not None:
+                trace.response_at = time.perf_counter()
+                trace.status = params.response.status
+
+        async def on_chunk_received(
+            session: ClientSession,
+            context: SimpleNamespace,
+            params: TraceResponseChunkReceivedParams,
+        ) -> None:
+            trace = request_trace(context)
+
+            if trace is not None:
+                trace.read_at = time.perf_counter()
+                trace.bytes_received += len(params.chunk)
+
+        config = TraceConfig()
+        config.on_connection_create_end.append(on_connected)
+        config.on_connection_reuseconn.append(on_connected)
+        config.on_request_headers_sent.append(on_headers_sent)
+        config.on_request_chunk_sent.append(on_chunk_sent)
+        config.on_request_end.append(on_response)
+        config.on_response_chunk_received.append(on_chunk_received)
+        config.freeze()
+
+        return config
+
+
+class Histogram:
+    # Log-linear buckets: constant memory, ``precision`` relative error
+
+    def __init__(self, precision: float = 0.01, min_value: float = 1e-6):
+        self.__base = math.log1p(precision)
+        self.__min_value = min_value
+        self.__buckets: Counter[int] = Counter()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        index = self.__index(value)
+        self.__buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def __index(self, value: float) -> int:
+        value = max(value, self.__min_value)
+
+        return math.ceil(math.log(value / self.__min_value) / self.__base)
+
+    def __value(self, index: int) -> float:
+        return self.__min_value * math.exp(index * self.__base)
+
+    def percentile(self, percent: float) -> float:
+        if not self.count:
+            return 0.0
+
+        rank = max(math.ceil(self.count * percent / 100), 1)
+        seen = 0
+
+        for index in sorted(self.__buckets):
+            seen += self.__buckets[index]
+
+            if seen >= rank:
+                return min(self.__value(index), self.max)
+
+        return self.max
+
+    def summary(
+        self,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> dict[str, float]:
+        summary: dict[str, float] = {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+        }
+
+        for percent in percentiles:
+            summary[f'p{percent:g}'] = self.percentile(percent)
+
+        return summary
+
+
+@dataclass
+class LatencyRecorder:
+    precision: float = 0.01
+    latency: dict[str, Histogram] = field(default_factory=dict)
+    bytes_sent: Counter[str] = field(default_factory=Counter)
+    bytes_received: Counter[str] = field(default_factory=Counter)
+    outcomes: Counter[tuple[str, str]] = field(default_factory=Counter)
+
+    def __record(self, key: str, value: float) -> None:
+        histogram = self.latency.get(key)
+
+        if histogram is None:
+            histogram = self.latency[key] = Histogram(self.precision)
+
+        histogram.record(value)
+
+    def on_request(self, event: RequestEvent) -> None:
+        key = f'{event.method} {event.endpoint}'
+        self.__record(key, event.duration)
+
+        for phase, duration in event.phases.items():
+            self.__record(f'{key} [{phase}]', duration)
+
+        self.bytes_sent[key] += event.bytes_sent
+        self.bytes_received[key] += event.bytes_received
+        outcome = str(event.status) if event.status else event.outcome
+        self.outcomes[key, outcome] += 1
+
+    def on_operation(self, event: OperationEvent) -> None:
+        self.__record(event.operation, event.duration)
+
+        for phase, duration in event.phases.items():
+            self.__record(f'{event.operation} [{phase}]', duration)
+
+        self.outcomes[event.operation, event.outcome] += 1
+
+    def dump(
+        self,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    ) -> dict[str, Any]:
+        return {
+            'latency': {
+                key: histogram.summary(percentiles)
+                for key, histogram in sorted(self.latency.items())
+            },
+            'bytes_sent': dict(self.bytes_sent),
+            'bytes_received': dict(self.bytes_received),
+            'outcomes': {
+                f'{key} {outcome}': count
+                for (key, outcome), count in sorted(self.outcomes.items())
+            },
+        }
@@ -0,0 +1,221 @@
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.cookies import BaseCookie, SimpleCookie
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Mapping, Protocol,
+)
+from urllib.parse import parse_qsl
+
+from aiohttp import ClientResponse, ClientResponseError, ClientSession
+from aiohttp.client_reqrep import RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+
+class ResponseContent(Protocol):
+
+    def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        ...
+
+
+# The part of aiohttp.ClientResponse used by the client
+class TransportResponse(Protocol):
+
+    @property
+    def status(self) -> int:
+        ...
+
+    @property
+    def headers(self) -> 'CIMultiDictProxy[str]':
+        ...
+
+    @property
+    def cookies(self) -> 'BaseCookie[str]':
+        ...
+
+    @property
+    def request_info(self) -> RequestInfo:
+        ...
+
+    @property
+    def history(self) -> tuple[ClientResponse, ...]:
+        ...
+
+    @property
+    def content(self) -> ResponseContent:
+        ...
+
+    async def read(self) -> bytes:
+        ...
+
+    def release(self) -> Any:
+        ...
+
+
+# Sends the requests of a client. Responses with an error status raise
+# ClientResponseError, and must be released by the caller.
+class Transport(Protocol):
+
+    async def request(
+        self,
+        method: str,
+        url: URL,
+        *,
+        headers: Mapping[str, str] | None = None,
+        cookies: Mapping[str, str] | None = None,
+        data: Any = None,
+        allow_redirects: bool = True,
+        trace: Any = None,
+    ) -> TransportResponse:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class AiohttpTransport:
+
+    def __init__(self, session: ClientSession, *, owner: bool = True):
+        self.session = session
+        self.__owner = owner
+
+    async def request(
+        self,
+        method: str,
+        url: URL,
+        *,
+        headers: Mapping[str, str] | None = None,
+        cookies: Mapping[str, str] | None = None,
+        data: Any = None,
+        allow_redirects: bool = True,
+        trace: Any = None,
+    ) -> TransportResponse:
+        return await self.session.request(
+            method,
+            url,
+            headers=headers,
+            cookies=cookies,
+            data=data,
+            allow_redirects=allow_redirects,
+            raise_for_status=True,
+            trace_request_ctx=trace,
+        )
+
+    async def close(self) -> None:
+        if self.__owner:
+            await self.session.close()
+
+
+@dataclass
+class MemoryRequest:
+    method: str
+    url: URL
+    headers: 'CIMultiDictProxy[str]'
+    cookies: dict[str, str]
+    form: dict[str, str]
+
+
+@dataclass
+class MemoryResponse:
+    status: int = 200
+    headers: dict[str, str] = field(default_factory=dict)
+    cookies: dict[str, str] = field(default_factory=dict)
+    body: bytes = b''
+
+
+MemoryHandler = Callable[[MemoryRequest], Awaitable[MemoryResponse]]
+
+
+class _MemoryContent:
+
+    def __init__(self, body: bytes):
+        self.__body = body
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        for start in range(0, len(self.__body), n):
+            yield self.__body[start:start + n]
+
+
+class _MemoryClientResponse:
+
+    def __init__(self, request_info: RequestInfo, response: MemoryResponse):
+        self.status = response.status
+        self.headers = CIMultiDictProxy(CIMultiDict(response.headers))
+        self.cookies: SimpleCookie = SimpleCookie()
+        self.request_info = request_info
+        self.history: tuple[ClientResponse, ...] = ()
+        self.content = _MemoryContent(response.body)
+        self.__body = response.body
+
+        for name, value in response.cookies.items():
+            self.cookies[name] = value
+
+    async def read(self) -> bytes:
+        return self.__body
+
+    def release(self) -> None:
+        pass
+
+
+async def _read_form(data: Any) -> dict[str, str]:
+    if data is None:
+        return {}
+
+    if isinstance(data, Mapping):
+        return {name: str(value) for name, value in data.items()}
+
+    if isinstance(data, AsyncIterable):
+        data = b''.join([chunk async for chunk in data])
+
+    if isinstance(data, bytes):
+        data = data.decode()
+
+    return dict(parse_qsl(data, keep_blank_values=True))
+
+
+# Dispatches requests straight to a handler in the same process, without
+# sockets or HTTP parsing. Meant for tests and benchmarks, e.g. with
+# FakeRentryServer.transport().
+class MemoryTransport:
+
+    def __init__(self, handler: MemoryHandler):
+        self.handler = handler
+
+    async def request(
+        self,
+        method: str,
+        url: URL,
+        *,
+        headers: Mapping[str, str] | None = None,
+        cookies: Mapping[str, str] | None = None,
+        data: Any = None,
+        allow_redirects: bool = True,
+        trace: Any = None,
+    ) -> TransportResponse:
+        request_headers = CIMultiDictProxy(CIMultiDict(headers or {}))
+        request = MemoryRequest(
+            method=method,
+            url=url,
+            headers=request_headers,
+            cookies=dict(cookies or {}),
+            form=await _read_form(data),
+        )
+        request_info = RequestInfo(url, method, request_headers, url)
+        response = _MemoryClientResponse(
+            request_info,
+            await self.handler(request),
+        )
+
+        if response.status >= 400:
+            raise ClientResponseError(
+                request_info,
+                (),
+                status=response.status,
+                message=HTTPStatus(response.status).phrase,
+                headers=response.headers,
+            )
+
+        return response
+
+    async def close(self) -> None:
+        pass
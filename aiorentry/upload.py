@@ -0,0 +1,114 @@
+import asyncio
+import os
+from typing import AsyncIterable, AsyncIterator, BinaryIO, Mapping, Union
+from urllib.parse import quote_plus, urlencode
+
+from aiorentry.models import new_digest
+from aiorentry.streaming import DEFAULT_CHUNK_SIZE
+
+FORM_CONTENT_TYPE = 'application/x-www-form-urlencoded'
+
+UploadSource = Union[
+    str,
+    'os.PathLike[str]',
+    BinaryIO,
+    AsyncIterable[bytes],
+    AsyncIterable[str],
+]
+
+
+# The text of a page, read piece by piece while the request is sent.
+# Files are read again on retries. Async iterators can be sent only once.
+class UploadBody:
+
+    def __init__(
+        self,
+        source: UploadSource,
+        *,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be a positive number')
+
+        self.source = source
+        self.chunk_size = chunk_size
+        # Digest of the text sent last time, set when it has been sent
+        # completely
+        self.digest: bytes | None = None
+        self.size = 0
+        self.__consumed = False
+        self.__start: int | None = None
+
+        if isinstance(source, (str, os.PathLike, AsyncIterable)):
+            return
+
+        if source.seekable():
+            self.__start = source.tell()
+
+    @property
+    def replayable(self) -> bool:
+        if isinstance(self.source, (str, os.PathLike)):
+            return True
+
+        return self.__start is not None
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        if self.__consumed and not self.replayable:
+            raise RuntimeError('The upload source can not be read again')
+
+        self.__consumed = True
+        self.digest = None
+        self.size = 0
+        digest = new_digest()
+
+        async for chunk in self.__read():
+            digest.update(chunk)
+            self.size += len(chunk)
+
+            yield chunk
+
+        self.digest = digest.digest()
+
+    async def __read(self) -> AsyncIterator[bytes]:
+        source = self.source
+
+        if isinstance(source, (str, os.PathLike)):
+            file = await asyncio.to_thread(open, source, 'rb')
+
+            try:
+                async for chunk in self.__read_file(file):
+                    yield chunk
+            finally:
+                file.close()
+        elif isinstance(source, AsyncIterable):
+            async for item in source:
+                yield item.encode() if isinstance(item, str) else item
+        else:
+            if self.__start is not None:
+                source.seek(self.__start)
+
+            async for chunk in self.__read_file(source):
+                yield chunk
+
+    async def __read_file(self, file: BinaryIO) -> AsyncIterator[bytes]:
+        while chunk := await asyncio.to_thread(file.read, self.chunk_size):
+            yield chunk
+
+
+async def encode_form(
+    fields: Mapping[str, str | UploadBody],
+) -> AsyncIterator[bytes]:
+    # application/x-www-form-urlencoded body, with the uploads
+    # percent-encoded chunk by chunk
+    separator = b''
+
+    for name, value in fields.items():
+        if isinstance(value, str):
+            yield separator + urlencode({name: value}).encode()
+        else:
+            yield separator + quote_plus(name).encode() + b'='
+
+            async for chunk in value.chunks():
+                yield quote_plus(chunk).encode()
+
+        separator = b'&'
@@ -3,14 +3,11 @@ import os
 import uuid
 
 import pytest
-from aiohttp import ClientResponseError, web
+from aiohttp import ClientResponseError
 
 from aiorentry.client import Client
 from aiorentry.models import Page
-
-CSRF_COOKIE_NAME = 'csrftoken'
-CSRF_POST_BODY_NAME = 'csrfmiddlewaretoken'
-SECRET_RAW_ACCESS_CODE_HEADER_NAME = 'rentry-auth'
+from aiorentry.testing import FakeRentryServer
 
 VALID_SECRET_RAW_ACCESS_CODE_ENV_NAME = 'SECRET_RAW_ACCESS_CODE'
 
@@ -20,6 +17,20 @@ def anyio_backend(request):
     return 'asyncio'
 
 
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
 @pytest.fixture
 def randomstr():
     def factory():
@@ -82,220 +93,39 @@ def invalid_raw_access_code(valid_raw_access_code):
 
 
 @pytest.fixture
-def fake_server_db(randomstr):
-    class Registry:
-        def __init__(self):
-            self.__pages = {}
-
-        def exists(self, url: str) -> bool:
-            return url in self.__pages
-
-        def get(self, url: str) -> Page:
-            if url not in self.__pages:
-                raise ValueError
-
-            return self.__pages[url]
-
-        def add(self, page: Page):
-            if page.url in self.__pages:
-                raise ValueError
-
-            self.__pages[page.url] = page
-
-        def update(self, page: Page):
-            if page.url not in self.__pages:
-                raise ValueError
-
-            self.__pages[page.url] = page
-
-        def delete(self, url):
-            if url not in self.__pages:
-                raise ValueError
-
-            del self.__pages[url]
-
-    return Registry()
+def fake_rentry(valid_raw_access_code):
+    return FakeRentryServer(raw_access_code=valid_raw_access_code)
 
 
 @pytest.fixture
-def csrf_token(randomstr):
-    return randomstr()
+def fake_server_db(fake_rentry):
+    return fake_rentry.pages
 
 
 @pytest.fixture
-async def fake_server(
-    aiohttp_server,
-    csrf_token,
-    fake_server_db,
-    randomstr,
-    valid_raw_access_code,
-):
-    async def index(*agrs, **kwargs):
-        resp = web.Response()
-        resp.set_cookie(CSRF_COOKIE_NAME, csrf_token)
+def csrf_tokens(fake_rentry):
+    return fake_rentry.csrf_tokens
 
-        return resp
 
-    async def new(request: web.Request):
-        data = await request.post()
-
-        if data[CSRF_POST_BODY_NAME] != request.cookies[CSRF_COOKIE_NAME]:
-            raise web.HTTPForbidden
-
-        url = data['url']
-
-        if not url:
-            url = randomstr()
-
-        edit_code = data['edit_code']
-
-        if not edit_code:
-            edit_code = randomstr()
-
-        if fake_server_db.exists(url):
-            return web.json_response({
-                'status': '400',
-                'content': 'Invalid data',
-                'errors': (
-                    'This URL is already in use.This URL is already in use.'
-                ),
-            })
-
-        fake_server_db.add(
-            Page(
-                url=url,
-                edit_code=edit_code,
-                text=data['text'],
-            ),
-        )
-
-        return web.json_response({
-            'status': '200',
-            'content': 'OK',
-            'url': f'https://rentry.co/{url}',
-            'edit_code': edit_code,
-        })
-
-    async def edit(request: web.Request):
-        data = await request.post()
-
-        if data[CSRF_POST_BODY_NAME] != request.cookies[CSRF_COOKIE_NAME]:
-            raise web.HTTPForbidden
-
-        url = request.match_info['url']
-        edit_code = data['edit_code']
-
-        if not fake_server_db.exists(url):
-            return web.json_response({
-                'status': '404',
-                'content': f'Entry {url} does not exist',
-            })
-
-        old_page = fake_server_db.get(url)
-
-        if edit_code != old_page.edit_code:
-            return web.json_response({
-                'status': '400',
-                'content': 'Invalid data',
-                'errors': 'Invalid edit code.',
-            })
-
-        fake_server_db.update(
-            Page(
-                url=url,
-                edit_code=edit_code,
-                text=data['text'],
-            ),
-        )
-
-        return web.json_response({
-            'status': '200',
-            'content': 'OK',
-        })
-
-    async def delete(request: web.Request):
-        data = await request.post()
-
-        if data[CSRF_POST_BODY_NAME] != request.cookies[CSRF_COOKIE_NAME]:
-            raise web.HTTPForbidden
-
-        url = request.match_info['url']
-        edit_code = data['edit_code']
-
-        if not fake_server_db.exists(url):
-            return web.json_response({
-                'status': '404',
-                'content': f'Entry {url} does not exist',
-            })
-
-        old_page = fake_server_db.get(url)
-
-        if edit_code != old_page.edit_code:
-            return web.json_response({
-                'status': '400',
-                'content': 'Invalid data',
-                'errors': 'Invalid edit code.',
-            })
-
-        fake_server_db.delete(url)
-
-        return web.json_response({
-            'status': str(web.HTTPOk.status_code),
-            'content': 'OK',
-        })
-
-    async def raw(request: web.Request):
-        url = request.match_info['url']
-
-        if not fake_server_db.exists(url):
-            return web.json_response({
-                'status': '404',
-                'content': f'Entry {url} does not exist',
-            })
+@pytest.fixture
+def fake_server_hits(fake_rentry):
+    return fake_rentry.hits
 
-        access_code = request.headers.get(
-            SECRET_RAW_ACCESS_CODE_HEADER_NAME,
-            None,
-        )
 
-        if access_code is None:
-            return web.json_response({
-                'status': '403',
-                'content': (
-                    'This page does not have a SECRET_RAW_ACCESS_CODE set. '
-                    'You may still view it over raw by obtaining your own '
-                    'code from Rentry admins and setting it as a '
-                    'custom header: rentry-auth'
-                ),
-            })
-
-        if access_code != valid_raw_access_code:
-            return web.json_response({
-                'status': '403',
-                'content': (
-                    'Value for SECRET_RAW_ACCESS_CODE not found. '
-                    'Please ensure you are using one given to you by '
-                    'Rentry admins.'
-                ),
-            })
+@pytest.fixture
+def fake_server_faults(fake_rentry):
+    return fake_rentry.faults
 
-        page = fake_server_db.get(url)
 
-        return web.json_response({
-            'status': '200',
-            'content': page.text,
-        })
+@pytest.fixture
+def isolated(request):
+    if request.config.getoption('--mode') != 'isolated':
+        pytest.skip('Works in isolated mode only')
 
-    app = web.Application()
-    app.add_routes([
-        web.get('/', index),
-        web.post('/api/new', new),
-        web.post('/api/edit/{url}', edit),
-        web.post('/api/delete/{url}', delete),
-        web.get('/api/raw/{url}', raw),
-    ])
 
-    return await aiohttp_server(app)
+@pytest.fixture
+async def fake_server(aiohttp_server, fake_rentry):
+    return await aiohttp_server(fake_rentry.app)
 
 
 @pytest.fixture
@@ -355,6 +185,13 @@ async def client(request, fake_server_url, cleanup_registry):
 
             return page
 
+        async def new_page_from(self, *args, **kwargs):
+            page = await super().new_page_from(*args, **kwargs)
+
+            cleanup_registry.add(page.url, page.edit_code)
+
+            return page
+
         async def delete_page(self, *args, **kwargs):
             is_deleted = await super().delete_page(*args, **kwargs)
 
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from aiorentry.bulk import bounded_map
+
+
+@pytest.mark.anyio
+async def test_bounded_map_concurrency_limit():
+    running = 0
+    peak = 0
+
+    async def work(item):
+        nonlocal running, peak
+
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+        return item * 2
+
+    results = [
+        result.unwrap()
+        async for result in bounded_map(work, range(20), concurrency=3)
+    ]
+
+    assert results == [item * 2 for item in range(20)]
+    assert peak == 3
+
+
+@pytest.mark.anyio
+async def test_bounded_map_as_completed():
+    async def work(item):
+        await asyncio.sleep(item / 100)
+
+        return item
+
+    results = [
+        result.unwrap()
+        async for result in bounded_map(
+            work,
+            [3, 1, 2],
+            concurrency=3,
+            ordered=False,
+        )
+    ]
+
+    assert results == [1, 2, 3]
+
+
+@pytest.mark.anyio
+async def test_bounded_map_errors_do_not_abort():
+    async def work(item):
+        if item == 1:
+            raise ValueError(item)
+
+        return item
+
+    results = [
+        result
+        async for result in bounded_map(work, range(3))
+    ]
+
+    assert [result.ok for result in results] == [True, False, True]
+    assert isinstance(results[1].error, ValueError)
+
+    with pytest.raises(ValueError):
+        results[1].unwrap()
+
+
+@pytest.mark.anyio
+async def test_bounded_map_invalid_concurrency():
+    with pytest.raises(ValueError):
+        async for _ in bounded_map(asyncio.sleep, [], concurrency=0):
+            pass
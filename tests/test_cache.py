@@ -0,0 +1,108 @@
+import pytest
+
+from aiorentry.cache import RawCache
+
+BASE_URL = 'https://rentry.org'
+
+
+def test_hit_and_miss(clock):
+    cache = RawCache(ttl=10, clock=clock)
+    key = (BASE_URL, 'page', None)
+
+    assert cache.lookup(key) is None
+
+    cache.set(key, 'text')
+
+    assert cache.lookup(key) == ('text', False)
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+
+
+def test_ttl_expiration(clock):
+    cache = RawCache(ttl=10, clock=clock)
+    key = (BASE_URL, 'page', None)
+    cache.set(key, 'text')
+
+    clock.now = 10
+
+    assert cache.lookup(key) is None
+    assert key not in cache
+
+
+def test_stale_while_revalidate(clock):
+    cache = RawCache(ttl=10, stale_while_revalidate=5, clock=clock)
+    key = (BASE_URL, 'page', None)
+    cache.set(key, 'text')
+
+    clock.now = 12
+
+    assert cache.lookup(key) == ('text', True)
+    assert cache.stats.stale_hits == 1
+
+    clock.now = 15
+
+    assert cache.lookup(key) is None
+
+
+def test_stale_if_error(clock):
+    cache = RawCache(ttl=10, stale_if_error=20, clock=clock)
+    key = (BASE_URL, 'page', None)
+    cache.set(key, 'text')
+
+    clock.now = 15
+
+    # Expired entries are kept, but only served as a fallback
+    assert cache.lookup(key) is None
+    assert cache.lookup_fallback(key) == 'text'
+    assert cache.stats.fallback_hits == 1
+
+    clock.now = 30
+
+    assert cache.lookup_fallback(key) is None
+    assert key not in cache
+
+
+def test_lru_eviction(clock):
+    cache = RawCache(maxsize=2, clock=clock)
+    first = (BASE_URL, 'first', None)
+    second = (BASE_URL, 'second', None)
+    third = (BASE_URL, 'third', None)
+
+    cache.set(first, '1')
+    cache.set(second, '2')
+    cache.lookup(first)
+    cache.set(third, '3')
+
+    assert first in cache
+    assert second not in cache
+    assert third in cache
+    assert cache.stats.evictions == 1
+
+
+def test_update_and_invalidate_all_access_codes(clock):
+    cache = RawCache(clock=clock)
+    public = (BASE_URL, 'page', None)
+    secret = (BASE_URL, 'page', 'code')
+    other = (BASE_URL, 'other', None)
+
+    for key in (public, secret, other):
+        cache.set(key, 'old')
+
+    cache.update(BASE_URL, 'page', 'new')
+
+    assert cache.lookup(public) == ('new', False)
+    assert cache.lookup(secret) == ('new', False)
+    assert cache.lookup(other) == ('old', False)
+
+    cache.invalidate(BASE_URL, 'page')
+
+    assert len(cache) == 1
+    assert other in cache
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        RawCache(maxsize=0)
+
+    with pytest.raises(ValueError):
+        RawCache(ttl=-1)
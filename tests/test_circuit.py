@@ -0,0 +1,114 @@
+import pytest
+from aiohttp import ClientResponseError
+
+from aiorentry.cache import RawCache
+from aiorentry.circuit import CircuitBreaker, CircuitOpenError
+from aiorentry.client import Client
+from aiorentry.models import Page
+from aiorentry.testing import FakeRentryServer
+
+
+def test_circuit_breaker_states(clock):
+    breaker = CircuitBreaker(2, 10, clock=clock)
+
+    breaker.acquire('read')
+    breaker.on_failure('read')
+
+    assert breaker.state('read') == 'closed'
+
+    breaker.acquire('read')
+    breaker.on_failure('read')
+
+    assert breaker.states() == {'read': 'open', 'write': 'closed'}
+
+    with pytest.raises(CircuitOpenError) as exc_info:
+        breaker.acquire('read')
+
+    assert exc_info.value.kind == 'read'
+    assert exc_info.value.retry_after == 10
+
+    clock.now = 10
+
+    assert breaker.state('read') == 'half_open'
+
+    # Only one probe is let through
+    breaker.acquire('read')
+
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire('read')
+
+    breaker.on_failure('read')
+
+    assert breaker.state('read') == 'open'
+
+    clock.now = 20
+    breaker.acquire('read')
+    breaker.on_success('read')
+
+    assert breaker.state('read') == 'closed'
+    assert breaker.failures('read') == 0
+
+
+def test_circuit_breaker_cancelled_probe(clock):
+    breaker = CircuitBreaker(1, 10, clock=clock)
+
+    breaker.on_failure('write')
+    clock.now = 10
+    breaker.acquire('write')
+    breaker.on_cancel('write')
+    breaker.acquire('write')
+
+    assert breaker.state('write') == 'half_open'
+
+
+@pytest.mark.anyio
+async def test_circuit_breaker_fails_fast():
+    breaker = CircuitBreaker(2, 60)
+
+    async with FakeRentryServer(error_rate=1) as server:
+        async with Client(str(server.url), circuit_breaker=breaker) as client:
+            for _ in range(2):
+                with pytest.raises(ClientResponseError):
+                    await client.raw('page', server.raw_access_code)
+
+            with pytest.raises(CircuitOpenError):
+                await client.raw('page', server.raw_access_code)
+
+            assert client.circuit_breaker.states() == {
+                'read': 'open',
+                'write': 'closed',
+            }
+
+    assert server.hits['/api/raw/{url}'] == 2
+
+
+@pytest.mark.anyio
+async def test_circuit_breaker_served_from_cache(clock):
+    page = Page(url='hello', edit_code='code', text='##Hello')
+    cache = RawCache(ttl=10, stale_if_error=100, clock=clock)
+
+    async with FakeRentryServer() as server:
+        server.pages.add(page)
+
+        async with Client(
+            str(server.url),
+            raw_cache=cache,
+            circuit_breaker=CircuitBreaker(1, 60),
+        ) as client:
+            await client.raw(page.url, server.raw_access_code)
+
+            clock.now = 50
+            server.error_rate = 1
+
+            with pytest.raises(ClientResponseError):
+                await client.raw(page.url, server.raw_access_code)
+
+            text = await client.raw(page.url, server.raw_access_code)
+
+            clock.now = 110
+
+            with pytest.raises(CircuitOpenError):
+                await client.raw(page.url, server.raw_access_code)
+
+    assert text == page.text
+    assert cache.stats.fallback_hits == 1
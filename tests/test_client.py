@@ -1,10 +1,19 @@
+import asyncio
+import io
+import json
 from unittest.mock import patch
 
 import aiohttp
 import pytest
 from aiohttp import ClientResponseError
 
+from aiorentry.cache import RawCache
 from aiorentry.client import Client
+from aiorentry.connection import ConnectionConfig
+from aiorentry.diskcache import SQLiteCacheStore
+from aiorentry.models import Page
+from aiorentry.ratelimit import AdaptiveRateLimiter
+from aiorentry.retry import RetryPolicy
 
 
 @pytest.mark.anyio
@@ -232,3 +241,540 @@ async def test_custom_client_session(fake_server_url):
 
     # Check that custom client session wasn't closed
     assert not session.closed
+
+
+@pytest.mark.anyio
+async def test_csrf_token_cached(isolated, client, csrf_tokens):
+    await client.new_page('##Hello')
+    await client.new_page('##Hello again')
+
+    assert csrf_tokens.issued == 1
+
+
+@pytest.mark.anyio
+async def test_csrf_token_refreshed_on_rejection(
+    isolated,
+    client,
+    csrf_tokens,
+    pages_registry,
+):
+    await client.new_page('##Hello')
+    csrf_tokens.revoke_all()
+
+    page = await client.new_page('##Hello again')
+
+    assert csrf_tokens.issued == 2
+    assert await pages_registry.get_text(page.url) == page.text
+
+
+@pytest.mark.anyio
+async def test_csrf_token_shared_refresh(isolated, client, csrf_tokens):
+    await asyncio.gather(*(
+        client.new_page(f'##Hello {i}')
+        for i in range(5)
+    ))
+
+    assert csrf_tokens.issued == 1
+
+
+@pytest.mark.anyio
+async def test_csrf_token_cache_disabled(
+    isolated,
+    fake_server_url,
+    csrf_tokens,
+):
+    async with Client(fake_server_url, csrf_token_ttl=0) as client:
+        page = await client.new_page('##Hello')
+        await client.delete_page(url=page.url, edit_code=page.edit_code)
+
+    assert csrf_tokens.issued == 2
+
+
+@pytest.mark.anyio
+async def test_new_pages(client, pages_registry):
+    texts = [f'##Bulk page {i}' for i in range(5)]
+
+    results = [
+        result
+        async for result in client.new_pages(texts, concurrency=2)
+    ]
+
+    assert [result.index for result in results] == list(range(5))
+
+    for text, result in zip(texts, results):
+        page = result.unwrap()
+
+        assert page.text == text
+        assert await pages_registry.get_text(page.url) == text
+
+    deleted = [
+        result.unwrap()
+        async for result in client.delete_pages(
+            result.unwrap() for result in results
+        )
+    ]
+
+    assert all(deleted)
+
+
+@pytest.mark.anyio
+async def test_edit_pages_partial_failure(
+    client,
+    pages_registry,
+    generate_page,
+):
+    existing = generate_page()
+    await pages_registry.add(existing)
+    missing = generate_page()
+
+    existing.text = f'Updated {existing.text}'
+
+    async def items():
+        yield missing
+
+        yield existing
+
+    results = [
+        result
+        async for result in client.edit_pages(items(), ordered=False)
+    ]
+
+    by_index = {result.index: result for result in results}
+
+    assert not by_index[0].ok
+    assert isinstance(by_index[0].error, ClientResponseError)
+    assert by_index[0].error.status == 404
+    assert by_index[1].ok
+    assert await pages_registry.get_text(existing.url) == existing.text
+
+
+@pytest.mark.anyio
+async def test_raw_many(
+    client,
+    pages_registry,
+    generate_page,
+    valid_raw_access_code,
+):
+    pages = [generate_page() for _ in range(3)]
+
+    for page in pages:
+        await pages_registry.add(page)
+
+    results = [
+        result.unwrap()
+        async for result in client.raw_many(
+            [page.url for page in pages],
+            secret_raw_access_code=valid_raw_access_code,
+        )
+    ]
+
+    assert results == [page.text for page in pages]
+
+
+@pytest.mark.anyio
+async def test_bulk_shares_csrf_token(
+    isolated,
+    fake_server_url,
+    csrf_tokens,
+):
+    async with Client(fake_server_url, csrf_token_ttl=0) as client:
+        results = [
+            result.unwrap()
+            async for result in client.new_pages(
+                f'##Bulk page {i}' for i in range(5)
+            )
+        ]
+
+    assert len(results) == 5
+    assert csrf_tokens.issued == 1
+
+
+@pytest.mark.anyio
+async def test_bulk_csrf_token_failure(
+    isolated,
+    fake_server_url,
+    fake_server_faults,
+    csrf_tokens,
+):
+    async with Client(fake_server_url, csrf_token_ttl=0) as client:
+        # Only the shared token request fails, the items get their own
+        fake_server_faults.append((500, {}))
+        results = [
+            result
+            async for result in client.new_pages(['##a', '##b', '##c'])
+        ]
+
+    assert [result.unwrap().text for result in results] == [
+        '##a',
+        '##b',
+        '##c',
+    ]
+    assert csrf_tokens.issued == 1
+
+
+@pytest.mark.anyio
+async def test_raw_cache(
+    isolated,
+    fake_server_url,
+    fake_server_db,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    cache = RawCache()
+
+    async with Client(fake_server_url, raw_cache=cache) as client:
+        text = await client.raw(page.url, valid_raw_access_code)
+        fake_server_db.update(
+            Page(url=page.url, edit_code=page.edit_code, text='changed'),
+        )
+        cached_text = await client.raw(page.url, valid_raw_access_code)
+
+        assert text == cached_text == page.text
+        assert cache.stats.misses == 1
+        assert cache.stats.hits == 1
+
+        await client.edit_page(
+            'edited',
+            url=page.url,
+            edit_code=page.edit_code,
+        )
+
+        assert await client.raw(page.url, valid_raw_access_code) == 'edited'
+
+        await client.delete_page(url=page.url, edit_code=page.edit_code)
+
+        assert len(cache) == 0
+
+
+@pytest.mark.anyio
+async def test_raw_cache_stale_while_revalidate(
+    isolated,
+    fake_server_url,
+    fake_server_db,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    cache = RawCache(ttl=0, stale_while_revalidate=60)
+
+    async with Client(fake_server_url, raw_cache=cache) as client:
+        await client.raw(page.url, valid_raw_access_code)
+        fake_server_db.update(
+            Page(url=page.url, edit_code=page.edit_code, text='changed'),
+        )
+
+        stale_text = await client.raw(page.url, valid_raw_access_code)
+
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            refreshed_text = await client.raw(
+                page.url,
+                valid_raw_access_code,
+            )
+
+            if refreshed_text != stale_text:
+                break
+
+    assert stale_text == page.text
+    assert refreshed_text == 'changed'
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.anyio
+async def test_raw_concurrent_requests_coalesced(
+    isolated,
+    client,
+    fake_server_db,
+    fake_server_hits,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+
+    texts = await asyncio.gather(*(
+        client.raw(page.url, valid_raw_access_code)
+        for _ in range(10)
+    ))
+
+    assert texts == [page.text] * 10
+    assert fake_server_hits['/api/raw/{url}'] == 1
+
+
+@pytest.mark.anyio
+async def test_retry_on_throttling(
+    isolated,
+    fake_server_url,
+    fake_server_faults,
+    fake_server_db,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    fake_server_faults.extend([
+        (429, {'Retry-After': '0'}),
+        (503, {}),
+    ])
+    limiter = AdaptiveRateLimiter(read_rate=100)
+
+    async with Client(
+        fake_server_url,
+        rate_limiter=limiter,
+        retry_policy=RetryPolicy(base_delay=0.01),
+    ) as client:
+        text = await client.raw(page.url, valid_raw_access_code)
+
+    assert text == page.text
+    assert not fake_server_faults
+    assert limiter.rate('read') < 100
+
+
+@pytest.mark.anyio
+async def test_retry_attempts_exhausted(
+    isolated,
+    fake_server_url,
+    fake_server_faults,
+):
+    fake_server_faults.extend([(429, {})] * 3)
+
+    async with Client(
+        fake_server_url,
+        retry_policy=RetryPolicy(max_attempts=2, base_delay=0.01),
+    ) as client:
+        with pytest.raises(ClientResponseError) as exc_info:
+            await client.new_page('##Hello')
+
+    assert exc_info.value.status == 429
+    assert len(fake_server_faults) == 1
+
+
+@pytest.mark.anyio
+async def test_warmup(
+    isolated,
+    fake_server_url,
+    fake_server_hits,
+):
+    async with Client(
+        fake_server_url,
+        connection=ConnectionConfig(warmup_connections=3),
+    ) as client:
+        assert fake_server_hits['/'] == 3
+
+        # The CSRF token has been prefetched during warm-up
+        await client.new_page('##Hello')
+
+    assert fake_server_hits['/'] == 3
+
+
+def test_connection_config_with_custom_session():
+    with pytest.raises(ValueError):
+        Client(session=object(), connection=ConnectionConfig())
+
+
+@pytest.mark.anyio
+async def test_raw_stream(
+    client,
+    pages_registry,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    page.text = '\n'.join(f'Line {i} "quoted" Юникод' for i in range(5000))
+    await pages_registry.add(page)
+
+    chunks = [
+        chunk
+        async for chunk in client.raw_stream(
+            page.url,
+            valid_raw_access_code,
+            chunk_size=1024,
+        )
+    ]
+
+    assert len(chunks) > 1
+    assert ''.join(chunks) == page.text
+
+    binary_chunks = [
+        chunk
+        async for chunk in client.raw_stream(
+            page.url,
+            valid_raw_access_code,
+            binary=True,
+        )
+    ]
+
+    assert b''.join(binary_chunks) == page.text.encode()
+
+
+@pytest.mark.anyio
+async def test_raw_stream_not_found(client, generate_page):
+    page = generate_page()
+
+    with pytest.raises(ClientResponseError) as exc_info:
+        async for _ in client.raw_stream(page.url):
+            pass
+
+    assert exc_info.value.status == 404
+    assert exc_info.value.message == f'Entry {page.url} does not exist'
+
+
+@pytest.mark.anyio
+async def test_raw_to(
+    client,
+    pages_registry,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    await pages_registry.add(page)
+
+    binary = io.BytesIO()
+    text = io.StringIO()
+
+    written = await client.raw_to(page.url, binary, valid_raw_access_code)
+    await client.raw_to(page.url, text, valid_raw_access_code)
+
+    assert binary.getvalue() == page.text.encode()
+    assert written == len(page.text.encode())
+    assert text.getvalue() == page.text
+
+
+@pytest.mark.anyio
+async def test_custom_json_loads(
+    isolated,
+    fake_server_url,
+    fake_server_db,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    calls = []
+
+    def loads(data):
+        calls.append(data)
+
+        return json.loads(data)
+
+    async with Client(fake_server_url, json_loads=loads) as custom_client:
+        text = await custom_client.raw(page.url, valid_raw_access_code)
+
+    assert text == page.text
+    assert len(calls) == 1
+
+
+@pytest.mark.anyio
+async def test_page_load_text(
+    client,
+    pages_registry,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    await pages_registry.add(page)
+
+    lazy_page = Page(url=page.url, edit_code=page.edit_code)
+    text = await lazy_page.load_text(client, valid_raw_access_code)
+
+    assert text == page.text
+    assert lazy_page == page
+
+    frozen_page = Page(url=page.url, edit_code=page.edit_code).freeze()
+
+    assert await frozen_page.load_text(client, valid_raw_access_code) == text
+    assert frozen_page.text is None
+
+
+@pytest.mark.anyio
+async def test_edit_page_if_changed(
+    isolated,
+    client,
+    fake_server_hits,
+):
+    page = await client.new_page('##Hello')
+
+    result = await client.edit_page_if_changed(
+        page.text,
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+    assert not result.written
+    assert result.page == page
+    assert fake_server_hits['/api/edit/{url}'] == 0
+
+    result = await client.edit_page_if_changed(
+        '##Changed',
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+    assert result.written
+    assert result.page.text == '##Changed'
+    assert fake_server_hits['/api/edit/{url}'] == 1
+
+
+@pytest.mark.anyio
+async def test_edit_page_if_changed_after_read(
+    isolated,
+    client,
+    fake_server_db,
+    fake_server_hits,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+
+    text = await client.raw(page.url, valid_raw_access_code)
+    result = await client.edit_page_if_changed(
+        text,
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+    assert not result.written
+    assert fake_server_hits['/api/edit/{url}'] == 0
+
+
+@pytest.mark.anyio
+async def test_raw_cache_persistent_store(
+    isolated,
+    tmp_path,
+    fake_server_url,
+    fake_server_db,
+    fake_server_hits,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    store = SQLiteCacheStore(tmp_path / 'cache.sqlite')
+
+    async with Client(
+        fake_server_url,
+        raw_cache=RawCache(store=store),
+    ) as client:
+        await client.raw(page.url, valid_raw_access_code)
+
+    # A "restarted" client warms its cache from the store
+    async with Client(
+        fake_server_url,
+        raw_cache=RawCache(store=store),
+    ) as client:
+        text = await client.raw(page.url, valid_raw_access_code)
+        result = await client.edit_page_if_changed(
+            text,
+            url=page.url,
+            edit_code=page.edit_code,
+        )
+
+    store.close()
+
+    assert text == page.text
+    assert not result.written
+    assert fake_server_hits['/api/raw/{url}'] == 1
@@ -0,0 +1,20 @@
+from aiorentry.codec import available_loads, default_loads
+
+
+def test_available_loads():
+    codecs = available_loads()
+
+    assert 'json' in codecs
+
+    for loads in codecs.values():
+        assert loads(b'{"status": "200"}') == {'status': '200'}
+
+
+def test_default_loads_prefers_fast_codec():
+    codecs = available_loads()
+    fast = [name for name in codecs if name != 'json']
+
+    assert default_loads()(b'[1, 2]') == [1, 2]
+
+    if fast:
+        assert default_loads() is codecs[fast[0]]
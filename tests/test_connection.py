@@ -0,0 +1,147 @@
+import socket
+
+import pytest
+from aiohttp import web
+
+from aiorentry.client import Client
+from aiorentry.connection import (
+    ConnectionConfig, ConnectorRegistry, _socket_factory, create_session,
+    shared_connectors,
+)
+
+
+@pytest.mark.anyio
+async def test_create_session():
+    config = ConnectionConfig(
+        limit=5,
+        limit_per_host=2,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+    )
+
+    session = create_session(config)
+
+    try:
+        assert session.connector.limit == 5
+        assert session.connector.limit_per_host == 2
+    finally:
+        await session.close()
+
+
+@pytest.mark.anyio
+async def test_force_close():
+    session = create_session(ConnectionConfig(force_close=True))
+
+    try:
+        assert session.connector.force_close
+    finally:
+        await session.close()
+
+
+def test_connector_options_for_old_aiohttp(monkeypatch):
+    # Like aiohttp 3.9, which has no happy_eyeballs_delay
+    class OldConnector:
+
+        def __init__(
+            self,
+            *,
+            limit,
+            limit_per_host,
+            use_dns_cache,
+            ttl_dns_cache,
+            force_close,
+            enable_cleanup_closed,
+            keepalive_timeout=15.0,
+        ):
+            self.limit = limit
+
+    monkeypatch.setattr('aiorentry.connection.TCPConnector', OldConnector)
+
+    assert ConnectionConfig(limit=5).create_connector().limit == 5
+
+    with pytest.raises(RuntimeError, match='aiohttp>=3.10'):
+        ConnectionConfig(happy_eyeballs_delay=None).create_connector()
+
+
+def test_socket_factory_applies_options():
+    factory = _socket_factory((
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ))
+
+    sock = factory((socket.AF_INET, socket.SOCK_STREAM, 0, '', ()))
+
+    try:
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+        assert not sock.getblocking()
+    finally:
+        sock.close()
+
+
+@pytest.mark.anyio
+async def test_connector_registry():
+    registry = ConnectorRegistry()
+    config = ConnectionConfig(limit=5)
+
+    connector = registry.acquire('https://rentry.co', config)
+
+    assert registry.acquire('https://rentry.co', config) is connector
+    other_config = registry.acquire('https://rentry.co', ConnectionConfig())
+
+    assert registry.acquire('https://rentry.org', config) is not connector
+    assert other_config is not connector
+    assert registry.refcount('https://rentry.co', config) == 2
+
+    await registry.release('https://rentry.co', config)
+
+    assert not connector.closed
+
+    await registry.release('https://rentry.co', config)
+
+    assert connector.closed
+    assert registry.refcount('https://rentry.co', config) == 0
+
+    await registry.release('https://rentry.org', config)
+    await registry.release('https://rentry.co', ConnectionConfig())
+
+    assert len(registry) == 0
+
+
+@pytest.mark.anyio
+async def test_shared_connections(aiohttp_server):
+    peers = []
+
+    async def raw(request):
+        peers.append(request.transport.get_extra_info('peername'))
+
+        return web.json_response({'status': '200', 'content': 'Hello'})
+
+    app = web.Application()
+    app.router.add_get('/api/raw/{url}', raw)
+    server = await aiohttp_server(app)
+    url = str(server.make_url('/'))
+    config = ConnectionConfig()
+
+    first = Client(url, share_connections=True)
+    second = Client(url, share_connections=True)
+    await first.setup()
+    await second.setup()
+
+    assert shared_connectors.refcount(url, config) == 2
+
+    # The keep-alive connection of the first client is reused
+    await first.raw('page')
+    await second.raw('page')
+    await first.close()
+
+    assert shared_connectors.refcount(url, config) == 1
+    assert await second.raw('page') == 'Hello'
+
+    await second.close()
+
+    assert shared_connectors.refcount(url, config) == 0
+    assert len(set(peers)) == 1
+
+
+def test_shared_connections_with_custom_session():
+    with pytest.raises(ValueError):
+        Client(session=object(), share_connections=True)
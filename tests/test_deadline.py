@@ -0,0 +1,237 @@
+import asyncio
+import time
+
+import pytest
+
+from aiorentry.circuit import CircuitBreaker, is_circuit_failure
+from aiorentry.client import Client
+from aiorentry.deadline import (
+    DeadlineExceeded, current_deadline, deadline, iterate_with_deadline,
+    remaining, with_deadline,
+)
+from aiorentry.mirrors import is_failover_error
+from aiorentry.models import Page
+from aiorentry.retry import RetryPolicy
+from aiorentry.testing import FakeRentryServer
+
+
+@pytest.mark.anyio
+async def test_with_deadline():
+    assert await with_deadline(asyncio.sleep(0, 'done')) == 'done'
+    assert await with_deadline(asyncio.sleep(0, 'done'), 1) == 'done'
+
+    with pytest.raises(DeadlineExceeded) as exc_info:
+        await with_deadline(asyncio.sleep(1), 0.01)
+
+    assert exc_info.value.timeout == 0.01
+    assert isinstance(exc_info.value, asyncio.TimeoutError)
+
+    with pytest.raises(ValueError):
+        await with_deadline(asyncio.sleep(0), -1)
+
+
+@pytest.mark.anyio
+async def test_with_deadline_other_timeouts():
+    async def fail():
+        raise asyncio.TimeoutError
+
+    with pytest.raises(asyncio.TimeoutError) as exc_info:
+        await with_deadline(fail(), 10)
+
+    assert not isinstance(exc_info.value, DeadlineExceeded)
+
+
+@pytest.mark.anyio
+async def test_deadline_context():
+    assert current_deadline() is None
+    assert remaining() is None
+
+    with deadline(10) as outer:
+        assert current_deadline() == outer
+        assert 9 < remaining() <= 10
+
+        # A nested deadline can only be shorter
+        with deadline(20) as inner:
+            assert inner == outer
+
+        with deadline(1) as inner:
+            assert inner < outer
+
+        with deadline(None) as inner:
+            assert inner == outer
+
+        async def nested():
+            return current_deadline()
+
+        # Tasks inherit the deadline
+        assert await asyncio.ensure_future(nested()) == outer
+        assert await with_deadline(nested(), 1) < outer
+
+    assert current_deadline() is None
+
+    with deadline(0):
+        with pytest.raises(DeadlineExceeded):
+            await with_deadline(asyncio.sleep(0))
+
+
+@pytest.mark.anyio
+async def test_iterate_with_deadline():
+    closed = False
+
+    async def numbers():
+        nonlocal closed
+
+        try:
+            for number in range(3):
+                await asyncio.sleep(number / 10)
+
+                yield number
+        finally:
+            closed = True
+
+    assert [n async for n in iterate_with_deadline(numbers(), 1)] == [0, 1, 2]
+    assert closed
+
+    closed = False
+    received = []
+
+    with pytest.raises(DeadlineExceeded):
+        async for number in iterate_with_deadline(numbers(), 0.15):
+            received.append(number)
+
+    assert received == [0, 1]
+    assert closed
+
+
+@pytest.fixture
+def server():
+    return FakeRentryServer()
+
+
+@pytest.mark.anyio
+async def test_client_timeout(server):
+    page = Page(url='hello', edit_code='code', text='##Hello')
+    server.pages.add(page)
+
+    async with Client(transport=server.transport()) as client:
+        text = await client.raw(page.url, server.raw_access_code, timeout=1)
+
+        assert text == '##Hello'
+
+        server.latency = 0.2
+
+        # The timeout covers the CSRF token request too
+        with pytest.raises(DeadlineExceeded):
+            await client.new_page('##Slow', timeout=0.3)
+
+        with pytest.raises(DeadlineExceeded):
+            await client.raw(page.url, server.raw_access_code, timeout=0.1)
+
+        with pytest.raises(DeadlineExceeded):
+            async for _ in client.raw_stream(
+                page.url,
+                server.raw_access_code,
+                timeout=0.1,
+            ):
+                pass
+
+        with pytest.raises(DeadlineExceeded):
+            async for _ in client.delete_pages([page], timeout=0.1):
+                pass
+
+        with pytest.raises(DeadlineExceeded):
+            await client.warmup(2, timeout=0.1)
+
+    assert server.pages.exists(page.url)
+
+
+@pytest.mark.anyio
+async def test_client_request_deadline(server):
+    page = Page(url='hello', edit_code='code', text='##Hello')
+    server.pages.add(page)
+    server.latency = 0.1
+
+    async with Client(transport=server.transport()) as client:
+        # E.g. set by a web handler for the whole request
+        with deadline(0.15):
+            text = await client.raw(page.url, server.raw_access_code)
+
+            assert text == '##Hello'
+
+            with pytest.raises(DeadlineExceeded):
+                await client.raw(page.url, server.raw_access_code)
+
+
+@pytest.mark.anyio
+async def test_client_deadline_skips_retries(server):
+    client = Client(
+        transport=server.transport(),
+        retry_policy=RetryPolicy(base_delay=0),
+    )
+
+    async with client:
+        # The CSRF token is fetched by a shared task, which doesn't get the
+        # deadline of the caller
+        await client.warmup()
+        server.faults.append((429, {'Retry-After': '5'}))
+        started = time.monotonic()
+
+        with pytest.raises(DeadlineExceeded):
+            await client.new_page('##Hello', timeout=1)
+
+    # Fails right away, instead of sleeping until the deadline
+    assert time.monotonic() - started < 0.5
+
+
+@pytest.mark.anyio
+async def test_client_deadline_not_shared(server):
+    page = Page(url='hello', edit_code='code', text='##Hello')
+    server.pages.add(page)
+    server.faults.append((429, {'Retry-After': '1'}))
+    client = Client(
+        transport=server.transport(),
+        retry_policy=RetryPolicy(base_delay=0),
+    )
+
+    async with client:
+        # Both calls share one coalesced request, which is not cut off by
+        # the deadline of the caller that started it
+        short, unbounded = await asyncio.gather(
+            client.raw(page.url, server.raw_access_code, timeout=0.2),
+            client.raw(page.url, server.raw_access_code),
+            return_exceptions=True,
+        )
+
+    assert isinstance(short, DeadlineExceeded)
+    assert unbounded == '##Hello'
+    assert server.hits['/api/raw/{url}'] == 2
+
+
+def test_deadline_not_a_failure():
+    assert not is_failover_error('read', DeadlineExceeded())
+    assert not is_circuit_failure(DeadlineExceeded())
+
+
+@pytest.mark.anyio
+async def test_client_deadline_not_a_failure(server):
+    client = Client(
+        mirrors=['https://rentry.co', 'https://rentry.org'],
+        transport=server.transport(),
+        retry_policy=RetryPolicy(base_delay=0),
+        circuit_breaker=CircuitBreaker(failure_threshold=2),
+    )
+
+    async with client:
+        await client.warmup()
+
+        for _ in range(2):
+            server.faults.append((429, {'Retry-After': '5'}))
+
+            with pytest.raises(DeadlineExceeded):
+                await client.new_page('##Hello', timeout=1)
+
+        # Running out of time is not held against the service
+        assert client.circuit_breaker.states()['write'] == 'closed'
+        assert client.circuit_breaker.failures('write') == 0
+        assert [mirror.failures for mirror in client.mirrors] == [0, 0]
+        assert server.hits['/api/new'] == 2
@@ -0,0 +1,22 @@
+import pytest
+
+from aiorentry.digests import MemoryDigestStore
+
+
+@pytest.mark.anyio
+async def test_memory_digest_store():
+    store = MemoryDigestStore(maxsize=2)
+
+    await store.set(('base', 'first'), b'1')
+    await store.set(('base', 'second'), b'2')
+
+    assert await store.get(('base', 'first')) == b'1'
+
+    await store.set(('base', 'third'), b'3')
+
+    assert await store.get(('base', 'second')) is None
+    assert len(store) == 2
+
+    await store.delete(('base', 'first'))
+
+    assert await store.get(('base', 'first')) is None
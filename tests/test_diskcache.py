@@ -0,0 +1,187 @@
+import sqlite3
+
+import pytest
+
+from aiorentry.cache import RawCache
+from aiorentry.diskcache import SQLiteCacheStore
+from aiorentry.models import content_digest
+
+BASE_URL = 'https://rentry.org'
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteCacheStore(tmp_path / 'cache.sqlite')
+
+    yield store
+
+    store.close()
+
+
+def test_get_set(store):
+    public = (BASE_URL, 'page', None)
+    secret = (BASE_URL, 'page', 'code')
+
+    store.set(public, 'public')
+    store.set(secret, 'secret')
+
+    entry = store.get(public)
+
+    assert entry.text == 'public'
+    assert entry.digest == content_digest('public')
+    assert store.get(secret).text == 'secret'
+    assert store.get((BASE_URL, 'other', None)) is None
+    assert store.total_bytes == len('public') + len('secret')
+
+
+def test_access_codes_not_stored(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    store = SQLiteCacheStore(path)
+    store.set((BASE_URL, 'page', 'secret-code'), 'secret')
+    store.set((BASE_URL, 'other', None), 'public')
+
+    for file in tmp_path.iterdir():
+        assert b'secret-code' not in file.read_bytes()
+
+    recent = {entry.key: entry.secret for entry in store.recent(10, 0)}
+
+    assert recent == {
+        (BASE_URL, 'page', None): True,
+        (BASE_URL, 'other', None): False,
+    }
+
+    store.close()
+
+    # Files of older versions with plain text codes are cleaned up
+    with sqlite3.connect(path) as db:
+        db.execute('PRAGMA user_version = 0')
+
+    store = SQLiteCacheStore(path)
+
+    assert store.get((BASE_URL, 'page', 'secret-code')) is None
+    assert store.get((BASE_URL, 'other', None)).text == 'public'
+    assert store.total_bytes == len('public')
+
+    store.close()
+
+
+def test_update_and_invalidate_page(store):
+    store.set((BASE_URL, 'page', None), 'old')
+    store.set((BASE_URL, 'page', 'code'), 'old')
+    store.set((BASE_URL, 'other', None), 'old')
+
+    store.update_page(BASE_URL, 'page', 'newer')
+
+    assert store.get((BASE_URL, 'page', 'code')).text == 'newer'
+    assert store.total_bytes == len('newer') * 2 + len('old')
+
+    store.invalidate_page(BASE_URL, 'page')
+
+    assert len(store) == 1
+    assert store.total_bytes == len('old')
+
+
+def test_eviction_by_size(tmp_path):
+    store = SQLiteCacheStore(tmp_path / 'cache.sqlite', max_bytes=25)
+
+    for i in range(5):
+        store.set((BASE_URL, f'page{i}', None), 'x' * 10)
+
+    assert store.total_bytes <= 25
+    assert store.get((BASE_URL, 'page4', None)) is not None
+    assert store.get((BASE_URL, 'page0', None)) is None
+
+    store.close()
+
+
+def test_set_same_key(tmp_path):
+    store = SQLiteCacheStore(tmp_path / 'cache.sqlite', max_bytes=10_000)
+
+    for i in range(25):
+        store.set((BASE_URL, 'page', None), str(i % 10) * 1000)
+
+    assert len(store) == 1
+    assert store.total_bytes == 1000
+
+    store.set((BASE_URL, 'other', None), 'text')
+
+    assert store.get((BASE_URL, 'other', None)).text == 'text'
+    assert store.total_bytes == 1004
+
+    store.close()
+
+
+def test_shared_between_connections(tmp_path):
+    writer = SQLiteCacheStore(tmp_path / 'cache.sqlite')
+    reader = SQLiteCacheStore(tmp_path / 'cache.sqlite')
+
+    writer.set((BASE_URL, 'page', None), 'text')
+
+    assert reader.get((BASE_URL, 'page', None)).text == 'text'
+
+    writer.close()
+    reader.close()
+
+
+def test_get_without_write_lock(tmp_path):
+    path = tmp_path / 'cache.sqlite'
+    store = SQLiteCacheStore(path, timeout=0)
+    store.set((BASE_URL, 'page', None), 'text')
+
+    # Another process is writing
+    other = sqlite3.connect(path)
+    other.execute('BEGIN IMMEDIATE')
+
+    try:
+        assert store.get((BASE_URL, 'page', None)).text == 'text'
+    finally:
+        other.rollback()
+
+    # Entries that weren't read for a while are touched
+    with other:
+        other.execute('UPDATE raw_cache SET accessed_at = 0')
+
+    store.get((BASE_URL, 'page', None))
+    (accessed_at,) = other.execute(
+        'SELECT accessed_at FROM raw_cache',
+    ).fetchone()
+
+    assert accessed_at > 0
+
+    other.close()
+    store.close()
+
+
+@pytest.mark.anyio
+async def test_raw_cache_warm(store):
+    await RawCache(store=store).put((BASE_URL, 'page', None), 'text')
+    await RawCache(store=store).put((BASE_URL, 'secret', 'code'), 'text')
+
+    cache = RawCache(store=store)
+    entries = await cache.warm()
+
+    assert len(entries) == 2
+    assert cache.lookup((BASE_URL, 'page', None)) == ('text', False)
+    # Keys with access codes can't be restored
+    assert cache.lookup((BASE_URL, 'secret', None)) is None
+    assert len(cache) == 1
+
+
+@pytest.mark.anyio
+async def test_raw_cache_reads_through_store(store):
+    await RawCache(store=store).put((BASE_URL, 'page', None), 'text')
+
+    cache = RawCache(store=store)
+
+    assert await cache.get((BASE_URL, 'page', None)) == ('text', False)
+    assert cache.stats.store_hits == 1
+    assert (BASE_URL, 'page', None) in cache
+
+
+@pytest.mark.anyio
+async def test_raw_cache_expired_in_store(store):
+    await RawCache(store=store).put((BASE_URL, 'page', None), 'text')
+
+    cache = RawCache(ttl=0, store=store)
+
+    assert await cache.get((BASE_URL, 'page', None)) is None
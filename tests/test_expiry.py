@@ -0,0 +1,254 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from aiorentry.client import Client
+from aiorentry.expiry import (
+    ExpiringPage, MemoryExpiryStore, PageExpirer, SQLiteExpiryStore,
+)
+from aiorentry.models import Page
+from aiorentry.testing import FakeRentryServer
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        yield MemoryExpiryStore()
+    else:
+        store = SQLiteExpiryStore(tmp_path / 'expiry.db')
+
+        yield store
+
+        store.close()
+
+
+@pytest.fixture
+def server():
+    return FakeRentryServer()
+
+
+@pytest.fixture
+async def memory_client(server):
+    async with Client(transport=server.transport()) as client:
+        yield client
+
+
+@pytest.mark.anyio
+async def test_expiry_store(store):
+    await store.add(
+        [
+            ExpiringPage('c', 'code', 30.0),
+            ExpiringPage('a', 'code', 10.0),
+            ExpiringPage('b', 'code', 20.0),
+        ],
+    )
+
+    assert await store.count() == 3
+    assert await store.next_expiry() == 10.0
+    assert await store.due(5.0, 10) == []
+    assert [page.url for page in await store.due(25.0, 10)] == ['a', 'b']
+    assert [page.url for page in await store.due(25.0, 1)] == ['a']
+
+    # Rescheduled and removed pages
+    await store.add([ExpiringPage('a', 'code', 40.0)])
+    await store.remove(['b', 'unknown'])
+
+    assert await store.count() == 2
+    assert await store.next_expiry() == 30.0
+    assert [page.url for page in await store.due(50.0, 10)] == ['c', 'a']
+
+    await store.remove(['a', 'c'])
+
+    assert await store.count() == 0
+    assert await store.next_expiry() is None
+
+
+@pytest.mark.anyio
+async def test_memory_expiry_store_compaction():
+    store = MemoryExpiryStore()
+
+    for expires_at in range(5000):
+        await store.add([ExpiringPage('page', 'code', float(expires_at))])
+
+    assert len(store) == 1
+    assert await store.due(10_000.0, 10) == [
+        ExpiringPage('page', 'code', 4999.0),
+    ]
+
+
+@pytest.mark.anyio
+async def test_expirer_purge(server, memory_client, clock):
+    expirer = PageExpirer(memory_client, batch_size=2, clock=clock)
+    short = [await expirer.new_page(f'##{i}', ttl=10) for i in range(3)]
+    long = await expirer.new_page('##Long', ttl=100)
+
+    assert await expirer.purge() == 0
+
+    clock.now += 50
+
+    assert await expirer.purge() == 3
+    assert len(server.pages) == 1
+    assert server.pages.exists(long.url)
+    assert expirer.stats.deleted == 3
+    assert expirer.stats.batches == 2
+    assert server.hits['/api/delete/{url}'] == 3
+
+    # Forgotten pages are not deleted
+    await expirer.forget(long.url)
+    clock.now += 100
+
+    assert await expirer.purge() == 0
+    assert server.pages.exists(long.url)
+
+    # Pages deleted by somebody else
+    await expirer.track(short[0], ttl=0)
+
+    assert await expirer.purge() == 1
+    assert expirer.stats.missing == 1
+    assert await expirer.store.count() == 0
+
+
+@pytest.mark.anyio
+async def test_expirer_reschedules_failures(
+    server,
+    memory_client,
+    clock,
+):
+    expirer = PageExpirer(memory_client, clock=clock, retry_delay=30)
+    page = await expirer.new_page('##Hello', ttl=0)
+    server.faults.append((503, {}))
+
+    assert await expirer.purge() == 0
+    assert expirer.stats.rescheduled == 1
+    assert expirer.errors[page.url].status == 503
+    assert server.pages.exists(page.url)
+    assert await expirer.store.next_expiry() == clock.now + 30
+
+    clock.now += 30
+
+    assert await expirer.purge() == 1
+    assert not server.pages.exists(page.url)
+    assert expirer.errors == {}
+
+
+@pytest.mark.anyio
+async def test_expirer_background(server, memory_client):
+    async with PageExpirer(memory_client, interval=60) as expirer:
+        page = await expirer.new_page('##Hello', ttl=3600)
+        await asyncio.sleep(0.01)
+
+        # Tracking an earlier expiry wakes up the worker
+        pages = [await expirer.new_page('##Short', ttl=0.05) for _ in range(3)]
+
+        await asyncio.sleep(0.02)
+
+        assert len(server.pages) == 4
+
+        await asyncio.sleep(0.1)
+
+        assert len(server.pages) == 1
+        assert server.pages.exists(page.url)
+
+    assert expirer.stats.deleted == len(pages)
+
+    with pytest.raises(RuntimeError):
+        expirer.start()
+
+
+class LockedStore(MemoryExpiryStore):
+    # Fails like a store that another process keeps locked for a while
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+
+    async def due(self, now, limit):
+        if self.failures:
+            self.failures -= 1
+
+            raise sqlite3.OperationalError('database is locked')
+
+        return await super().due(now, limit)
+
+
+@pytest.mark.anyio
+async def test_expirer_survives_store_errors(server, memory_client):
+    store = LockedStore(failures=2)
+    expirer = PageExpirer(memory_client, store, retry_delay=0.02)
+    page = await expirer.new_page('##Hello', ttl=0)
+
+    async with expirer:
+        await asyncio.sleep(0.01)
+
+        assert expirer.stats.failures == 1
+        assert isinstance(expirer.last_error, sqlite3.OperationalError)
+        assert server.pages.exists(page.url)
+
+        await asyncio.sleep(0.1)
+
+    assert expirer.stats.failures == 2
+    assert not server.pages.exists(page.url)
+
+
+@pytest.mark.anyio
+async def test_expirer_persistence(
+    server,
+    memory_client,
+    tmp_path,
+    clock,
+):
+    path = tmp_path / 'expiry.db'
+    store = SQLiteExpiryStore(path)
+    expirer = PageExpirer(memory_client, store, clock=clock)
+    page = await expirer.new_page('##Hello', ttl=10)
+    await expirer.close()
+    store.close()
+
+    clock.now += 10
+    store = SQLiteExpiryStore(path)
+
+    try:
+        expirer = PageExpirer(memory_client, store, clock=clock)
+
+        assert await expirer.purge() == 1
+        assert not server.pages.exists(page.url)
+    finally:
+        store.close()
+
+
+@pytest.mark.anyio
+async def test_expirer_rate(server, memory_client):
+    pages = [await memory_client.new_page(f'##{i}') for i in range(6)]
+    expirer = PageExpirer(memory_client, batch_size=2, rate=100)
+    await expirer.track_many(pages, ttl=0)
+
+    started = asyncio.get_running_loop().time()
+
+    async with expirer:
+        while len(server.pages):
+            await asyncio.sleep(0.005)
+
+    assert asyncio.get_running_loop().time() - started >= 0.04
+    assert expirer.stats.batches == 3
+
+
+def test_expirer_options():
+    client = Client()
+
+    with pytest.raises(ValueError):
+        PageExpirer(client, batch_size=0)
+
+    with pytest.raises(ValueError):
+        PageExpirer(client, rate=0)
+
+    with pytest.raises(ValueError):
+        PageExpirer(client, retry_delay=0)
+
+
+@pytest.mark.anyio
+async def test_expirer_ttl(memory_client):
+    expirer = PageExpirer(memory_client)
+
+    with pytest.raises(ValueError):
+        await expirer.track(Page(url='a', edit_code='b'), ttl=-1)
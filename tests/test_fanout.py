@@ -0,0 +1,145 @@
+import pickle
+import time
+
+import pytest
+from aiohttp import ClientResponseError, RequestInfo
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+from aiorentry.circuit import CircuitOpenError
+from aiorentry.fanout import (
+    WorkerError, _portable, create_page, edit_page, fan_out, read_page,
+)
+from aiorentry.models import Page
+
+
+async def reject_odd(client, item):
+    if item % 2:
+        raise CircuitOpenError('write', 30.0)
+
+    return item
+
+
+def test_portable_errors():
+    error = ValueError('Invalid data')
+
+    assert _portable(error) is error
+
+    url = URL('https://rentry.co/api/edit/hello')
+    headers = CIMultiDictProxy(CIMultiDict())
+    error = ClientResponseError(
+        RequestInfo(url, 'POST', headers, url),
+        (),
+        status=400,
+        message='Invalid data',
+    )
+    portable = pickle.loads(pickle.dumps(_portable(error)))
+
+    assert isinstance(portable, WorkerError)
+    assert portable.status == 400
+    assert str(portable).startswith('ClientResponseError: 400')
+
+    # Can be pickled, but not loaded
+    error = CircuitOpenError('write', 30.0)
+    portable = pickle.loads(pickle.dumps(_portable(error)))
+
+    assert isinstance(portable, WorkerError)
+    assert portable.type_name == 'CircuitOpenError'
+    assert portable.status is None
+
+
+@pytest.mark.anyio
+async def test_fan_out(isolated, fake_server_url, fake_server_db):
+    texts = [f'##Page {i}' for i in range(20)]
+    results = [
+        result
+        async for result in fan_out(
+            create_page,
+            texts,
+            processes=2,
+            concurrency=4,
+            write_rate=1000,
+            batch_size=3,
+            client_options={'base_url': str(fake_server_url)},
+        )
+    ]
+
+    assert sorted(result.index for result in results) == list(range(20))
+    assert len(fake_server_db) == 20
+
+    for result in results:
+        page = result.unwrap()
+
+        assert fake_server_db.get(page.url).text == texts[result.index]
+        assert result.item == texts[result.index]
+
+
+@pytest.mark.anyio
+async def test_fan_out_errors(
+    isolated,
+    fake_server_url,
+    fake_server_db,
+    generate_page,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    pages = [
+        Page(url=page.url, edit_code=page.edit_code, text='##Edited'),
+        Page(url=page.url, edit_code='wrong', text='##Wrong'),
+    ]
+
+    results = {
+        result.index: result
+        async for result in fan_out(
+            edit_page,
+            pages,
+            processes=1,
+            client_options={'base_url': str(fake_server_url)},
+        )
+    }
+
+    assert results[0].ok
+    assert isinstance(results[1].error, WorkerError)
+    assert results[1].error.type_name == 'ClientResponseError'
+    assert fake_server_db.get(page.url).text == '##Edited'
+
+
+@pytest.mark.anyio
+async def test_fan_out_unloadable_errors():
+    results = {
+        result.index: result
+        async for result in fan_out(reject_odd, range(8), processes=2)
+    }
+
+    assert len(results) == 8
+
+    for index, result in results.items():
+        if index % 2:
+            assert result.error.type_name == 'CircuitOpenError'
+        else:
+            assert result.unwrap() == index
+
+
+@pytest.mark.anyio
+async def test_fan_out_limits_configured_rate_only(
+    isolated,
+    fake_server_url,
+    fake_server_hits,
+):
+    started = time.monotonic()
+    results = [
+        result
+        async for result in fan_out(
+            read_page,
+            [f'missing-{i}' for i in range(40)],
+            processes=1,
+            write_rate=1,
+            client_options={'base_url': str(fake_server_url)},
+        )
+    ]
+
+    assert len(results) == 40
+    assert fake_server_hits['/api/raw/{url}'] == 40
+
+    # Reads are not held to the default read rate of 10 per second
+    assert time.monotonic() - started < 2.5
@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from aiorentry.client import Client
+from aiorentry.hedging import HedgingPolicy
+from aiorentry.models import Page
+from aiorentry.retry import RetryBudget
+from aiorentry.testing import FakeRentryServer
+
+
+def test_hedging_policy_fixed_delay():
+    policy = HedgingPolicy(0.1)
+
+    assert policy.hedge_delay() == 0.1
+
+
+def test_hedging_policy_adaptive_delay():
+    policy = HedgingPolicy(percentile=90, window=10, min_samples=5)
+
+    for latency in range(1, 5):
+        policy.record(latency)
+
+    # Not enough samples yet
+    assert policy.hedge_delay() is None
+
+    for latency in range(5, 21):
+        policy.record(latency)
+
+    # Only the last 10 samples are used
+    assert policy.hedge_delay() == 19
+
+
+def test_hedging_policy_budget():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    policy = HedgingPolicy(0.1, budget=budget)
+
+    assert policy.try_hedge()
+    assert not policy.try_hedge()
+
+    policy.on_request()
+    policy.on_request()
+
+    assert policy.try_hedge()
+    assert policy.hedged == 2
+
+
+def test_hedging_policy_invalid():
+    with pytest.raises(ValueError):
+        HedgingPolicy(-1)
+
+    with pytest.raises(ValueError):
+        HedgingPolicy(percentile=0)
+
+
+@pytest.mark.anyio
+async def test_hedged_raw():
+    page = Page(url='hello', edit_code='code', text='##Hello')
+    policy = HedgingPolicy(0.05)
+
+    async with (
+        FakeRentryServer(latency=1) as slow,
+        FakeRentryServer(raw_access_code=slow.raw_access_code) as fast,
+    ):
+        slow.pages.add(page)
+        fast.pages.add(page)
+
+        async with Client(
+            mirrors=[str(slow.url), str(fast.url)],
+            hedging=policy,
+        ) as client:
+            started_at = time.monotonic()
+            text = await client.raw(page.url, slow.raw_access_code)
+            elapsed = time.monotonic() - started_at
+
+    assert text == page.text
+    assert elapsed < 0.5
+    assert policy.hedged == 1
+    assert slow.hits['/api/raw/{url}'] == 1
+    assert fast.hits['/api/raw/{url}'] == 1
+
+
+@pytest.mark.anyio
+async def test_hedged_raw_not_needed(
+    isolated,
+    fake_server_url,
+    fake_server_db,
+    fake_server_hits,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    policy = HedgingPolicy(1)
+
+    async with Client(fake_server_url, hedging=policy) as client:
+        text = await client.raw(page.url, valid_raw_access_code)
+
+    assert text == page.text
+    assert policy.requests == 1
+    assert policy.hedged == 0
+    assert fake_server_hits['/api/raw/{url}'] == 1
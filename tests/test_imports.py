@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from aiorentry.bench import import_times
+
+# Time spent in the modules of the package itself, without dependencies
+CLIENT_IMPORT_BUDGET_US = 100_000
+
+LAZY_MODULES = {
+    'aiorentry.cache',
+    'aiorentry.hedging',
+    'aiorentry.tracing',
+    'aiorentry.upload',
+}
+
+
+def test_client_import(monkeypatch):
+    monkeypatch.chdir(Path(__file__).parents[1])
+    runs = [import_times('aiorentry.client') for _ in range(3)]
+    modules = set(runs[0])
+
+    assert 'aiorentry.client' in modules
+    assert not [name for name in modules if name.startswith('aiohttp.web')]
+    assert not modules & LAZY_MODULES
+
+    own = min(
+        sum(
+            self_time
+            for name, (self_time, _) in run.items()
+            if name.startswith('aiorentry')
+        )
+        for run in runs
+    )
+
+    assert own < CLIENT_IMPORT_BUDGET_US
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientConnectorError, ClientResponseError
+from aiohttp.test_utils import unused_port
+
+from aiorentry.client import Client
+from aiorentry.mirrors import MirrorPool, is_failover_error
+from aiorentry.testing import FakeRentryServer
+
+
+def test_mirror_pool_routing(clock):
+    pool = MirrorPool(['http://a', 'http://b'], alpha=0.5, clock=clock)
+    a, b = pool
+
+    # Not measured yet: the primary goes first
+    assert pool.select() is a
+
+    pool.on_success(a, 0.2)
+
+    # b is probed before it's known to be slower
+    assert pool.select() is b
+
+    pool.on_success(b, 0.4)
+
+    assert pool.select() is a
+
+    pool.on_success(a, 1.0)
+
+    assert a.latency == pytest.approx(0.6)
+    assert pool.select() is b
+
+
+def test_mirror_pool_cooldown(clock):
+    pool = MirrorPool(['http://a', 'http://b'], cooldown=10, clock=clock)
+    a, b = pool
+
+    pool.on_failure(a)
+
+    assert not pool.is_healthy(a)
+    assert pool.candidates() == [b, a]
+
+    pool.on_failure(b)
+
+    # Unhealthy mirrors are still tried, the one that failed first on top
+    assert pool.candidates() == [a, b]
+
+    clock.now = 10
+
+    assert pool.is_healthy(a)
+    assert pool.is_healthy(b)
+
+    pool.on_success(a, 0.1)
+
+    assert a.failures == 0
+    assert b.failures == 1
+
+
+def test_failover_errors():
+    def response_error(status):
+        return ClientResponseError(None, (), status=status)
+
+    assert is_failover_error('read', response_error(500))
+    assert is_failover_error('write', response_error(502))
+    assert not is_failover_error('write', response_error(500))
+    assert not is_failover_error('read', response_error(404))
+    assert is_failover_error('read', asyncio.TimeoutError())
+    assert not is_failover_error('write', asyncio.TimeoutError())
+    assert not is_failover_error('read', ValueError())
+
+
+@pytest.mark.anyio
+async def test_failover_on_connection_error(
+    isolated,
+    fake_server_url,
+    valid_raw_access_code,
+):
+    dead_url = f'http://127.0.0.1:{unused_port()}'
+
+    async with Client(mirrors=[dead_url, str(fake_server_url)]) as client:
+        page = await client.new_page('##Hello')
+        dead, alive = client.mirrors
+
+        assert dead.failures == 1
+        assert not client.mirrors.is_healthy(dead)
+        assert alive.latency is not None
+
+        # The dead mirror is skipped until its cooldown is over
+        await client.raw(page.url, valid_raw_access_code)
+        await client.edit_page('##Hi', url=page.url, edit_code=page.edit_code)
+
+        assert dead.failures == 1
+
+
+@pytest.mark.anyio
+async def test_failover_on_server_errors():
+    async with (
+        FakeRentryServer(error_rate=1, error_status=502) as broken,
+        FakeRentryServer(raw_access_code=broken.raw_access_code) as server,
+    ):
+        mirrors = [str(broken.url), str(server.url)]
+
+        async with Client(mirrors=mirrors) as client:
+            page = await client.new_page('##Hello')
+            text = await client.raw(page.url, server.raw_access_code)
+            first, second = client.mirrors
+
+        assert text == '##Hello'
+        assert first.failures == 1
+        # CSRF tokens are per mirror
+        assert first.csrf_token is None
+        assert second.csrf_token is not None
+        assert broken.hits['/'] == 1
+        assert server.csrf_tokens.issued == 1
+
+
+@pytest.mark.anyio
+async def test_no_failover_for_single_mirror(isolated):
+    dead_url = f'http://127.0.0.1:{unused_port()}'
+
+    async with Client(dead_url) as client:
+        with pytest.raises(ClientConnectorError):
+            await client.raw('page')
+
+
+def test_base_url_and_mirrors_exclusive():
+    with pytest.raises(ValueError):
+        Client('https://rentry.co', mirrors=['https://rentry.org'])
@@ -0,0 +1,117 @@
+import dataclasses
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from aiorentry.models import FrozenPage, Page, content_digest
+
+
+def test_page_backwards_compatible_constructor():
+    page = Page(url='url', edit_code='code', text='text')
+
+    assert page.url == 'url'
+    assert page.edit_code == 'code'
+    assert page.text == 'text'
+    assert repr(page) == "Page(url='url', edit_code='code', text='text')"
+    assert Page('url', 'code', 'text') == page
+
+
+def test_page_is_slotted():
+    page = Page(url='url', edit_code='code')
+
+    assert not hasattr(page, '__dict__')
+
+    with pytest.raises(AttributeError):
+        page.extra = 'value'
+
+
+def test_page_digest():
+    page = Page(url='url', edit_code='code', text='text')
+
+    assert page.digest == content_digest('text')
+    assert page.has_text('text')
+
+    page.text = 'changed'
+
+    assert page.digest == content_digest('changed')
+    assert Page(url='url', edit_code='code').digest is None
+
+
+def test_page_equality_uses_digest():
+    page = Page(url='url', edit_code='code', text='text')
+    without_text = Page(
+        url='url',
+        edit_code='code',
+        digest=content_digest('text'),
+    )
+
+    assert page == without_text
+    assert page != Page(url='url', edit_code='code', text='other')
+    assert page != Page(url='other', edit_code='code', text='text')
+
+
+def test_page_drop_text():
+    page = Page(url='url', edit_code='code', text='text')
+
+    page.drop_text()
+
+    assert page.text is None
+    assert page.has_text('text')
+
+    with pytest.raises(ValueError):
+        page.require_text()
+
+
+def test_frozen_page():
+    page = Page(url='url', edit_code='code', text='text').freeze()
+
+    assert isinstance(page, FrozenPage)
+    assert page.digest == content_digest('text')
+    assert {page: 1}[page.freeze()] == 1
+    assert page == Page(url='url', edit_code='code', text='text')
+
+    with pytest.raises(FrozenInstanceError):
+        page.text = 'changed'
+
+    with pytest.raises(FrozenInstanceError):
+        page.url = 'changed'
+
+
+def test_page_match_args():
+    match Page(url='url', edit_code='code', text='text'):
+        case Page(url, edit_code, text):
+            assert (url, edit_code, text) == ('url', 'code', 'text')
+
+
+def test_page_is_dataclass():
+    page = Page(url='url', edit_code='code', text='text')
+    edited = dataclasses.replace(page, text='edited')
+
+    assert dataclasses.is_dataclass(page)
+    assert edited == Page(url='url', edit_code='code', text='edited')
+    assert edited.digest == content_digest('edited')
+    assert page.text == 'text'
+    assert dataclasses.asdict(page) == {
+        'url': 'url',
+        'edit_code': 'code',
+        'text': 'text',
+        'digest': content_digest('text'),
+    }
+    assert [field.name for field in dataclasses.fields(page)] == [
+        'url',
+        'edit_code',
+        'text',
+        'digest',
+    ]
+
+    page.drop_text()
+    moved = dataclasses.replace(page, url='other')
+
+    assert moved.text is None
+    assert moved.digest == content_digest('text')
+
+    frozen = dataclasses.replace(page.freeze(), edit_code='new')
+
+    assert isinstance(frozen, FrozenPage)
+    assert frozen.edit_code == 'new'
+    assert dataclasses.is_dataclass(frozen)
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from aiohttp import ClientResponseError
+
+from aiorentry.client import Client
+from aiorentry.publisher import EditPublisher, PublishError
+
+
+@pytest.fixture
+def page(isolated, generate_page, fake_server_db):
+    page = generate_page()
+    fake_server_db.add(page)
+
+    return page
+
+
+@pytest.mark.anyio
+async def test_publisher_coalesces_edits(
+    client,
+    page,
+    fake_server_db,
+    fake_server_hits,
+):
+    async with EditPublisher(client, interval=0.05) as publisher:
+        for i in range(50):
+            publisher.publish(f'##{i}', url=page.url, edit_code=page.edit_code)
+            await asyncio.sleep(0.002)
+
+    assert fake_server_db.get(page.url).text == '##49'
+    assert publisher.stats.published == 50
+    assert 2 <= publisher.stats.written < 10
+    assert fake_server_hits['/api/edit/{url}'] == publisher.stats.written
+    assert len(publisher) == 0
+
+
+@pytest.mark.anyio
+async def test_publisher_debounce(client, page, fake_server_db):
+    publisher = EditPublisher(client, interval=0.05, debounce=True)
+
+    for i in range(3):
+        publisher.publish(f'##{i}', url=page.url, edit_code=page.edit_code)
+
+    await asyncio.sleep(0.02)
+
+    assert len(publisher) == 1
+    assert publisher.stats.written == 0
+
+    await asyncio.sleep(0.1)
+
+    assert fake_server_db.get(page.url).text == '##2'
+    assert publisher.stats.written == 1
+    assert publisher.stats.coalesced == 2
+
+    await publisher.close()
+
+    with pytest.raises(RuntimeError):
+        publisher.publish('##3', url=page.url, edit_code=page.edit_code)
+
+
+@pytest.mark.anyio
+async def test_publisher_flush(client, page, fake_server_db):
+    publisher = EditPublisher(client, interval=60, debounce=True)
+    publisher.publish('##Flushed', url=page.url, edit_code=page.edit_code)
+
+    await publisher.flush()
+
+    assert fake_server_db.get(page.url).text == '##Flushed'
+
+    # Unchanged text is not uploaded again
+    publisher.publish('##Flushed', url=page.url, edit_code=page.edit_code)
+    await publisher.close()
+
+    assert publisher.stats.written == 1
+    assert publisher.stats.unchanged == 1
+
+
+@pytest.mark.anyio
+async def test_publisher_errors(client, page):
+    publisher = EditPublisher(client)
+    publisher.publish('##Hello', url=page.url, edit_code='wrong')
+
+    with pytest.raises(PublishError) as exc_info:
+        await publisher.close()
+
+    assert isinstance(exc_info.value.errors[page.url], ClientResponseError)
+    assert publisher.stats.failed == 1
+    assert isinstance(publisher.errors[page.url], ClientResponseError)
+
+    # A wrong edit code won't get better
+    assert publisher.stats.rescheduled == 0
+    assert len(publisher) == 0
+
+
+@pytest.mark.anyio
+async def test_publisher_retries_transient_errors(
+    client,
+    page,
+    fake_server_db,
+    fake_server_faults,
+):
+    publisher = EditPublisher(client, retry_delay=0.05)
+    publisher.publish('##Hello', url=page.url, edit_code=page.edit_code)
+    fake_server_faults.append((500, {}))
+
+    with pytest.raises(PublishError) as exc_info:
+        await publisher.flush()
+
+    assert exc_info.value.errors[page.url].status == 500
+    assert fake_server_db.get(page.url).text == page.text
+    assert publisher.stats.rescheduled == 1
+    assert len(publisher) == 1
+
+    await asyncio.sleep(0.1)
+
+    assert fake_server_db.get(page.url).text == '##Hello'
+    assert publisher.stats.written == 1
+    assert publisher.errors == {}
+    assert len(publisher) == 0
+
+    await publisher.close()
+
+
+@pytest.mark.anyio
+async def test_publisher_retry_keeps_newer_edit(
+    client,
+    page,
+    fake_server_db,
+    fake_server_faults,
+):
+    publisher = EditPublisher(client, retry_delay=60)
+    fake_server_faults.append((500, {}))
+    publisher.publish('##Old', url=page.url, edit_code=page.edit_code)
+    await asyncio.sleep(0)
+
+    # Arrives while the failing write is in flight
+    publisher.publish('##New', url=page.url, edit_code=page.edit_code)
+    await publisher.close()
+
+    assert fake_server_db.get(page.url).text == '##New'
+    assert publisher.stats.failed == 1
+    assert publisher.stats.rescheduled == 0
+
+
+def test_publisher_options():
+    client = Client()
+
+    with pytest.raises(ValueError):
+        EditPublisher(client, retry_delay=0)
@@ -0,0 +1,92 @@
+import math
+
+import pytest
+
+from aiorentry.ratelimit import AdaptiveRateLimiter, TokenBucket
+
+
+@pytest.mark.anyio
+async def test_token_bucket_refill(clock):
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+
+    await bucket.acquire()
+    await bucket.acquire()
+
+    assert bucket.tokens == 0
+
+    clock.now = 0.25
+
+    assert bucket.tokens == 0.5
+
+    clock.now = 10
+
+    assert bucket.tokens == 2
+
+
+@pytest.mark.anyio
+async def test_token_bucket_limits_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=1, clock=clock)
+
+    await bucket.acquire()
+
+    assert bucket.delay() == pytest.approx(0.5)
+
+    clock.now = 0.5
+
+    assert bucket.delay() == 0
+
+
+def test_token_bucket_pause(clock):
+    bucket = TokenBucket(rate=10, clock=clock)
+
+    bucket.pause(3)
+
+    assert bucket.delay() == 3
+
+
+@pytest.mark.anyio
+async def test_token_bucket_try_acquire(clock):
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+
+    assert bucket.try_acquire()
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+    clock.now = 1
+
+    assert bucket.try_acquire()
+
+
+def test_adaptive_rate_limiter(clock):
+    limiter = AdaptiveRateLimiter(read_rate=10, write_rate=2, clock=clock)
+
+    limiter.on_throttled('read', retry_after=5)
+
+    assert limiter.rate('read') == 5
+    assert limiter.rate('write') == 2
+    assert limiter.buckets['read'].delay() == 5
+
+    for _ in range(20):
+        limiter.on_throttled('read', retry_after=None)
+
+    assert limiter.rate('read') == 1
+
+    for _ in range(100):
+        limiter.on_success('read')
+
+    assert limiter.rate('read') == 10
+
+
+@pytest.mark.anyio
+async def test_adaptive_rate_limiter_unlimited_kind(clock):
+    limiter = AdaptiveRateLimiter(read_rate=None, write_rate=2, clock=clock)
+
+    for _ in range(100):
+        await limiter.acquire('read')
+
+    limiter.on_throttled('read', retry_after=5)
+    limiter.on_success('read')
+
+    assert limiter.rate('read') == math.inf
+    assert limiter.rate('write') == 2
+    assert 'read' not in limiter.buckets
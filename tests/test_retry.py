@@ -0,0 +1,50 @@
+from email.utils import formatdate
+
+import pytest
+
+from aiorentry.retry import RetryBudget, RetryPolicy, parse_retry_after
+
+
+def test_parse_retry_after_seconds():
+    assert parse_retry_after({'Retry-After': '7'}) == 7
+    assert parse_retry_after({}) is None
+    assert parse_retry_after({'Retry-After': 'soon'}) is None
+
+
+def test_parse_retry_after_date():
+    header = {'Retry-After': formatdate(1000 + 30, usegmt=True)}
+
+    assert parse_retry_after(header, now=lambda: 1000) == 30
+
+
+def test_retry_policy_backoff():
+    policy = RetryPolicy(max_attempts=3, base_delay=1, max_delay=10)
+
+    assert 0 <= policy.next_delay(1) <= 1
+    assert 0 <= policy.next_delay(2) <= 2
+    assert policy.next_delay(3) is None
+
+
+def test_retry_policy_honors_retry_after():
+    policy = RetryPolicy(max_delay=10)
+
+    assert policy.next_delay(1, retry_after=5) >= 5
+    assert policy.next_delay(1, retry_after=60) is None
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, min_retries=1)
+    policy = RetryPolicy(budget=budget)
+
+    assert policy.next_delay(1) is not None
+    assert policy.next_delay(1) is None
+
+    policy.on_request()
+    policy.on_request()
+
+    assert policy.next_delay(1) is not None
+
+
+def test_retry_policy_invalid():
+    with pytest.raises(ValueError):
+        RetryPolicy(max_attempts=0)
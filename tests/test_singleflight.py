@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from aiorentry.singleflight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+
+        calls += 1
+        await asyncio.sleep(0.01)
+
+        return 'result'
+
+    results = await asyncio.gather(*(
+        flight.do('key', work)
+        for _ in range(10)
+    ))
+
+    assert results == ['result'] * 10
+    assert calls == 1
+    assert 'key' not in flight
+
+
+@pytest.mark.anyio
+async def test_exception_is_shared():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+
+        raise ValueError
+
+    results = await asyncio.gather(
+        flight.do('key', work),
+        flight.do('key', work),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+@pytest.mark.anyio
+async def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+
+        return 'result'
+
+    first = asyncio.ensure_future(flight.do('key', work))
+    second = asyncio.ensure_future(flight.do('key', work))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    release.set()
+
+    assert await second == 'result'
+    assert first.cancelled()
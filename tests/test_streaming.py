@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from aiorentry.streaming import EnvelopeError, EnvelopeParser
+
+TEXT = 'Line "one"\n\tLine \\two\\ / Юникод 😀 \u0001 end'
+
+
+def parse(data: bytes, chunk_size: int):
+    parser = EnvelopeParser()
+    pieces = []
+
+    for start in range(0, len(data), chunk_size):
+        pieces.append(parser.feed(data[start:start + chunk_size]))
+
+    pieces.append(parser.close())
+
+    return ''.join(pieces), parser.fields
+
+
+@pytest.mark.parametrize('ensure_ascii', [True, False])
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 1024])
+def test_content_is_streamed(ensure_ascii, chunk_size):
+    data = json.dumps(
+        {'status': '200', 'content': TEXT},
+        ensure_ascii=ensure_ascii,
+    ).encode()
+
+    content, fields = parse(data, chunk_size)
+
+    assert content == TEXT
+    assert fields == {'status': '200'}
+
+
+def test_other_fields_are_collected():
+    data = json.dumps({
+        'content': 'Invalid data',
+        'status': 400,
+        'errors': 'Invalid edit code.',
+        'extra': {'nested': ['}', 1, None]},
+        'flag': True,
+    }).encode()
+
+    content, fields = parse(data, 3)
+
+    assert content == 'Invalid data'
+    assert fields == {
+        'status': 400,
+        'errors': 'Invalid edit code.',
+        'extra': {'nested': ['}', 1, None]},
+        'flag': True,
+    }
+
+
+@pytest.mark.parametrize('data', [
+    b'{"content": "unterminated',
+    b'["content"]',
+    b'{"content": "\\x"}',
+    b'{"content": "ok"} trailing',
+])
+def test_invalid_envelope(data):
+    with pytest.raises(EnvelopeError):
+        parse(data, 4)
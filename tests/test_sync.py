@@ -0,0 +1,156 @@
+import os
+
+import pytest
+
+from aiorentry.sync import (
+    DEFAULT_MANIFEST_NAME, SyncManifest, main, scan_directory, sync_directory,
+)
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / 'docs'
+    (root / 'guide').mkdir(parents=True)
+    (root / 'index.md').write_text('##Index')
+    (root / 'guide' / 'start.md').write_text('##Start')
+    (root / 'guide' / 'usage.md').write_text('##Usage')
+    (root / 'notes.txt').write_text('Not published')
+
+    return root
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = SyncManifest(tmp_path / 'manifest.db')
+
+    yield manifest
+
+    manifest.close()
+
+
+def test_scan_directory(root, manifest):
+    plan = scan_directory(root, {})
+
+    assert [(c.action, c.path) for c in plan.changes] == [
+        ('create', 'guide/start.md'),
+        ('create', 'guide/usage.md'),
+        ('create', 'index.md'),
+    ]
+    assert plan.scanned == 3
+
+
+@pytest.mark.anyio
+async def test_sync_directory(
+    isolated,
+    client,
+    root,
+    manifest,
+    fake_server_db,
+    fake_server_hits,
+):
+    report = await sync_directory(client, root, manifest)
+
+    assert report.stats.created == 3
+    assert len(manifest) == 3
+
+    entry = manifest.get('guide/start.md')
+
+    assert fake_server_db.get(entry.url).text == '##Start'
+
+    hits = sum(fake_server_hits.values())
+    report = await sync_directory(client, root, manifest)
+
+    # Nothing has changed, nothing is sent
+    assert report.stats.unchanged == 3
+    assert report.applied == []
+    assert sum(fake_server_hits.values()) == hits
+
+    usage = manifest.get('guide/usage.md')
+    index = manifest.get('index.md')
+    (root / 'guide' / 'start.md').write_text('##Started')
+    os.utime(root / 'index.md', ns=(0, index.mtime_ns + 10**9))
+    (root / 'guide' / 'usage.md').unlink()
+    (root / 'new.md').write_text('##New')
+
+    report = await sync_directory(client, root, manifest, concurrency=2)
+
+    assert report.stats.edited == 1
+    assert report.stats.created == 1
+    assert report.stats.deleted == 1
+    assert report.stats.unchanged == 1
+    assert report.stats.failed == 0
+    assert fake_server_db.get(entry.url).text == '##Started'
+    assert not fake_server_db.exists(usage.url)
+    assert manifest.get('guide/usage.md') is None
+    # Same content with a new mtime is only recorded in the manifest
+    assert manifest.get('index.md').mtime_ns == index.mtime_ns + 10**9
+    assert manifest.get('index.md').url == index.url
+
+
+@pytest.mark.anyio
+async def test_sync_directory_missing_page(
+    isolated,
+    client,
+    root,
+    manifest,
+    fake_server_db,
+):
+    await sync_directory(client, root, manifest)
+
+    usage = manifest.get('guide/usage.md')
+    await client.delete_page(url=usage.url, edit_code=usage.edit_code)
+    (root / 'guide' / 'usage.md').unlink()
+
+    report = await sync_directory(client, root, manifest)
+
+    assert report.stats.missing == 1
+    assert report.stats.deleted == 0
+    assert report.stats.failed == 0
+    assert manifest.get('guide/usage.md') is None
+
+
+@pytest.mark.anyio
+async def test_sync_directory_resumes(
+    isolated,
+    client,
+    root,
+    manifest,
+    fake_server_db,
+):
+    await sync_directory(client, root, manifest)
+
+    start = manifest.get('guide/start.md')
+    start.edit_code = 'wrong'
+    manifest.set(start)
+    (root / 'guide' / 'start.md').write_text('##Started')
+    (root / 'guide' / 'usage.md').write_text('##Used')
+
+    report = await sync_directory(client, root, manifest)
+
+    assert report.stats.edited == 1
+    assert report.stats.failed == 1
+    assert list(report.errors) == ['guide/start.md']
+
+    # Only the failed change is left
+    start.edit_code = fake_server_db.get(start.url).edit_code
+    manifest.set(start)
+    report = await sync_directory(client, root, manifest)
+
+    assert [(c.action, c.path) for c in report.applied] == [
+        ('edit', 'guide/start.md'),
+    ]
+    assert fake_server_db.get(start.url).text == '##Started'
+
+
+def test_sync_dry_run(root, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        main([str(root), '--dry-run', '--no-delete'])
+
+    assert exc_info.value.code == 0
+    assert capsys.readouterr().out.splitlines() == [
+        'create  guide/start.md',
+        'create  guide/usage.md',
+        'create  index.md',
+        'scanned=3 unchanged=0 changes=3',
+    ]
+    assert (root / DEFAULT_MANIFEST_NAME).exists()
@@ -0,0 +1,68 @@
+import pytest
+from aiohttp import ClientResponseError
+
+from aiorentry.bench import main
+from aiorentry.client import Client
+from aiorentry.retry import RetryPolicy
+from aiorentry.testing import FakeRentryServer
+
+
+@pytest.mark.anyio
+async def test_fake_server_standalone():
+    async with FakeRentryServer() as server:
+        async with Client(str(server.url)) as client:
+            page = await client.new_page('##Hello')
+            text = await client.raw(page.url, server.raw_access_code)
+
+        assert text == '##Hello'
+        assert server.pages.get(page.url).text == '##Hello'
+        assert server.hits['/api/new'] == 1
+
+    with pytest.raises(RuntimeError):
+        server.url
+
+
+@pytest.mark.anyio
+async def test_fake_server_page_size_limit():
+    async with FakeRentryServer(max_page_size=10) as server:
+        async with Client(str(server.url)) as client:
+            with pytest.raises(ClientResponseError) as exc_info:
+                await client.new_page('x' * 11)
+
+    assert exc_info.value.status == 400
+    assert len(server.pages) == 0
+
+
+@pytest.mark.anyio
+async def test_fake_server_errors():
+    async with FakeRentryServer(error_rate=1, error_status=502) as server:
+        async with Client(str(server.url)) as client:
+            with pytest.raises(ClientResponseError) as exc_info:
+                await client.raw('page', server.raw_access_code)
+
+    assert exc_info.value.status == 502
+
+
+@pytest.mark.anyio
+async def test_fake_server_throttling():
+    policy = RetryPolicy(max_attempts=1)
+
+    async with FakeRentryServer(rate_limit=1, burst=2) as server:
+        async with Client(str(server.url), retry_policy=policy) as client:
+            page = await client.new_page('##Hello')
+
+            with pytest.raises(ClientResponseError) as exc_info:
+                await client.raw(page.url, server.raw_access_code)
+
+    assert exc_info.value.status == 429
+    assert exc_info.value.headers['Retry-After'] == '1'
+
+
+def test_bench_client(capsys):
+    main(['client', '--concurrency', '1', '4', '--requests', '5'])
+
+    lines = capsys.readouterr().out.splitlines()
+
+    assert len(lines) == 9
+    assert lines[1].split()[:2] == ['new_page', '1']
+    assert all(line.split()[3] == '0' for line in lines[1:])
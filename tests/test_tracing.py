@@ -0,0 +1,78 @@
+import pytest
+from aiohttp import ClientResponseError
+
+from aiorentry.client import Client
+from aiorentry.tracing import Histogram, LatencyRecorder
+
+
+def test_histogram_percentiles():
+    histogram = Histogram(precision=0.01)
+
+    for value in range(1, 1001):
+        histogram.record(value / 1000)
+
+    assert histogram.count == 1000
+    assert histogram.max == 1.0
+    assert histogram.percentile(50) == pytest.approx(0.5, rel=0.01)
+    assert histogram.percentile(99) == pytest.approx(0.99, rel=0.01)
+    assert histogram.percentile(100) == 1.0
+
+
+def test_histogram_empty():
+    histogram = Histogram()
+
+    assert histogram.summary() == {
+        'count': 0,
+        'mean': 0.0,
+        'max': 0.0,
+        'p50': 0.0,
+        'p95': 0.0,
+        'p99': 0.0,
+    }
+
+
+@pytest.mark.anyio
+async def test_latency_recorder(
+    isolated,
+    fake_server_url,
+    fake_server_db,
+    generate_page,
+    valid_raw_access_code,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+    recorder = LatencyRecorder()
+
+    async with Client(fake_server_url, observers=[recorder]) as client:
+        await client.new_page('##Hello')
+        await client.raw(page.url, valid_raw_access_code)
+
+        with pytest.raises(ClientResponseError):
+            await client.raw(generate_page().url, valid_raw_access_code)
+
+        async for _ in client.raw_stream(page.url, valid_raw_access_code):
+            pass
+
+    latency = recorder.latency
+
+    assert latency['new_page'].count == 1
+    assert latency['new_page [csrf]'].count == 1
+    assert latency['raw'].count == 2
+    assert latency['GET /'].count == 1
+    assert latency['POST /api/new [connect]'].count == 1
+    assert latency['POST /api/new [decode]'].count == 1
+    assert latency['GET /api/raw/{url} [wait]'].count == 3
+
+    assert recorder.bytes_sent['POST /api/new'] > 0
+    assert recorder.bytes_received['GET /api/raw/{url}'] > len(page.text)
+
+    assert recorder.outcomes['POST /api/new', '200'] == 1
+    assert recorder.outcomes['GET /api/raw/{url}', '200'] == 2
+    assert recorder.outcomes['GET /api/raw/{url}', '404'] == 1
+    assert recorder.outcomes['raw', 'ok'] == 1
+    assert recorder.outcomes['raw', 'http_error'] == 1
+
+    dump = recorder.dump(percentiles=[50])
+
+    assert set(dump['latency']['new_page']) == {'count', 'mean', 'max', 'p50'}
+    assert dump['outcomes']['new_page ok'] == 1
@@ -0,0 +1,144 @@
+import pytest
+from aiohttp import ClientResponseError
+from yarl import URL
+
+from aiorentry.client import Client
+from aiorentry.models import Page
+from aiorentry.retry import RetryPolicy
+from aiorentry.testing import FakeRentryServer
+from aiorentry.transport import MemoryResponse, MemoryTransport
+
+
+@pytest.fixture
+def server():
+    return FakeRentryServer()
+
+
+@pytest.fixture
+async def memory_client(server):
+    async with Client(transport=server.transport()) as client:
+        yield client
+
+
+@pytest.mark.anyio
+async def test_memory_transport(server, memory_client):
+    page = await memory_client.new_page('##Hello')
+
+    assert server.pages.get(page.url).text == '##Hello'
+
+    await memory_client.edit_page(
+        '##Edited',
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+    text = await memory_client.raw(page.url, server.raw_access_code)
+
+    assert text == '##Edited'
+
+    chunks = [
+        chunk
+        async for chunk in memory_client.raw_stream(
+            page.url,
+            server.raw_access_code,
+            chunk_size=4,
+        )
+    ]
+
+    assert ''.join(chunks) == '##Edited'
+    assert await memory_client.delete_page(
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+    assert not server.pages.exists(page.url)
+    assert server.hits == {
+        '/': 1,
+        '/api/new': 1,
+        '/api/edit/{url}': 1,
+        '/api/raw/{url}': 2,
+        '/api/delete/{url}': 1,
+    }
+
+
+@pytest.mark.anyio
+async def test_memory_transport_upload(server, memory_client):
+    async def chunks():
+        yield '##Streamed & '
+
+        yield 'encoded 😀'
+
+    page = await memory_client.new_page_from(chunks())
+
+    assert server.pages.get(page.url).text == '##Streamed & encoded 😀'
+
+
+@pytest.mark.anyio
+async def test_memory_transport_errors(server, memory_client):
+    page = Page(url='hello', edit_code='code', text='##Hello')
+    server.pages.add(page)
+
+    with pytest.raises(ClientResponseError) as exc_info:
+        await memory_client.edit_page('##Hi', url=page.url, edit_code='wrong')
+
+    assert exc_info.value.status == 400
+
+    # A revoked CSRF token is refreshed
+    server.csrf_tokens.revoke_all()
+    await memory_client.edit_page(
+        '##Hi',
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+    server.faults.append((503, {}))
+
+    with pytest.raises(ClientResponseError) as exc_info:
+        await memory_client.raw(page.url, server.raw_access_code)
+
+    assert exc_info.value.status == 503
+
+
+@pytest.mark.anyio
+async def test_memory_transport_retries(server):
+    server.faults.append((429, {'Retry-After': '0'}))
+    client = Client(
+        transport=server.transport(),
+        retry_policy=RetryPolicy(base_delay=0),
+    )
+
+    async with client:
+        page = await client.new_page('##Hello')
+
+    assert server.pages.get(page.url).text == '##Hello'
+
+
+@pytest.mark.anyio
+async def test_memory_transport_handler():
+    requests = []
+
+    async def handler(request):
+        requests.append(request)
+
+        return MemoryResponse(
+            headers={'X-Request': request.method},
+            cookies={'csrftoken': 'token'},
+            body=b'{"status": "200"}',
+        )
+
+    transport = MemoryTransport(handler)
+    response = await transport.request(
+        'POST',
+        URL('https://rentry.co/api/new'),
+        headers={'Referer': 'https://rentry.co'},
+        data={'text': '##Hello'},
+    )
+
+    assert response.headers['x-request'] == 'POST'
+    assert response.cookies['csrftoken'].value == 'token'
+    assert await response.read() == b'{"status": "200"}'
+    assert requests[0].headers['referer'] == 'https://rentry.co'
+    assert requests[0].form == {'text': '##Hello'}
+
+
+def test_transport_with_session():
+    with pytest.raises(ValueError):
+        Client(session=object(), transport=object())
@@ -0,0 +1,108 @@
+import io
+from urllib.parse import urlencode
+
+import pytest
+
+from aiorentry.models import content_digest
+from aiorentry.upload import UploadBody, encode_form
+
+TEXT = '\n'.join(f'Line {i}: "quotes" & юникод 😀' for i in range(2000))
+
+
+async def chunked(data, size):
+    for start in range(0, len(data), size):
+        yield data[start:start + size]
+
+
+@pytest.mark.anyio
+async def test_encode_form():
+    # Chunk boundaries split multibyte characters
+    body = UploadBody(chunked(TEXT.encode(), 7))
+    fields = {'edit_code': 'c&d', 'text': body, 'url': 'x y'}
+
+    encoded = b''.join([chunk async for chunk in encode_form(fields)])
+
+    assert encoded.decode() == urlencode({**fields, 'text': TEXT})
+    assert body.digest == content_digest(TEXT)
+    assert body.size == len(TEXT.encode())
+
+
+@pytest.mark.anyio
+async def test_upload_body_replay():
+    file = io.BytesIO(b'skipped' + TEXT.encode())
+    file.seek(7)
+    body = UploadBody(file, chunk_size=1000)
+
+    for _ in range(2):
+        data = b''.join([chunk async for chunk in body.chunks()])
+
+        assert data == TEXT.encode()
+
+    once = UploadBody(chunked(TEXT, 1000))
+
+    assert not once.replayable
+
+    [chunk async for chunk in once.chunks()]
+
+    with pytest.raises(RuntimeError):
+        [chunk async for chunk in once.chunks()]
+
+
+@pytest.mark.anyio
+async def test_new_page_from_path(
+    isolated,
+    tmp_path,
+    client,
+    fake_server_db,
+    csrf_tokens,
+):
+    path = tmp_path / 'report.md'
+    path.write_text(TEXT)
+
+    await client.new_page('##Hello')
+    csrf_tokens.revoke_all()
+
+    # The file is sent again after the token has been refreshed
+    page = await client.new_page_from(path, chunk_size=1024)
+
+    assert fake_server_db.get(page.url).text == TEXT
+    assert page.text is None
+    assert page.digest == content_digest(TEXT)
+
+
+@pytest.mark.anyio
+async def test_edit_page_from(
+    isolated,
+    client,
+    fake_server_db,
+    fake_server_hits,
+    generate_page,
+):
+    page = generate_page()
+    fake_server_db.add(page)
+
+    await client.edit_page_from(
+        chunked(TEXT, 100),
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+    assert fake_server_db.get(page.url).text == TEXT
+
+    await client.edit_page_from(
+        io.BytesIO(b'##Binary'),
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+    assert fake_server_db.get(page.url).text == '##Binary'
+
+    # The digest of the uploaded text is remembered
+    result = await client.edit_page_if_changed(
+        '##Binary',
+        url=page.url,
+        edit_code=page.edit_code,
+    )
+
+    assert not result.written
+    assert fake_server_hits['/api/edit/{url}'] == 2